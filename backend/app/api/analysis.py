@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends, Query
+from typing import List
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.schemas import AnalysisSummaryResponse, EngagementVelocityResponse
+from app.services.analysis_cache import get_analysis_cache
+from app.services.engagement_refresh import get_engagement_velocity
+
+router = APIRouter()
+
+
+@router.get("/", response_model=AnalysisSummaryResponse)
+def get_analysis(db: Session = Depends(get_db)):
+    """Get the historical tweet analysis summary (shared with tweet generation)"""
+    return get_analysis_cache().get_summary(db)
+
+
+@router.get("/velocity", response_model=List[EngagementVelocityResponse])
+def get_velocity(
+    hours: int = Query(24, ge=1, le=24 * 30),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """Get the tweets gaining engagement fastest over the last hours"""
+    return get_engagement_velocity(db, hours=hours, limit=limit)
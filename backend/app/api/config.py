@@ -1,5 +1,9 @@
 from fastapi import APIRouter
 from app.config import get_settings
+from app.services.llm_cache import get_llm_cache
+from app.services.provider_router import get_provider_router
+from app.services.http_transport import get_http_transport
+from app.services.rate_limiter import get_rate_limiter
 
 router = APIRouter()
 
@@ -13,3 +17,27 @@ def get_config():
         "content_generation_time": settings.content_generation_time,
         "tweets_per_day": settings.tweets_per_day
     }
+
+
+@router.get("/llm-cache")
+def get_llm_cache_stats():
+    """Get LLM response cache hit/miss counters"""
+    return get_llm_cache().stats()
+
+
+@router.get("/providers")
+def get_provider_stats():
+    """Get per-provider latency/error stats and circuit breaker state"""
+    return get_provider_router().snapshot()
+
+
+@router.get("/http-transport")
+def get_http_transport_stats():
+    """Get outbound connection pool settings and connection reuse per upstream"""
+    return get_http_transport().snapshot()
+
+
+@router.get("/twitter-rate-limits")
+def get_twitter_rate_limits():
+    """Get the remaining Twitter API budget per endpoint"""
+    return get_rate_limiter().snapshot()
@@ -1,55 +1,78 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.database import get_db
-from app.models import InstagramPost
-from app.schemas import InstagramPostResponse, InstagramPostCreate, InstagramPostUpdate
+from app.database import get_async_db
+from app.models import InstagramPost, Tweet
+from app.schemas import InstagramPostResponse, InstagramPostCreate, InstagramPostUpdate, InstagramFromTweetRequest, JobResponse
+from app.services.content_generator import run_instagram_post_job
+from app.services.job_queue import get_job_queue
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[InstagramPostResponse])
-def get_instagram_posts(
+async def get_instagram_posts(
     status: str = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all Instagram posts, optionally filtered by status"""
-    query = db.query(InstagramPost)
+    query = select(InstagramPost)
     if status:
         query = query.filter(InstagramPost.status == status)
-    posts = query.order_by(InstagramPost.created_at.desc()).offset(skip).limit(limit).all()
-    return posts
+    result = await db.execute(query.order_by(InstagramPost.created_at.desc()).offset(skip).limit(limit))
+    return result.scalars().all()
 
 
 @router.get("/{post_id}", response_model=InstagramPostResponse)
-def get_instagram_post(post_id: int, db: Session = Depends(get_db)):
+async def get_instagram_post(post_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get a specific Instagram post by ID"""
-    post = db.query(InstagramPost).filter(InstagramPost.id == post_id).first()
+    post = await db.get(InstagramPost, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Instagram post not found")
     return post
 
 
 @router.post("/", response_model=InstagramPostResponse)
-def create_instagram_post(post: InstagramPostCreate, db: Session = Depends(get_db)):
+async def create_instagram_post(post: InstagramPostCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new Instagram post"""
     db_post = InstagramPost(**post.model_dump())
     db.add(db_post)
-    db.commit()
-    db.refresh(db_post)
+    await db.commit()
+    await db.refresh(db_post)
     return db_post
 
 
+@router.post("/from-tweet/{tweet_id}", response_model=JobResponse)
+async def create_instagram_post_from_tweet(
+    tweet_id: int,
+    request: InstagramFromTweetRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Start a background job that turns a tweet into an Instagram post
+
+    Poll GET /api/jobs/{id}; its result holds instagram_post_id.
+    """
+    if await db.get(Tweet, tweet_id) is None:
+        raise HTTPException(status_code=404, detail="Tweet not found")
+
+    return await db.run_sync(lambda session: get_job_queue().enqueue(
+        session, "create_instagram_post", run_instagram_post_job,
+        tweet_id=tweet_id, ai_source=request.ai_source, cache=request.cache
+    ))
+
+
 @router.patch("/{post_id}", response_model=InstagramPostResponse)
-def update_instagram_post(
+async def update_instagram_post(
     post_id: int,
     post_update: InstagramPostUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update an Instagram post"""
-    post = db.query(InstagramPost).filter(InstagramPost.id == post_id).first()
+    post = await db.get(InstagramPost, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Instagram post not found")
 
@@ -57,18 +80,18 @@ def update_instagram_post(
     for key, value in update_data.items():
         setattr(post, key, value)
 
-    db.commit()
-    db.refresh(post)
+    await db.commit()
+    await db.refresh(post)
     return post
 
 
 @router.delete("/{post_id}")
-def delete_instagram_post(post_id: int, db: Session = Depends(get_db)):
+async def delete_instagram_post(post_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete an Instagram post"""
-    post = db.query(InstagramPost).filter(InstagramPost.id == post_id).first()
+    post = await db.get(InstagramPost, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Instagram post not found")
 
-    db.delete(post)
-    db.commit()
+    await db.delete(post)
+    await db.commit()
     return {"message": "Instagram post deleted successfully"}
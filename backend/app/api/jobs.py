@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.models import Job
+from app.schemas import JobResponse
+from app.services.job_queue import get_job_queue
+
+router = APIRouter()
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Get a background job's state, progress and result"""
+    job = await db.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("/{job_id}/cancel", response_model=JobResponse)
+async def cancel_job(job_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Ask a queued or running job to stop (it ends up failed with error 'Cancelled')"""
+    job = await db.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    await db.run_sync(lambda session: get_job_queue().cancel(session, job_id))
+    await db.refresh(job)
+    return job
@@ -1,13 +1,16 @@
 from fastapi import APIRouter, Depends, Request
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List
 from datetime import datetime
 from zoneinfo import ZoneInfo
-from app.database import get_db
+from app.database import get_async_db, SessionLocal
 from app.models import PostingSchedule, Tweet
 from app.schemas import PostingScheduleResponse, PostingScheduleCreate
 from app.services.content_generator import get_content_generator
-from app.services.twitter_client import get_twitter_client
+from app.services.post_outbox import PostOutbox
+from app.services.dedup_index import NearDuplicateIndex
 from app.config import get_settings
 
 router = APIRouter()
@@ -16,45 +19,37 @@ CENTRAL_TZ = ZoneInfo("America/Chicago")
 
 
 @router.get("/", response_model=List[PostingScheduleResponse])
-def get_schedules(db: Session = Depends(get_db)):
+async def get_schedules(db: AsyncSession = Depends(get_async_db)):
     """Get all posting schedules"""
-    schedules = db.query(PostingSchedule).all()
-    return schedules
+    result = await db.execute(select(PostingSchedule))
+    return result.scalars().all()
 
 
 @router.post("/", response_model=PostingScheduleResponse)
-def create_schedule(schedule: PostingScheduleCreate, db: Session = Depends(get_db)):
+async def create_schedule(schedule: PostingScheduleCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new posting schedule"""
     db_schedule = PostingSchedule(**schedule.model_dump())
     db.add(db_schedule)
-    db.commit()
-    db.refresh(db_schedule)
+    await db.commit()
+    await db.refresh(db_schedule)
     return db_schedule
 
 
 @router.delete("/{schedule_id}")
-def delete_schedule(schedule_id: int, db: Session = Depends(get_db)):
+async def delete_schedule(schedule_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete a posting schedule"""
-    schedule = db.query(PostingSchedule).filter(PostingSchedule.id == schedule_id).first()
+    schedule = await db.get(PostingSchedule, schedule_id)
     if not schedule:
         return {"message": "Schedule not found"}
 
-    db.delete(schedule)
-    db.commit()
+    await db.delete(schedule)
+    await db.commit()
     return {"message": "Schedule deleted successfully"}
 
 
-@router.get("/cron/generate-daily-tweets")
-async def cron_generate_daily_tweets(request: Request, db: Session = Depends(get_db)):
-    """
-    Cron job endpoint: Generate daily tweets
-    Called by Vercel Cron at scheduled time (9 AM CT = 2/3 PM UTC depending on DST)
-    """
-    # Verify this is coming from Vercel Cron
-    user_agent = request.headers.get("user-agent", "")
-    if "vercel-cron" not in user_agent.lower() and settings.environment == "production":
-        return {"error": "Unauthorized - must be called by Vercel Cron"}
-
+def _generate_daily_tweets() -> Dict[str, Any]:
+    """Replace pending tweets with a new daily batch (blocking - run in a worker thread)"""
+    db = SessionLocal()
     try:
         generator = get_content_generator(db)
 
@@ -63,17 +58,37 @@ async def cron_generate_daily_tweets(request: Request, db: Session = Depends(get
         deleted_count = len(old_pending)
         for tweet in old_pending:
             db.delete(tweet)
+        NearDuplicateIndex(db).remove('tweet', [tweet.id for tweet in old_pending])
         db.commit()
 
         # Generate new tweets
-        tweets_per_day = settings.tweets_per_day
-        results = generator.generate_daily_tweets(count=tweets_per_day)
+        results = generator.generate_daily_tweets(count=settings.tweets_per_day)
+        results['deleted_old'] = deleted_count
+        return results
+    finally:
+        db.close()
+
+
+@router.get("/cron/generate-daily-tweets")
+async def cron_generate_daily_tweets(request: Request):
+    """
+    Cron job endpoint: Generate daily tweets
+    Called by Vercel Cron at scheduled time (9 AM CT = 2/3 PM UTC depending on DST)
+    """
+    # Verify this is coming from Vercel Cron
+    user_agent = request.headers.get("user-agent", "")
+    if "vercel-cron" not in user_agent.lower() and settings.environment == "production":
+        return {"error": "Unauthorized - must be called by Vercel Cron"}
+
+    try:
+        results = await run_in_threadpool(_generate_daily_tweets)
 
         return {
             "success": True,
             "message": f"Generated {results['total']} tweets",
-            "deleted_old": deleted_count,
+            "deleted_old": results['deleted_old'],
             "generated": results['total'],
+            "duplicates_dropped": results['duplicates_dropped'],
             "timestamp": datetime.now(CENTRAL_TZ).isoformat()
         }
     except Exception as e:
@@ -84,8 +99,17 @@ async def cron_generate_daily_tweets(request: Request, db: Session = Depends(get
         }
 
 
+def _drain_post_outbox() -> Dict[str, Any]:
+    """Post every due tweet through the posting outbox (blocking - run in a worker thread)"""
+    db = SessionLocal()
+    try:
+        return PostOutbox(db).drain()
+    finally:
+        db.close()
+
+
 @router.get("/cron/post-scheduled-tweets")
-async def cron_post_scheduled_tweets(request: Request, db: Session = Depends(get_db)):
+async def cron_post_scheduled_tweets(request: Request):
     """
     Cron job endpoint: Post scheduled tweets that are due
     Called by Vercel Cron every 15 minutes
@@ -96,43 +120,20 @@ async def cron_post_scheduled_tweets(request: Request, db: Session = Depends(get
         return {"error": "Unauthorized - must be called by Vercel Cron"}
 
     try:
-        twitter_client = get_twitter_client()
-        now = datetime.now(CENTRAL_TZ)
-
-        # Find tweets that are scheduled and due to be posted
-        due_tweets = db.query(Tweet).filter(
-            Tweet.status == "scheduled",
-            Tweet.scheduled_time <= now
-        ).all()
-
-        posted_count = 0
-        failed_count = 0
-        errors = []
-
-        for tweet in due_tweets:
-            try:
-                # Post to Twitter
-                twitter_id = twitter_client.post_tweet(tweet.content)
-
-                # Update tweet status
-                tweet.status = "posted"
-                tweet.posted_time = now
-                tweet.twitter_id = twitter_id
-                db.commit()
-
-                posted_count += 1
-            except Exception as e:
-                tweet.status = "failed"
-                db.commit()
-                failed_count += 1
-                errors.append(f"Tweet {tweet.id}: {str(e)}")
+        # Claims each due tweet in the posting outbox, so this can't double-post
+        # alongside the in-process scheduler
+        counts = await run_in_threadpool(_drain_post_outbox)
+        retry_at = counts['retry_at']
 
         return {
             "success": True,
-            "posted": posted_count,
-            "failed": failed_count,
-            "total_checked": len(due_tweets),
-            "errors": errors if errors else None,
+            "posted": counts['posted'],
+            "failed": counts['failed'],
+            "unknown": counts['unknown'],
+            "total_checked": counts['posted'] + counts['failed'] + counts['unknown'] + counts['rate_limited'],
+            # Rate-limited tweets stay scheduled and go out on a later run
+            "rate_limited_until": retry_at.astimezone(CENTRAL_TZ).isoformat() if retry_at else None,
+            "errors": counts['errors'] if counts['errors'] else None,
             "timestamp": datetime.now(CENTRAL_TZ).isoformat()
         }
     except Exception as e:
@@ -1,47 +1,63 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.database import get_db
-from app.models import Tweet, HistoricalTweet, TweetEdit
-from app.schemas import TweetResponse, TweetUpdate, ContentGenerationRequest, ContentGenerationResponse
-from app.services.content_generator import get_content_generator
-from datetime import datetime
+from app.database import get_async_db, AsyncSessionLocal
+from app.models import Job, PostOutboxEntry, Tweet, TweetEdit
+from app.schemas import TweetResponse, TweetUpdate, ContentGenerationRequest, GenerateTweetsResponse, JobResponse
+from app.services.content_generator import run_generation_job
+from app.services.candidate_pool import CandidatePool, request_pool_refill, start_top_up, CANDIDATE_STATUS, TOP_UP_JOB_KIND
+from app.services.job_queue import get_job_queue
+from app.services.dedup_index import NearDuplicateIndex
+from app.services.scheduler_service import get_scheduler_service
+from app.services.post_outbox import OUTBOX_PENDING
 from zoneinfo import ZoneInfo
+import asyncio
+import json
 
 # Configure timezone to Central Time (USA)
 CENTRAL_TZ = ZoneInfo("America/Chicago")
 
+# How often a generation stream checks its job for new tweets. Each open
+# stream costs one small jobs-table read per poll (plus a tweets read when
+# new IDs arrive), so N watching clients mean about 2N reads per second.
+STREAM_POLL_SECONDS = 0.5
+
 router = APIRouter()
 
 
 @router.get("/", response_model=List[TweetResponse])
-def get_tweets(
+async def get_tweets(
     status: str = None,
     skip: int = 0,
     limit: int = 500,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all tweets, optionally filtered by status"""
-    query = db.query(Tweet)
+    query = select(Tweet)
     if status:
         query = query.filter(Tweet.status == status)
-    tweets = query.order_by(Tweet.created_at.desc()).offset(skip).limit(limit).all()
-    return tweets
+    else:
+        # The candidate pool isn't up for review until it is served
+        query = query.filter(Tweet.status != CANDIDATE_STATUS)
+    result = await db.execute(query.order_by(Tweet.created_at.desc()).offset(skip).limit(limit))
+    return result.scalars().all()
 
 
 @router.get("/{tweet_id}", response_model=TweetResponse)
-def get_tweet(tweet_id: int, db: Session = Depends(get_db)):
+async def get_tweet(tweet_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get a specific tweet by ID"""
-    tweet = db.query(Tweet).filter(Tweet.id == tweet_id).first()
+    tweet = await db.get(Tweet, tweet_id)
     if not tweet:
         raise HTTPException(status_code=404, detail="Tweet not found")
     return tweet
 
 
 @router.patch("/{tweet_id}", response_model=TweetResponse)
-def update_tweet(tweet_id: int, tweet_update: TweetUpdate, db: Session = Depends(get_db)):
+async def update_tweet(tweet_id: int, tweet_update: TweetUpdate, db: AsyncSession = Depends(get_async_db)):
     """Update a tweet (edit content, change status, schedule)"""
-    tweet = db.query(Tweet).filter(Tweet.id == tweet_id).first()
+    tweet = await db.get(Tweet, tweet_id)
     if not tweet:
         raise HTTPException(status_code=404, detail="Tweet not found")
 
@@ -75,64 +91,136 @@ def update_tweet(tweet_id: int, tweet_update: TweetUpdate, db: Session = Depends
     for key, value in update_data.items():
         setattr(tweet, key, value)
 
-    db.commit()
-    db.refresh(tweet)
+    if tweet.status != "scheduled":
+        # Drop a leftover (e.g. rate-limited) posting attempt so it can't go out later
+        await db.execute(delete(PostOutboxEntry).where(
+            PostOutboxEntry.tweet_id == tweet.id,
+            PostOutboxEntry.status == OUTBOX_PENDING
+        ))
+
+    await db.commit()
+    await db.refresh(tweet)
+
+    # Register, move or drop the tweet's posting trigger
+    if "status" in update_data or "scheduled_time" in update_data:
+        get_scheduler_service().sync_tweet_post(tweet.id, tweet.status, tweet.scheduled_time)
     return tweet
 
 
 @router.delete("/{tweet_id}")
-def delete_tweet(tweet_id: int, db: Session = Depends(get_db)):
+async def delete_tweet(tweet_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete a tweet"""
-    tweet = db.query(Tweet).filter(Tweet.id == tweet_id).first()
+    tweet = await db.get(Tweet, tweet_id)
     if not tweet:
         raise HTTPException(status_code=404, detail="Tweet not found")
 
-    db.delete(tweet)
-    db.commit()
+    await db.delete(tweet)
+    await db.run_sync(lambda session: NearDuplicateIndex(session).remove('tweet', [tweet_id]))
+    await db.commit()
+    get_scheduler_service().unschedule_tweet_post(tweet_id)
     return {"message": "Tweet deleted successfully"}
 
 
-@router.post("/generate", response_model=ContentGenerationResponse)
+@router.post("/generate", response_model=GenerateTweetsResponse)
 async def generate_tweets(
     request: ContentGenerationRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Trigger tweet generation using AI"""
-    try:
-        generator = get_content_generator(db)
-
-        # Delete all old pending tweets to show only new ones
-        old_pending = db.query(Tweet).filter(Tweet.status == "pending").all()
-        deleted_count = len(old_pending)
-        for tweet in old_pending:
-            db.delete(tweet)
-        db.commit()
-        if deleted_count > 0:
-            print(f"Deleted {deleted_count} old pending tweets")
-
-        # Only fetch historical tweets if we don't have enough
-        historical_count = db.query(HistoricalTweet).count()
-        if historical_count < 50:
-            try:
-                stored = generator.fetch_and_store_historical_tweets(count=100)
-                print(f"Fetched {stored} new historical tweets (total: {historical_count + stored})")
-            except Exception as e:
-                print(f"Note: Could not fetch historical tweets: {e}")
-                # Continue anyway - might already have some stored
-        else:
-            print(f"Using existing {historical_count} historical tweets (skipping fetch to avoid rate limits)")
-
-        # Generate new tweets
-        results = generator.generate_daily_tweets(count=request.count)
-
-        return ContentGenerationResponse(
-            message=f"Successfully generated {results['total']} tweets ({results['claude']} from Claude, {results['chatgpt']} from ChatGPT)",
-            tweets_generated=results['total'],
-            timestamp=datetime.now(CENTRAL_TZ)
-        )
+    """
+    Top the review queue up to count pending tweets from the candidate pool
 
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error generating tweets: {str(e)}"
-        )
+    If the pool runs short, a background job generates the rest (poll
+    GET /api/jobs/{id}). The pool is refilled in the background.
+    """
+    def serve(session):
+        served, missing = CandidatePool(session).top_up_pending(request.count)
+        job = None
+        if missing:
+            job = get_job_queue().enqueue(
+                session, "generate_tweets", run_generation_job, count=missing, replace_pending=False
+            )
+        request_pool_refill(session)
+        return {'served': served, 'job': job}
+
+    return await db.run_sync(serve)
+
+
+def _sse_event(event: str, data) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/generate/jobs", response_model=JobResponse)
+async def create_generation_job(
+    request: ContentGenerationRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Top the review queue up to count pending tweets, as a job clients can stream
+
+    Candidates are served from the pool before this returns; a background
+    job generates only what the pool couldn't cover. Stream its tweets
+    with GET /generate/jobs/{id}/stream, or poll GET /api/jobs/{id}.
+    Cancel it with POST /api/jobs/{id}/cancel.
+    """
+    return await db.run_sync(lambda session: start_top_up(session, request.count))
+
+
+@router.get("/generate/jobs/{job_id}/stream")
+async def stream_generation_job(job_id: str):
+    """
+    Stream a generation job's tweets as they are served or stored
+
+    Only reads the job: closing the stream leaves it running (cancel it
+    explicitly). Any API worker can serve the stream, since it follows the
+    job's progress in the database, polled every STREAM_POLL_SECONDS.
+
+    Server-Sent Events: 'tweet' (a served or stored tweet), 'duplicate' (a
+    dropped near-duplicate), then 'done' with the totals or 'error' with a
+    message.
+    """
+    async with AsyncSessionLocal() as db:
+        job = await db.get(Job, job_id)
+        if not job or job.kind != TOP_UP_JOB_KIND:
+            raise HTTPException(status_code=404, detail="Generation job not found")
+
+    async def event_stream():
+        sent_tweets = 0
+        sent_duplicates = 0
+        async with AsyncSessionLocal() as db:
+            while True:
+                job = await db.get(Job, job_id, populate_existing=True)
+                if job is None:
+                    yield _sse_event('error', {'detail': "Generation job was deleted"})
+                    break
+                progress = job.progress or {}
+
+                tweet_ids = progress.get('tweet_ids', [])[sent_tweets:]
+                if tweet_ids:
+                    result = await db.execute(select(Tweet).where(Tweet.id.in_(tweet_ids)))
+                    tweets = {tweet.id: tweet for tweet in result.scalars()}
+                    for tweet_id in tweet_ids:
+                        if tweet_id in tweets:
+                            yield _sse_event('tweet', TweetResponse.model_validate(tweets[tweet_id]).model_dump(mode='json'))
+                    sent_tweets += len(tweet_ids)
+
+                for duplicate in progress.get('duplicates', [])[sent_duplicates:]:
+                    yield _sse_event('duplicate', duplicate)
+                    sent_duplicates += 1
+
+                if job.status == "succeeded":
+                    yield _sse_event('done', job.result)
+                    break
+                if job.status == "failed":
+                    yield _sse_event('error', {'detail': f"Error generating tweets: {job.error}"})
+                    break
+
+                # End the read transaction so the next poll sees the job's new commits
+                await db.rollback()
+                await asyncio.sleep(STREAM_POLL_SECONDS)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
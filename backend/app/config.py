@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import List
 
 
 class Settings(BaseSettings):
@@ -36,6 +37,78 @@ class Settings(BaseSettings):
     content_generation_time: str = "09:00"
     tweets_per_day: int = 25
     environment: str = "development"
+    generation_deadline_seconds: float = 120.0  # Overall deadline for one generation run across providers
+    generation_chunk_size: int = 10  # Tweets requested per completion
+    generation_max_concurrency: int = 4  # Concurrent completions per provider
+    generation_top_up_rounds: int = 2  # Extra rounds to request only the shortfall
+    job_workers: int = 1  # Background job worker threads
+    job_background_workers: int = 1  # Worker threads for upkeep jobs (candidate pool refills), kept apart from job_workers
+    job_heartbeat_seconds: float = 15.0  # How often a process marks its queued/running jobs alive
+    job_heartbeat_timeout_seconds: float = 60.0  # Jobs not marked alive for this long are failed as abandoned
+    candidate_pool_target_size: int = 50  # Unreviewed tweets kept ready so Generate can serve instantly
+    candidate_pool_low_water: int = 25  # Pool size below which a refill is queued
+    candidate_pool_check_minutes: int = 30  # How often the scheduler checks the pool
+
+    prompt_context_token_budget: int = 1500  # Estimated tokens for examples, topics, phrases and edits
+    prompt_expected_tweet_chars: int = 280  # Used to size max_tokens from the tweet count
+    prompt_max_tokens_headroom: float = 1.25
+
+    # Provider Routing
+    provider_hedge_default_delay_seconds: float = 8.0  # Hedge delay until enough latency samples exist
+    provider_hedge_min_delay_seconds: float = 1.0
+    provider_hedge_min_samples: int = 5
+    provider_stats_window: int = 50  # Recent requests kept per provider
+    provider_circuit_failure_threshold: int = 3  # Consecutive failures that open the circuit
+    provider_circuit_cooldown_seconds: float = 60.0  # Time before a trial request is let through
+
+    # Outbound HTTP (one shared connection pool per upstream: Anthropic, OpenAI, Twitter)
+    http_max_connections: int = 20
+    http_max_keepalive_connections: int = 10
+    http_keepalive_expiry_seconds: float = 30.0
+    http_connect_timeout_seconds: float = 5.0
+    http_read_timeout_seconds: float = 120.0  # Long enough for a full non-streamed completion
+    http_twitter_read_timeout_seconds: float = 30.0
+    http_write_timeout_seconds: float = 30.0
+    http_pool_timeout_seconds: float = 10.0  # Wait for a free connection before failing
+    http2_enabled: bool = True  # Used when the h2 package is installed
+
+    # Historical Tweet Analysis
+    topic_keywords: List[str] = []  # Topic vocabulary override (JSON list); empty uses the built-in keywords
+    topic_match_whole_words: bool = False
+    analyzer_parallel_threshold: int = 50000  # New tweets above which analysis is sharded across processes
+    analyzer_workers: int = 0  # Worker processes for parallel analysis; 0 uses the CPU count
+    analysis_cache_dir: str = ""  # Optional on-disk backing for the analysis summary cache
+    dedup_similarity_threshold: float = 0.7  # Estimated Jaccard similarity at which a new tweet counts as a duplicate
+    engagement_like_weight: float = 1.0
+    engagement_retweet_weight: float = 2.0
+
+    # Posting
+    twitter_post_concurrency: int = 4  # Posts in flight at once when draining due tweets
+    post_outbox_claim_batch: int = 20  # Due tweets a worker claims at a time
+    post_outbox_lease_seconds: int = 300  # How long a claim is held before it's reconciled and released
+    post_misfire_grace_seconds: int = 15 * 60  # How late a tweet may still go out (e.g. after downtime); later ones go back to approved
+
+    # Engagement Refresh
+    engagement_refresh_interval_minutes: int = 60
+    engagement_refresh_max_lookups: int = 5  # Tweet lookup calls (100 tweets each) per refresh run
+    engagement_refresh_max_age_days: int = 90  # Older tweets keep their last metrics
+    engagement_snapshot_retention_days: int = 30
+
+    # LLM Response Cache
+    llm_cache_memory_entries: int = 256  # In-memory LRU size
+    llm_cache_dir: str = ""  # Optional on-disk store shared across restarts and workers
+    llm_cache_max_disk_mb: int = 100
+    llm_cache_ttl_seconds: float = 7 * 24 * 3600
+    llm_cache_image_ttl_seconds: float = 50 * 60  # Generated image URLs expire after an hour
+
+    # Provider Batch APIs
+    batch_generation_jobs: List[str] = []  # Scheduler job ids (JSON list) that submit through the batch APIs, e.g. ["daily_content_generation"]
+    batch_caption_expansion: bool = False  # Also batch Instagram captions for approved tweets without a post
+    batch_caption_provider: str = "claude"
+    batch_poll_interval_minutes: int = 5
+    batch_ingest_lease_minutes: int = 30  # An ingestion claim older than this is taken over by the next poll
+    anthropic_batch_base_url: str = "https://api.anthropic.com"  # Point both at fake_batch_server.py for local runs
+    openai_batch_base_url: str = "https://api.openai.com"
 
     class Config:
         env_file = ".env"
@@ -1,6 +1,11 @@
-from sqlalchemy import create_engine
+from datetime import datetime, timezone
+from sqlalchemy import DateTime, create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.types import TypeDecorator
+from typing import Any, Dict, Optional, Tuple
 from app.config import get_settings
 
 settings = get_settings()
@@ -14,10 +19,64 @@ engine = create_engine(
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def get_async_database_url(database_url: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    Map the configured database URL onto its async driver
+
+    sqlite uses aiosqlite and postgres uses asyncpg. asyncpg doesn't accept
+    libpq's sslmode query parameter, so it is turned into the ssl connect
+    argument, and its statement caches are disabled because Supabase's
+    transaction-mode pooler can't keep prepared statements.
+
+    Returns:
+        (async database URL, connect_args)
+    """
+    url = make_url(database_url)
+    connect_args: Dict[str, Any] = {}
+
+    if url.get_backend_name() == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    elif url.get_backend_name() in ("postgresql", "postgres"):
+        query = dict(url.query)
+        sslmode = query.pop("sslmode", None)
+        if sslmode and sslmode != "disable":
+            connect_args["ssl"] = sslmode
+        connect_args["statement_cache_size"] = 0
+        query["prepared_statement_cache_size"] = "0"
+        url = url.set(drivername="postgresql+asyncpg", query=query)
+
+    return url.render_as_string(hide_password=False), connect_args
+
+
+# Create async engine and session factory for the API routers
+_async_database_url, _async_connect_args = get_async_database_url(settings.database_url)
+async_engine = create_async_engine(_async_database_url, connect_args=_async_connect_args)
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
 # Create Base class for models
 Base = declarative_base()
 
 
+class UTCDateTime(TypeDecorator):
+    """
+    Naive DateTime column that always holds UTC wall time
+
+    Aware datetimes are converted to UTC and stripped of their tzinfo on the
+    way in, so every driver stores the same value: asyncpg rejects aware
+    values for TIMESTAMP WITHOUT TIME ZONE, psycopg2 would shift them into
+    the session time zone and sqlite would keep their local wall time.
+    Naive values are taken to be UTC already. Values read back are naive UTC.
+    """
+    impl = DateTime
+    cache_ok = True
+
+    def process_bind_param(self, value: Optional[datetime], dialect) -> Optional[datetime]:
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+
 def get_db():
     """Dependency to get database session"""
     db = SessionLocal()
@@ -25,3 +84,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """Dependency to get an async database session"""
+    async with AsyncSessionLocal() as db:
+        yield db
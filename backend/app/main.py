@@ -2,7 +2,10 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.config import get_settings
-from app.api import tweets, instagram, scheduler, config as config_router
+from app.api import tweets, instagram, scheduler, analysis, jobs, config as config_router
+from app.database import SessionLocal
+from app.services.job_queue import get_job_queue
+from app.services.http_transport import get_http_transport
 from app.services.scheduler_service import get_scheduler_service
 
 settings = get_settings()
@@ -11,7 +14,18 @@ settings = get_settings()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan events for startup and shutdown"""
-    # Startup: Start the scheduler for automated tasks
+    # Startup: Fail jobs that a previous process didn't get to finish
+    db = SessionLocal()
+    try:
+        interrupted = get_job_queue().recover(db)
+        if interrupted:
+            print(f"✓ Marked {interrupted} interrupted background jobs as failed")
+    except Exception as e:
+        print(f"Note: Could not check for interrupted jobs (run migrate_db.py?): {e}")
+    finally:
+        db.close()
+
+    # Start the scheduler for automated tasks
     scheduler_service = get_scheduler_service()
     scheduler_service.start()
     print("✓ Scheduler started - daily content generation and tweet posting active")
@@ -21,6 +35,8 @@ async def lifespan(app: FastAPI):
     # Shutdown: Stop the scheduler
     scheduler_service.stop()
     print("✓ Scheduler stopped")
+    get_job_queue().shutdown()
+    get_http_transport().close()
 
 
 # Initialize FastAPI app
@@ -44,6 +60,8 @@ app.add_middleware(
 app.include_router(tweets.router, prefix="/api/tweets", tags=["tweets"])
 app.include_router(instagram.router, prefix="/api/instagram", tags=["instagram"])
 app.include_router(scheduler.router, prefix="/api/scheduler", tags=["scheduler"])
+app.include_router(analysis.router, prefix="/api/analysis", tags=["analysis"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["jobs"])
 app.include_router(config_router.router, prefix="/api/config", tags=["config"])
 
 
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, JSON
-from sqlalchemy.sql import func
-from app.database import Base
+from sqlalchemy import Column, Integer, String, Text, Boolean, ForeignKey, JSON, Float, Index
+from sqlalchemy.sql import func, text
+from app.database import Base, UTCDateTime
 
 
 class HistoricalTweet(Base):
@@ -10,12 +10,23 @@ class HistoricalTweet(Base):
     id = Column(Integer, primary_key=True, index=True)
     tweet_id = Column(String, unique=True, index=True)
     content = Column(Text, nullable=False)
-    posted_date = Column(DateTime, nullable=False)
+    posted_date = Column(UTCDateTime, nullable=False)
     engagement_metrics = Column(JSON, default={})  # {likes, retweets, replies}
-    fetched_at = Column(DateTime, server_default=func.now())
+    engagement_score = Column(Float, default=0, index=True)  # Weighted likes + retweets, kept in sync with metrics
+    fetched_at = Column(UTCDateTime, server_default=func.now())
+    metrics_refreshed_at = Column(UTCDateTime, nullable=True)  # Last engagement refresh
     topic_tags = Column(JSON, default=[])  # Array of identified topics
 
 
+class HistoricalTweetTopic(Base):
+    """One row per (historical tweet, topic) so topic counts are an indexed aggregation"""
+    __tablename__ = "historical_tweet_topics"
+
+    id = Column(Integer, primary_key=True, index=True)
+    historical_tweet_id = Column(Integer, ForeignKey("historical_tweets.id"), nullable=False, index=True)
+    topic = Column(String, nullable=False, index=True)
+
+
 class Tweet(Base):
     """Generated tweets for approval and scheduling"""
     __tablename__ = "tweets"
@@ -24,12 +35,14 @@ class Tweet(Base):
     content = Column(Text, nullable=False)
     original_content = Column(Text, nullable=True)  # Store original AI-generated content
     ai_source = Column(String, nullable=False)  # 'claude' or 'chatgpt'
-    status = Column(String, default="pending")  # pending/approved/scheduled/posted/failed
-    scheduled_time = Column(DateTime, nullable=True)
-    posted_time = Column(DateTime, nullable=True)
-    created_at = Column(DateTime, server_default=func.now())
+    status = Column(String, default="pending")  # candidate (unreviewed pool)/pending/approved/scheduled/posted/failed
+    scheduled_time = Column(UTCDateTime, nullable=True)
+    posted_time = Column(UTCDateTime, nullable=True)
+    created_at = Column(UTCDateTime, server_default=func.now())
     edited = Column(Boolean, default=False)
     twitter_id = Column(String, nullable=True)  # Twitter API ID after posting
+    engagement_metrics = Column(JSON, nullable=True)  # {likes, retweets, replies, quotes} once posted and refreshed
+    metrics_refreshed_at = Column(UTCDateTime, nullable=True)  # Last engagement refresh
 
 
 class TweetEdit(Base):
@@ -40,7 +53,7 @@ class TweetEdit(Base):
     tweet_id = Column(Integer, ForeignKey("tweets.id"), nullable=False)
     original_text = Column(Text, nullable=False)
     edited_text = Column(Text, nullable=False)
-    edit_timestamp = Column(DateTime, server_default=func.now())
+    edit_timestamp = Column(UTCDateTime, server_default=func.now())
     ai_source = Column(String, nullable=False)  # Which AI generated the original
 
 
@@ -53,8 +66,8 @@ class InstagramPost(Base):
     caption = Column(Text, nullable=False)
     image_url = Column(String, nullable=False)
     status = Column(String, default="pending")  # pending/approved/posted/failed
-    posted_time = Column(DateTime, nullable=True)
-    created_at = Column(DateTime, server_default=func.now())
+    posted_time = Column(UTCDateTime, nullable=True)
+    created_at = Column(UTCDateTime, server_default=func.now())
     instagram_id = Column(String, nullable=True)  # Instagram API ID after posting
 
 
@@ -65,7 +78,7 @@ class APICredential(Base):
     id = Column(Integer, primary_key=True, index=True)
     service = Column(String, unique=True, nullable=False)  # twitter/instagram
     credentials = Column(Text, nullable=False)  # Encrypted JSON
-    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    updated_at = Column(UTCDateTime, server_default=func.now(), onupdate=func.now())
 
 
 class PostingSchedule(Base):
@@ -77,3 +90,141 @@ class PostingSchedule(Base):
     time_slot = Column(String, nullable=False)  # HH:MM format
     frequency = Column(String, default="daily")  # daily/weekdays/custom
     active = Column(Boolean, default=True)
+
+
+class AnalyzerState(Base):
+    """Persisted TweetAnalyzer counters, updated with newly ingested tweets only"""
+    __tablename__ = "analyzer_state"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, nullable=False)  # Which corpus the state describes
+    last_tweet_id = Column(Integer, default=0)  # Highest historical_tweets.id folded in
+    snapshot = Column(JSON, default={})  # TweetAnalyzer.to_state() output
+    metrics_epoch = Column(Integer, default=0)  # Bumped whenever stored engagement metrics/scores change
+    updated_at = Column(UTCDateTime, server_default=func.now(), onupdate=func.now())
+
+
+class AnalyzerPhraseCount(Base):
+    """Exact count of one phrase (n-gram) in a persisted TweetAnalyzer"""
+    __tablename__ = "analyzer_phrase_counts"
+    __table_args__ = (Index("ix_analyzer_phrase_counts_state_name_ngram", "state_name", "ngram", unique=True),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    state_name = Column(String, nullable=False)  # analyzer_state.name
+    ngram = Column(String, nullable=False)  # Phrase text, words separated by single spaces
+    count = Column(Integer, nullable=False, default=0)
+
+
+class ContentFingerprint(Base):
+    """MinHash signature of a historical or generated tweet for near-duplicate checks"""
+    __tablename__ = "content_fingerprints"
+
+    id = Column(Integer, primary_key=True, index=True)
+    source = Column(String, nullable=False)  # historical/tweet
+    source_id = Column(Integer, nullable=False, index=True)  # historical_tweets.id or tweets.id
+    signature = Column(JSON, nullable=False)  # MinHash values
+    created_at = Column(UTCDateTime, server_default=func.now())
+
+
+class FingerprintBand(Base):
+    """LSH bucket membership of a content fingerprint, one row per band"""
+    __tablename__ = "fingerprint_bands"
+
+    id = Column(Integer, primary_key=True, index=True)
+    fingerprint_id = Column(Integer, ForeignKey("content_fingerprints.id"), nullable=False, index=True)
+    band_key = Column(String, nullable=False, index=True)  # "<band>:<bucket hash>"
+
+
+# Jobs that count against the single-active-refill index on jobs
+ACTIVE_REFILL_JOBS = "kind = 'refill_candidate_pool' AND status IN ('queued', 'running')"
+
+
+class Job(Base):
+    """Background job (e.g. tweet generation) and its progress"""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # At most one candidate pool refill queued or running at a time
+        Index(
+            "ix_jobs_single_active_refill", "kind", unique=True,
+            sqlite_where=text(ACTIVE_REFILL_JOBS),
+            postgresql_where=text(ACTIVE_REFILL_JOBS)
+        ),
+    )
+
+    id = Column(String, primary_key=True)  # UUID hex
+    kind = Column(String, nullable=False, index=True)  # e.g. 'generate_tweets'
+    status = Column(String, default="queued", index=True)  # queued, running, succeeded, failed
+    params = Column(JSON, default={})
+    progress = Column(JSON, default={})
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    owner = Column(String, nullable=True)  # "<host>:<pid>:<token>" of the process running the job
+    heartbeat_at = Column(UTCDateTime, nullable=True)  # Refreshed by the owner while the job is queued or running
+    cancel_requested = Column(Boolean, default=False)  # Checked by the running job at each progress report
+    created_at = Column(UTCDateTime, server_default=func.now())
+    started_at = Column(UTCDateTime, nullable=True)
+    finished_at = Column(UTCDateTime, nullable=True)
+
+
+class GenerationBatch(Base):
+    """A provider batch API submission awaiting ingestion"""
+    __tablename__ = "generation_batches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    provider = Column(String, nullable=False)  # claude/chatgpt
+    batch_id = Column(String, nullable=False)  # Provider's batch handle
+    kind = Column(String, nullable=False)  # tweets/captions
+    status = Column(String, default="submitted", index=True)  # submitted/ingesting/ingested/failed
+    requests = Column(JSON, default={})  # custom_id -> what it asked for ({count} or {tweet_id})
+    result = Column(JSON, nullable=True)  # Ingestion counts
+    error = Column(Text, nullable=True)
+    claimed_at = Column(UTCDateTime, nullable=True)  # When a poller took it for ingestion
+    created_at = Column(UTCDateTime, server_default=func.now())
+    completed_at = Column(UTCDateTime, nullable=True)
+
+
+class SyncCursor(Base):
+    """Incremental timeline sync position for one Twitter account"""
+    __tablename__ = "sync_cursors"
+
+    id = Column(Integer, primary_key=True, index=True)
+    account = Column(String, unique=True, nullable=False)  # Lowercased username
+    user_id = Column(String, nullable=True)  # Cached username -> user ID lookup
+    since_id = Column(String, nullable=True)  # Newest tweet ID of the last completed sync
+    next_token = Column(String, nullable=True)  # Pagination token of a sync still in progress
+    pending_newest_id = Column(String, nullable=True)  # Newest tweet ID seen by the sync in progress
+    last_synced_at = Column(UTCDateTime, nullable=True)
+    updated_at = Column(UTCDateTime, server_default=func.now(), onupdate=func.now())
+
+
+class EngagementSnapshot(Base):
+    """Point-in-time engagement counts for a tweet, for velocity over time"""
+    __tablename__ = "engagement_snapshots"
+    __table_args__ = (Index("ix_engagement_snapshots_twitter_id_captured_at", "twitter_id", "captured_at"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    twitter_id = Column(String, nullable=False)  # Twitter tweet ID (historical or posted)
+    captured_at = Column(UTCDateTime, nullable=False, index=True)
+    likes = Column(Integer, default=0)
+    retweets = Column(Integer, default=0)
+    replies = Column(Integer, default=0)
+    quotes = Column(Integer, default=0)
+
+
+class PostOutboxEntry(Base):
+    """Claims on tweets being posted, so concurrent posting workers never post one twice"""
+    __tablename__ = "post_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    tweet_id = Column(Integer, ForeignKey("tweets.id", ondelete="CASCADE"), unique=True, nullable=False)
+    idempotency_key = Column(String, unique=True, nullable=False)  # Hash of tweet ID + text; one post per key
+    content = Column(Text, nullable=False)  # Exact text handed to the API (matched when reconciling)
+    status = Column(String, default="pending", index=True)  # pending/claimed/sent/failed
+    claimed_by = Column(String, nullable=True)  # Worker holding the claim
+    claimed_at = Column(UTCDateTime, nullable=True)
+    lease_expires_at = Column(UTCDateTime, nullable=True, index=True)  # After this the claim is reconciled against the timeline
+    attempts = Column(Integer, default=0)
+    twitter_id = Column(String, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(UTCDateTime, server_default=func.now())
+    updated_at = Column(UTCDateTime, server_default=func.now(), onupdate=func.now())
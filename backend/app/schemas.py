@@ -1,6 +1,6 @@
 from pydantic import BaseModel, field_serializer
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Literal
 from zoneinfo import ZoneInfo
 
 # Central Time timezone
@@ -52,6 +52,7 @@ class TweetResponse(TweetBase):
     created_at: datetime
     edited: bool
     twitter_id: Optional[str] = None
+    engagement_metrics: Optional[Dict[str, Any]] = None
 
     @field_serializer('created_at', 'scheduled_time', 'posted_time')
     def serialize_dt(self, dt: Optional[datetime], _info) -> Optional[str]:
@@ -86,6 +87,11 @@ class InstagramPostUpdate(BaseModel):
     status: Optional[str] = None
 
 
+class InstagramFromTweetRequest(BaseModel):
+    ai_source: Literal['claude', 'chatgpt'] = 'claude'
+    cache: Literal['use', 'refresh', 'bypass'] = 'use'  # 'refresh' for a new caption and image
+
+
 class InstagramPostResponse(InstagramPostBase):
     id: int
     source_tweet_id: Optional[int] = None
@@ -117,12 +123,55 @@ class PostingScheduleResponse(PostingScheduleBase):
         from_attributes = True
 
 
+# Historical Analysis Schemas
+class AnalysisSummaryResponse(BaseModel):
+    version: str
+    total_tweets: int
+    average_length: int
+    top_topics: List[str]
+    brand_voice_examples: List[str]
+    common_phrases: List[str]
+    total_engagement: int
+
+
+class EngagementVelocityResponse(BaseModel):
+    twitter_id: str
+    content: str
+    velocity: float  # Weighted engagement score gained per hour
+    likes_per_hour: float
+    retweets_per_hour: float
+
+
 # Generation Request/Response
 class ContentGenerationRequest(BaseModel):
     count: int = 25
 
 
-class ContentGenerationResponse(BaseModel):
-    message: str
-    tweets_generated: int
-    timestamp: datetime
+# Background Job Schemas
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    status: str
+    progress: Dict[str, Any] = {}
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    @field_serializer('created_at', 'started_at', 'finished_at')
+    def serialize_dt(self, dt: Optional[datetime], _info) -> Optional[str]:
+        if dt is None:
+            return None
+        # If datetime is naive, assume it's UTC (SQLite stores as UTC by default)
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=ZoneInfo("UTC"))
+        return dt.astimezone(CENTRAL_TZ).isoformat()
+
+    class Config:
+        from_attributes = True
+
+
+class GenerateTweetsResponse(BaseModel):
+    served: List[TweetResponse] = []  # Pending tweets taken from the candidate pool
+    job: Optional[JobResponse] = None  # Generates whatever the pool couldn't cover
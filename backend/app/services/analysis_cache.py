@@ -0,0 +1,147 @@
+from typing import Dict, Any, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.config import get_settings
+from app.models import HistoricalTweet
+from app.services.analyzer_store import AnalyzerStateStore
+from app.services.engagement import get_metrics_epoch
+import copy
+import json
+import logging
+import os
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+CorpusVersion = Tuple[int, int, int]
+
+
+def get_corpus_version(db: Session) -> CorpusVersion:
+    """
+    Identify the current state of the historical corpus
+
+    Returns:
+        (max historical_tweets.id, row count, metrics epoch)
+    """
+    max_id, row_count = db.query(
+        func.max(HistoricalTweet.id),
+        func.count(HistoricalTweet.id)
+    ).one()
+    return (max_id or 0, row_count or 0, get_metrics_epoch(db))
+
+
+class AnalysisCache:
+    """
+    Cache of the analysis summary, keyed by corpus version
+
+    The latest summary is kept in process; if a cache directory is
+    configured it is also written to disk so restarts and other workers
+    can reuse it. A summary is only served while the corpus version it was
+    computed for is still current. Callers get their own copy, and
+    concurrent misses compute the summary once.
+    """
+
+    FILE_NAME = "analysis_summary.json"
+
+    def __init__(self, cache_dir: str = ""):
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self._compute_lock = threading.Lock()  # Held while a summary is being computed
+        self._version: Optional[CorpusVersion] = None
+        self._summary: Optional[Dict[str, Any]] = None
+
+    def get_summary(self, db: Session) -> Dict[str, Any]:
+        """
+        Get the analysis summary for the current corpus, computing it if needed
+
+        Returns:
+            Analysis summary with a 'version' entry describing the corpus
+            (a copy the caller may modify)
+        """
+        version = get_corpus_version(db)
+
+        with self._lock:
+            if self._version == version:
+                return copy.deepcopy(self._summary)
+
+        with self._compute_lock:
+            # Another thread may have computed it while we waited
+            with self._lock:
+                if self._version == version:
+                    return copy.deepcopy(self._summary)
+
+            summary = self._read_disk(version)
+            if summary is None:
+                summary = AnalyzerStateStore(db).get_analysis_summary()
+                summary['version'] = '-'.join(str(part) for part in version)
+                self._write_disk(version, summary)
+
+            with self._lock:
+                self._version = version
+                self._summary = summary
+
+        return copy.deepcopy(summary)
+
+    def invalidate(self):
+        """Forget the cached summary (e.g. after ingesting new tweets)"""
+        with self._lock:
+            self._version = None
+            self._summary = None
+
+        if self.cache_dir:
+            try:
+                os.remove(os.path.join(self.cache_dir, self.FILE_NAME))
+            except FileNotFoundError:
+                pass
+
+    def _read_disk(self, version: CorpusVersion) -> Optional[Dict[str, Any]]:
+        if not self.cache_dir:
+            return None
+
+        try:
+            with open(os.path.join(self.cache_dir, self.FILE_NAME)) as f:
+                cached = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        if tuple(cached.get('version', ())) != version:
+            return None
+        return cached['summary']
+
+    def _write_disk(self, version: CorpusVersion, summary: Dict[str, Any]):
+        if not self.cache_dir:
+            return
+
+        tmp_path = None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = os.path.join(self.cache_dir, self.FILE_NAME)
+            # Write a private temp file then rename, so readers never see a partial
+            # file and other workers writing at the same time never share one
+            with tempfile.NamedTemporaryFile('w', dir=self.cache_dir, prefix=f"{self.FILE_NAME}.", suffix=".tmp", delete=False) as f:
+                tmp_path = f.name
+                json.dump({'version': list(version), 'summary': summary}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write analysis cache to {self.cache_dir}: {e}")
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+
+# Singleton instance
+_analysis_cache = None
+_analysis_cache_lock = threading.Lock()
+
+
+def get_analysis_cache() -> AnalysisCache:
+    """Get or create the analysis summary cache"""
+    global _analysis_cache
+    if _analysis_cache is None:
+        with _analysis_cache_lock:
+            if _analysis_cache is None:
+                _analysis_cache = AnalysisCache(cache_dir=get_settings().analysis_cache_dir)
+    return _analysis_cache
@@ -0,0 +1,191 @@
+from typing import Dict, Any, List
+from sqlalchemy import delete, select, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.config import get_settings
+from app.models import AnalyzerPhraseCount, AnalyzerState, HistoricalTweet
+from app.services.ngram_counter import NGramCounter
+from app.services.tweet_analyzer import TweetAnalyzer, STOP_WORDS
+from app.services.topic_tagger import get_topic_counts
+from app.services.engagement import get_top_engagement_tweets, get_total_engagement
+
+
+PHRASE_WRITE_BATCH = 1000  # Phrase count rows per upsert statement
+PHRASE_TOP_K = TweetAnalyzer.COMMON_PHRASE_COUNT  # Phrases kept in the snapshot, enough for the summary
+
+
+class AnalyzerStateStore:
+    """
+    Keep a persisted TweetAnalyzer snapshot in sync with historical_tweets
+
+    The snapshot holds the running totals and the top phrases; exact phrase
+    counts live in analyzer_phrase_counts, one row per phrase. An update adds
+    the new tweets' counts to the rows they touch in SQL and folds those rows
+    into the top phrases, so loading never reads the full phrase table.
+    """
+
+    def __init__(self, db: Session, name: str = "historical"):
+        self.db = db
+        self.name = name
+
+    def load(self) -> TweetAnalyzer:
+        """
+        Load the analyzer, folding in any tweets ingested since the last snapshot
+
+        Returns:
+            Up-to-date TweetAnalyzer
+        """
+        state = self._get_or_create_state()
+
+        snapshot = state.snapshot or None
+        if snapshot and (snapshot.get('version') != TweetAnalyzer.STATE_VERSION or 'top_phrases' not in snapshot):
+            # Written with an older layout - rebuild from the full corpus
+            snapshot = None
+            state.last_tweet_id = 0
+            self._clear_phrase_counts()
+
+        analyzer = TweetAnalyzer(state=snapshot)
+        top_phrases = snapshot['top_phrases'] if snapshot else []
+
+        last_tweet_id = state.last_tweet_id or 0
+
+        def new_tweets():
+            nonlocal last_tweet_id
+            for row in self.iter_tweets(after_id=last_tweet_id):
+                last_tweet_id = row.id
+                yield {'content': row.content}
+
+        settings = get_settings()
+        pending = self.db.query(func.count(HistoricalTweet.id)).filter(
+            HistoricalTweet.id > last_tweet_id
+        ).scalar()
+
+        # Analyze the new tweets on their own, so only the phrases they touched are written
+        delta = TweetAnalyzer(min_words=analyzer.min_words, max_words=analyzer.max_words)
+        if pending >= settings.analyzer_parallel_threshold:
+            # Large backlog (first run, full-account backfill) - shard across processes
+            delta.update_parallel(new_tweets(), workers=settings.analyzer_workers or None)
+        else:
+            delta.update(new_tweets())
+
+        if delta.total_tweets:
+            touched = self._write_phrase_counts(delta.phrases)
+            top_phrases = self._merge_top_phrases(top_phrases, touched)
+            # Written to SQL; only the top phrases are kept in memory
+            delta.phrases.counts.clear()
+
+        added = analyzer.merge(delta)
+        analyzer.phrases = self._top_phrase_counter(analyzer, top_phrases)
+        if added:
+            state.last_tweet_id = last_tweet_id
+            state.snapshot = {**analyzer.to_state(include_phrase_counts=False), 'top_phrases': top_phrases}
+            self.db.commit()
+
+        return analyzer
+
+    def iter_tweets(self, after_id: int = 0, batch_size: int = 1000):
+        """
+        Stream the analyzer columns of historical tweets in ID order
+
+        Rows are fetched batch_size at a time, so the table is never held in
+        memory all at once.
+
+        Args:
+            after_id: Only yield tweets with a higher historical_tweets.id
+            batch_size: Rows fetched per round trip
+        """
+        query = select(HistoricalTweet.id, HistoricalTweet.content).where(
+            HistoricalTweet.id > after_id
+        ).order_by(HistoricalTweet.id).execution_options(yield_per=batch_size)
+
+        yield from self.db.execute(query)
+
+    def get_analysis_summary(self) -> Dict[str, Any]:
+        """
+        Get the analysis summary for the whole historical corpus
+
+        The snapshot supplies the totals and common phrases. Topic counts,
+        brand voice examples and total engagement are queried
+        (historical_tweet_topics, historical_tweets.engagement_score, the
+        current engagement metrics), since they change after ingestion.
+        """
+        summary = self.load().get_analysis_summary()
+        summary['top_topics'] = [topic for topic, _ in get_topic_counts(self.db, limit=10)]
+        summary['brand_voice_examples'] = get_top_engagement_tweets(self.db, count=5)
+        summary['total_engagement'] = get_total_engagement(self.db)
+        return summary
+
+    def refresh(self) -> int:
+        """
+        Bring the stored snapshot up to date with newly ingested tweets
+
+        Returns:
+            Total number of tweets reflected in the snapshot
+        """
+        return self.load().total_tweets
+
+    def reset(self):
+        """Drop the stored snapshot so the next load rebuilds it from scratch"""
+        state = self._get_or_create_state()
+        state.last_tweet_id = 0
+        state.snapshot = {}
+        self._clear_phrase_counts()
+        self.db.commit()
+
+    def _write_phrase_counts(self, phrases: NGramCounter) -> List[List[Any]]:
+        """
+        Add a counter's phrase counts to the stored rows
+
+        Returns:
+            [row id, phrase, new count] of every row touched
+        """
+        dialect_insert = postgresql.insert if self.db.get_bind().dialect.name == 'postgresql' else sqlite.insert
+        rows = [
+            {'state_name': self.name, 'ngram': phrases.phrase(key), 'count': count}
+            for key, count in phrases.counts.items()
+        ]
+        touched = []
+        for start in range(0, len(rows), PHRASE_WRITE_BATCH):
+            statement = dialect_insert(AnalyzerPhraseCount).values(rows[start:start + PHRASE_WRITE_BATCH])
+            statement = statement.on_conflict_do_update(
+                index_elements=['state_name', 'ngram'],
+                set_={'count': AnalyzerPhraseCount.count + statement.excluded.count}
+            ).returning(AnalyzerPhraseCount.id, AnalyzerPhraseCount.ngram, AnalyzerPhraseCount.count)
+            touched.extend([row_id, phrase, count] for row_id, phrase, count in self.db.execute(statement))
+        return touched
+
+    @staticmethod
+    def _merge_top_phrases(top_phrases: List[List[Any]], touched: List[List[Any]]) -> List[List[Any]]:
+        """
+        Fold updated rows into the top phrases
+
+        Counts only grow, so a phrase can only enter the top by being touched:
+        the top of (previous top + touched rows) is exact. Ties go to the
+        lower row ID, i.e. the phrase seen first.
+
+        Returns:
+            [row id, phrase, count] of the top phrases, in row ID order
+        """
+        rows = {row[1]: row for row in top_phrases}
+        rows.update({row[1]: row for row in touched})
+        ranked = sorted(rows.values(), key=lambda row: (-row[2], row[0]))[:PHRASE_TOP_K]
+        return sorted(ranked)
+
+    @staticmethod
+    def _top_phrase_counter(analyzer: TweetAnalyzer, top_phrases: List[List[Any]]) -> NGramCounter:
+        """NGramCounter holding just the top phrases, inserted in first-seen order for tie-breaking"""
+        counter = NGramCounter(analyzer.min_words, analyzer.max_words, STOP_WORDS)
+        for _, phrase, count in top_phrases:
+            counter.counts[counter.pack(phrase)] = count
+        return counter
+
+    def _clear_phrase_counts(self):
+        self.db.execute(delete(AnalyzerPhraseCount).where(AnalyzerPhraseCount.state_name == self.name))
+
+    def _get_or_create_state(self) -> AnalyzerState:
+        state = self.db.query(AnalyzerState).filter(AnalyzerState.name == self.name).first()
+        if state is None:
+            state = AnalyzerState(name=self.name, last_tweet_id=0, snapshot={}, metrics_epoch=0)
+            self.db.add(state)
+            self.db.flush()
+        return state
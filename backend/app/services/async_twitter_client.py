@@ -0,0 +1,137 @@
+from typing import Any, Dict, List, Optional, Tuple
+from oauthlib.oauth1 import Client as OAuth1Client
+from app.config import get_settings
+from app.services.http_transport import UPSTREAMS, get_async_http_client
+from app.services.rate_limiter import RateLimited, get_rate_limiter, endpoint_for
+from datetime import datetime
+import asyncio
+import httpx
+import threading
+
+settings = get_settings()
+
+
+class AsyncTwitterClient:
+    """
+    asyncio Twitter API v2 client for posting, signed with OAuth 1.0a user context
+
+    Requests go through the shared 'twitter' httpx pool and spend from the
+    same per-endpoint RateLimiter as TwitterClient, so the sync and async
+    paths share one budget.
+    """
+
+    def __init__(self):
+        self._signer = OAuth1Client(
+            settings.twitter_api_key,
+            client_secret=settings.twitter_api_secret,
+            resource_owner_key=settings.twitter_access_token,
+            resource_owner_secret=settings.twitter_access_token_secret
+        )
+
+    async def _request(self, method: str, route: str, json: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        limiter = get_rate_limiter()
+        endpoint = endpoint_for(method, route)
+        limiter.acquire(endpoint)
+
+        # JSON bodies aren't part of the OAuth 1.0a signature base string
+        _, headers, _ = self._signer.sign(f"{UPSTREAMS['twitter']}{route}", http_method=method)
+        response = await get_async_http_client('twitter').request(method, route, json=json, headers=headers)
+
+        limiter.update_from_headers(endpoint, response.headers)
+        if response.status_code == 429:
+            raise limiter.exhausted(endpoint)
+        response.raise_for_status()
+        return response.json()
+
+    async def post_tweet(self, content: str) -> str:
+        """
+        Post a tweet
+
+        Args:
+            content: Tweet text (max 280 characters)
+
+        Returns:
+            The new tweet's ID
+
+        Raises:
+            RateLimited: The post budget is spent (nothing was sent)
+        """
+        if len(content) > 280:
+            raise ValueError("Tweet content exceeds 280 characters")
+
+        data = await self._request("POST", "/2/tweets", json={"text": content})
+        return str(data['data']['id'])
+
+    async def post_many(self, tweets: List[Tuple[int, str]], concurrency: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Post several tweets concurrently
+
+        At most `concurrency` posts are in flight at once. Once the post budget
+        runs out the remaining tweets come back rate_limited without being sent.
+
+        Args:
+            tweets: (tweet ID, text) pairs
+            concurrency: Posts in flight at once (default: twitter_post_concurrency)
+
+        Returns:
+            One outcome per tweet, in order: {'id', 'status'} plus 'twitter_id'
+            when posted, 'error' when failed or unknown (a timeout or server
+            error - the post may have gone through) or 'retry_at' when rate_limited
+        """
+        semaphore = asyncio.Semaphore(concurrency or settings.twitter_post_concurrency)
+
+        async def post(tweet_id: int, content: str) -> Dict[str, Any]:
+            async with semaphore:
+                try:
+                    twitter_id = await self.post_tweet(content)
+                except RateLimited as e:
+                    return {'id': tweet_id, 'status': 'rate_limited', 'retry_at': e.retry_at}
+                except httpx.HTTPStatusError as e:
+                    # 4xx: Twitter refused it; 5xx: it may have been created anyway
+                    status = 'failed' if e.response.status_code < 500 else 'unknown'
+                    print(f"Error posting tweet {tweet_id}: {str(e)}")
+                    return {'id': tweet_id, 'status': status, 'error': str(e)}
+                except httpx.TransportError as e:
+                    print(f"Error posting tweet {tweet_id} (outcome unknown): {str(e)}")
+                    return {'id': tweet_id, 'status': 'unknown', 'error': str(e)}
+                except Exception as e:
+                    print(f"Error posting tweet {tweet_id}: {str(e)}")
+                    return {'id': tweet_id, 'status': 'failed', 'error': str(e)}
+                return {'id': tweet_id, 'status': 'posted', 'twitter_id': twitter_id}
+
+        return await asyncio.gather(*(post(tweet_id, content) for tweet_id, content in tweets))
+
+
+def tweet_status_updates(outcomes: List[Dict[str, Any]], posted_time: datetime) -> List[Dict[str, Any]]:
+    """
+    Rows for one bulk `update(Tweet)` by primary key from post_many outcomes
+
+    Rate-limited and unknown tweets are left out so they stay scheduled.
+
+    Args:
+        outcomes: post_many results
+        posted_time: When the batch went out (stored as naive UTC, like every
+            DateTime column)
+    """
+    rows = []
+    for outcome in outcomes:
+        if outcome['status'] == 'posted':
+            rows.append({'id': outcome['id'], 'status': 'posted', 'twitter_id': outcome['twitter_id'], 'posted_time': posted_time})
+        elif outcome['status'] == 'failed':
+            rows.append({'id': outcome['id'], 'status': 'failed'})
+    return rows
+
+
+# Singleton instance
+_async_twitter_client = None
+_async_twitter_client_lock = threading.Lock()
+
+
+def get_async_twitter_client() -> AsyncTwitterClient:
+    """Get or create the async Twitter client"""
+    global _async_twitter_client
+    if _async_twitter_client is None:
+        with _async_twitter_client_lock:
+            if _async_twitter_client is None:
+                _async_twitter_client = AsyncTwitterClient()
+    return _async_twitter_client
@@ -0,0 +1,249 @@
+from typing import Any, Dict, List, Optional
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+from app.models import GenerationBatch, InstagramPost, Tweet
+from app.services.batch_providers import get_batch_provider, BATCH_COMPLETED, BATCH_FAILED
+from app.services.content_generator import ContentGenerator
+from app.services.dedup_index import NearDuplicateIndex
+from app.services.llm_cache import get_llm_cache
+from app.services.tweet_parser import parse_tweet_list
+from app.config import get_settings
+from datetime import datetime, timedelta, timezone
+import logging
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+def submit_daily_batches(
+    db: Session,
+    count: int,
+    include_captions: Optional[bool] = None
+) -> List[GenerationBatch]:
+    """
+    Submit the day's generation through the providers' batch APIs
+
+    The count is split between Claude and ChatGPT as in streaming
+    generation, in requests of GENERATION_CHUNK_SIZE tweets. Results are
+    stored later by poll_generation_batches.
+
+    Args:
+        db: Database session
+        count: Total number of tweets to generate
+        include_captions: Also batch Instagram captions for approved tweets
+            that have no post yet (defaults to BATCH_CAPTION_EXPANSION)
+
+    Returns:
+        The submitted batches
+    """
+    if include_captions is None:
+        include_captions = settings.batch_caption_expansion
+
+    generator = ContentGenerator(db)
+    clients = {'claude': generator.claude_client, 'chatgpt': generator.chatgpt_client}
+    context = generator.generation_context()
+
+    claude_count = count // 2
+    shares = {'claude': claude_count, 'chatgpt': count - claude_count}
+    submitted = []
+    errors = []
+
+    for source, share in shares.items():
+        if share <= 0:
+            continue
+
+        requests = []
+        described = {}
+        for index, start in enumerate(range(0, share, settings.generation_chunk_size)):
+            chunk_count = min(settings.generation_chunk_size, share - start)
+            custom_id = f"tweets-{index}"
+            requests.append((custom_id, clients[source].tweet_generation_params(chunk_count, **context)))
+            described[custom_id] = {'count': chunk_count}
+
+        try:
+            batch_id = get_batch_provider(source).submit(requests)
+        except Exception as e:
+            logger.error(f"Error submitting {source} tweet batch: {e}")
+            errors.append(f"{source}: {e}")
+            continue
+
+        submitted.append(_record_batch(db, source, batch_id, 'tweets', described))
+
+    if include_captions:
+        tweets = db.query(Tweet).outerjoin(
+            InstagramPost, InstagramPost.source_tweet_id == Tweet.id
+        ).filter(
+            Tweet.status == 'approved',
+            InstagramPost.id.is_(None)
+        ).all()
+
+        source = settings.batch_caption_provider
+        uncached = [
+            tweet for tweet in tweets
+            if get_llm_cache().get(clients[source].caption_cache_key(tweet.content)) is None
+        ]
+        if uncached:
+            try:
+                batch_id = get_batch_provider(source).submit([
+                    (f"caption-{tweet.id}", clients[source].caption_params(tweet.content))
+                    for tweet in uncached
+                ])
+                submitted.append(_record_batch(
+                    db, source, batch_id, 'captions',
+                    {
+                        f"caption-{tweet.id}": {
+                            'tweet_id': tweet.id,
+                            # Keyed on the text the caption was written for, even if the tweet is edited later
+                            'cache_key': clients[source].caption_cache_key(tweet.content)
+                        }
+                        for tweet in uncached
+                    }
+                ))
+            except Exception as e:
+                logger.error(f"Error submitting {source} caption batch: {e}")
+                errors.append(f"{source} captions: {e}")
+
+    if not submitted and errors:
+        raise RuntimeError(f"No batches were submitted: {'; '.join(errors)}")
+
+    return submitted
+
+
+def _record_batch(db: Session, provider: str, batch_id: str, kind: str, requests: Dict[str, Any]) -> GenerationBatch:
+    batch = GenerationBatch(provider=provider, batch_id=batch_id, kind=kind, status='submitted', requests=requests)
+    db.add(batch)
+    db.commit()
+    db.refresh(batch)
+    logger.info(f"Submitted {provider} {kind} batch {batch_id} ({len(requests)} requests)")
+    return batch
+
+
+def poll_generation_batches(db: Session) -> Dict[str, int]:
+    """
+    Check submitted batches and ingest the ones that have finished
+
+    Tweets are stored as pending (near-duplicates dropped, as in streaming
+    generation); captions go into the LLM cache under the same key
+    expand_caption uses, so creating the Instagram post doesn't call the
+    provider again.
+
+    A finished batch is claimed with a compare-and-set from 'submitted' to
+    'ingesting' before its results are fetched, so overlapping polls (other
+    workers, or a run that outlasts the interval) ingest it only once. A
+    claim older than batch_ingest_lease_minutes is assumed abandoned and
+    can be taken over.
+
+    Returns:
+        {'pending', 'ingested', 'failed'} batch counts
+    """
+    counts = {'pending': 0, 'ingested': 0, 'failed': 0}
+    stale_before = datetime.now(timezone.utc) - timedelta(minutes=settings.batch_ingest_lease_minutes)
+    claimable = or_(
+        GenerationBatch.status == 'submitted',
+        (GenerationBatch.status == 'ingesting') & (GenerationBatch.claimed_at < stale_before)
+    )
+
+    for batch in db.query(GenerationBatch).filter(claimable).all():
+        provider = get_batch_provider(batch.provider)
+        try:
+            status, error = provider.poll(batch.batch_id)
+        except Exception as e:
+            # Leave the batch submitted; the next poll tries again
+            logger.error(f"Error polling {batch.provider} batch {batch.batch_id}: {e}")
+            counts['pending'] += 1
+            continue
+
+        if status not in (BATCH_COMPLETED, BATCH_FAILED):
+            counts['pending'] += 1
+            continue
+
+        claimed = db.execute(
+            update(GenerationBatch).where(
+                GenerationBatch.id == batch.id,
+                claimable
+            ).values(
+                status='ingesting' if status == BATCH_COMPLETED else 'failed',
+                claimed_at=datetime.now(timezone.utc)
+            ).execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        if not claimed:
+            # Another poller got there first
+            continue
+        db.refresh(batch)
+
+        if status == BATCH_FAILED:
+            batch.error = error
+        else:
+            try:
+                texts = provider.results(batch.batch_id)
+            except Exception as e:
+                logger.error(f"Error fetching {batch.provider} batch {batch.batch_id} results: {e}")
+                batch.status = 'submitted'
+                batch.claimed_at = None
+                db.commit()
+                counts['pending'] += 1
+                continue
+
+            if batch.kind == 'tweets':
+                batch.result = _ingest_tweets(db, batch, texts)
+            else:
+                batch.result = _ingest_captions(db, batch, texts)
+            batch.status = 'ingested'
+
+        batch.completed_at = datetime.now(timezone.utc)
+        db.commit()
+        counts[batch.status] += 1
+        logger.info(f"{batch.provider} {batch.kind} batch {batch.batch_id} {batch.status}: {batch.result or batch.error}")
+
+    return counts
+
+
+def _ingest_tweets(db: Session, batch: GenerationBatch, texts: Dict[str, Optional[str]]) -> Dict[str, Any]:
+    generator = ContentGenerator(db)
+    dedup_index = NearDuplicateIndex(db)
+    seen = set()
+    stored = 0
+    dropped = 0
+    failed = 0
+
+    for custom_id, request in batch.requests.items():
+        content = texts.get(custom_id)
+        if content is None:
+            failed += 1
+            continue
+
+        for tweet_text in parse_tweet_list(content)[:request['count']]:
+            key = ' '.join(tweet_text.lower().split())
+            if key in seen:
+                continue
+            seen.add(key)
+
+            tweet, duplicate = generator.store_generated_tweet(dedup_index, batch.provider, tweet_text)
+            if tweet is None:
+                dropped += 1
+            else:
+                stored += 1
+
+    return {
+        'requested': sum(request['count'] for request in batch.requests.values()),
+        'tweets_stored': stored,
+        'duplicates_dropped': dropped,
+        'failed_requests': failed
+    }
+
+
+def _ingest_captions(db: Session, batch: GenerationBatch, texts: Dict[str, Optional[str]]) -> Dict[str, Any]:
+    cached = 0
+    failed = 0
+
+    for custom_id, request in batch.requests.items():
+        caption = texts.get(custom_id)
+        if caption is None:
+            failed += 1
+            continue
+
+        get_llm_cache().set(request['cache_key'], caption.strip().strip('"\''))
+        cached += 1
+
+    return {'captions_cached': cached, 'failed_requests': failed}
@@ -0,0 +1,190 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.config import get_settings
+from app.services.http_transport import get_http_client
+import httpx
+import json
+
+settings = get_settings()
+
+# Batch states reported by poll()
+BATCH_PENDING = "pending"
+BATCH_COMPLETED = "completed"
+BATCH_FAILED = "failed"
+
+# (custom_id, request params as built by the client's *_params methods)
+BatchRequest = Tuple[str, Dict[str, Any]]
+
+# Batch files can be large, so allow longer reads than the transport's default
+BATCH_REQUEST_TIMEOUT_SECONDS = 60.0
+
+
+class BatchProvider:
+    """
+    A provider's asynchronous batch API
+
+    Batches trade latency (results within 24 hours, usually much sooner)
+    for a lower price and separate rate limits. Implementations only move
+    requests and results; parsing and storing them is up to the caller.
+    """
+
+    def submit(self, requests: List[BatchRequest]) -> str:
+        """Submit requests and return the provider's batch id"""
+        raise NotImplementedError
+
+    def poll(self, batch_id: str) -> Tuple[str, Optional[str]]:
+        """
+        Check on a batch
+
+        Returns:
+            (BATCH_PENDING, BATCH_COMPLETED or BATCH_FAILED, error message)
+        """
+        raise NotImplementedError
+
+    def results(self, batch_id: str) -> Dict[str, Optional[str]]:
+        """Completion text per custom_id for a completed batch (None where a request failed)"""
+        raise NotImplementedError
+
+
+class HTTPBatchProvider(BatchProvider):
+    """
+    Batch API reached through the shared HTTP transport
+
+    Requests go over the transport's client for the upstream, so they share
+    its connection pool, limits and reuse stats. The batch base URL may
+    differ from the upstream's (e.g. a local fake_batch_server); paths are
+    resolved against it and absolute URLs are used as they are.
+    """
+
+    def __init__(self, upstream: str, base_url: str, headers: Dict[str, str]):
+        self.http = get_http_client(upstream)
+        self.base_url = base_url.rstrip("/")
+        self.headers = headers
+
+    def request(self, method: str, path: str, **kwargs: Any) -> httpx.Response:
+        """Send an authenticated request and raise on an error status"""
+        url = path if "://" in path else f"{self.base_url}{path}"
+        response = self.http.request(method, url, headers=self.headers, timeout=BATCH_REQUEST_TIMEOUT_SECONDS, **kwargs)
+        response.raise_for_status()
+        return response
+
+
+class AnthropicBatchProvider(HTTPBatchProvider):
+    """Anthropic Message Batches API"""
+
+    def __init__(self, base_url: str, api_key: str):
+        super().__init__('anthropic', base_url, {"x-api-key": api_key, "anthropic-version": "2023-06-01"})
+
+    def submit(self, requests: List[BatchRequest]) -> str:
+        response = self.request("POST", "/v1/messages/batches", json={
+            "requests": [{"custom_id": custom_id, "params": params} for custom_id, params in requests]
+        })
+        return response.json()["id"]
+
+    def poll(self, batch_id: str) -> Tuple[str, Optional[str]]:
+        response = self.request("GET", f"/v1/messages/batches/{batch_id}")
+        batch = response.json()
+
+        if batch["processing_status"] != "ended":
+            return BATCH_PENDING, None
+        # An ended batch has results even if some (or all) requests failed
+        return BATCH_COMPLETED, None
+
+    def results(self, batch_id: str) -> Dict[str, Optional[str]]:
+        response = self.request("GET", f"/v1/messages/batches/{batch_id}")
+        results_url = response.json()["results_url"]
+
+        response = self.request("GET", results_url)
+
+        texts = {}
+        for line in response.text.splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            result = item["result"]
+            if result["type"] == "succeeded":
+                texts[item["custom_id"]] = result["message"]["content"][0]["text"]
+            else:
+                texts[item["custom_id"]] = None
+        return texts
+
+
+class OpenAIBatchProvider(HTTPBatchProvider):
+    """OpenAI Batch API over Chat Completions"""
+
+    def __init__(self, base_url: str, api_key: str):
+        super().__init__('openai', base_url, {"Authorization": f"Bearer {api_key}"})
+
+    def submit(self, requests: List[BatchRequest]) -> str:
+        lines = "\n".join(
+            json.dumps({"custom_id": custom_id, "method": "POST", "url": "/v1/chat/completions", "body": params})
+            for custom_id, params in requests
+        )
+        response = self.request(
+            "POST",
+            "/v1/files",
+            data={"purpose": "batch"},
+            files={"file": ("batch.jsonl", lines.encode("utf-8"), "application/jsonl")}
+        )
+
+        response = self.request("POST", "/v1/batches", json={
+            "input_file_id": response.json()["id"],
+            "endpoint": "/v1/chat/completions",
+            "completion_window": "24h"
+        })
+        return response.json()["id"]
+
+    def poll(self, batch_id: str) -> Tuple[str, Optional[str]]:
+        response = self.request("GET", f"/v1/batches/{batch_id}")
+        batch = response.json()
+
+        if batch["status"] == "completed":
+            return BATCH_COMPLETED, None
+        if batch["status"] in ("failed", "expired", "cancelled"):
+            errors = (batch.get("errors") or {}).get("data") or []
+            message = "; ".join(error.get("message", "") for error in errors)
+            return BATCH_FAILED, message or f"Batch {batch['status']}"
+        return BATCH_PENDING, None
+
+    def results(self, batch_id: str) -> Dict[str, Optional[str]]:
+        response = self.request("GET", f"/v1/batches/{batch_id}")
+        output_file_id = response.json().get("output_file_id")
+        if not output_file_id:
+            # Every request failed; they are listed in the error file
+            return {}
+
+        response = self.request("GET", f"/v1/files/{output_file_id}/content")
+
+        texts = {}
+        for line in response.text.splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            body = (item.get("response") or {}).get("body") or {}
+            if item.get("error") or item["response"]["status_code"] != 200:
+                texts[item["custom_id"]] = None
+            else:
+                texts[item["custom_id"]] = body["choices"][0]["message"]["content"]
+        return texts
+
+
+# Provider name -> factory; register a replacement to use another backend
+_batch_provider_factories: Dict[str, Callable[[], BatchProvider]] = {
+    'claude': lambda: AnthropicBatchProvider(settings.anthropic_batch_base_url, settings.anthropic_api_key),
+    'chatgpt': lambda: OpenAIBatchProvider(settings.openai_batch_base_url, settings.openai_api_key)
+}
+_batch_providers: Dict[str, BatchProvider] = {}
+
+
+def register_batch_provider(name: str, factory: Callable[[], BatchProvider]):
+    """Replace the batch backend for a provider ('claude' or 'chatgpt')"""
+    _batch_provider_factories[name] = factory
+    _batch_providers.pop(name, None)
+
+
+def get_batch_provider(name: str) -> BatchProvider:
+    """Get or create the batch backend for a provider"""
+    if name not in _batch_providers:
+        if name not in _batch_provider_factories:
+            raise ValueError(f"No batch provider registered for '{name}'")
+        _batch_providers[name] = _batch_provider_factories[name]()
+    return _batch_providers[name]
@@ -0,0 +1,205 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models import Job, Tweet
+from app.services.content_generator import get_content_generator, run_generation_job
+from app.services.job_queue import get_job_queue
+from app.services.http_transport import run_async
+from app.config import get_settings
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+settings = get_settings()
+
+CANDIDATE_STATUS = "candidate"
+REFILL_JOB_KIND = "refill_candidate_pool"
+TOP_UP_JOB_KIND = "top_up_pending"
+
+CENTRAL_TZ = ZoneInfo("America/Chicago")
+
+
+class CandidatePool:
+    """
+    Pre-generated, unreviewed tweets waiting to be served
+
+    Candidates are tweets stored with status 'candidate': they are already
+    deduplicated and indexed, just not shown for review yet. Serving one
+    moves it to 'pending'.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def size(self) -> int:
+        """Number of candidates in the pool"""
+        return self.db.query(Tweet).filter(Tweet.status == CANDIDATE_STATUS).count()
+
+    def shortfall(self) -> int:
+        """Candidates needed to bring the pool back to its target size"""
+        return max(settings.candidate_pool_target_size - self.size(), 0)
+
+    def take(self, count: int) -> List[Tweet]:
+        """
+        Move up to count candidates (oldest first) into the review queue
+
+        Args:
+            count: Number of candidates wanted
+
+        Returns:
+            The served tweets, now pending
+        """
+        if count <= 0:
+            return []
+
+        # Skip rows another request is serving right now (Postgres; SQLite serializes writers)
+        tweets = self.db.query(Tweet).filter(
+            Tweet.status == CANDIDATE_STATUS
+        ).order_by(Tweet.id).limit(count).with_for_update(skip_locked=True).all()
+
+        now = datetime.now(timezone.utc)
+        for tweet in tweets:
+            tweet.status = 'pending'
+            # Served tweets should sort as new on the dashboard
+            tweet.created_at = now
+        self.db.commit()
+        return tweets
+
+    def top_up_pending(self, count: int) -> Tuple[List[Tweet], int]:
+        """
+        Bring the review queue up to count pending tweets from the pool
+
+        Pending tweets the user hasn't acted on yet are kept; only the
+        shortfall is served.
+
+        Returns:
+            (served tweets, number still missing because the pool ran short)
+        """
+        pending = self.db.query(Tweet).filter(Tweet.status == 'pending').count()
+        wanted = max(count - pending, 0)
+        served = self.take(wanted)
+        return served, wanted - len(served)
+
+
+def run_pool_refill_job(db: Session, progress: Callable[..., None]) -> Dict[str, Any]:
+    """Job queue entry point: generate only the candidates the pool is missing"""
+    shortfall = CandidatePool(db).shortfall()
+    if not shortfall:
+        progress(stage="done", target=0)
+        return {'tweets_generated': 0, 'claude': 0, 'chatgpt': 0, 'duplicates_dropped': 0}
+
+    results = run_generation_job(db, progress, count=shortfall, replace_pending=False, status=CANDIDATE_STATUS)
+    del results['pending_deleted']
+    return results
+
+
+def start_top_up(db: Session, count: int) -> Job:
+    """
+    Top the review queue up to count pending tweets, generating any shortfall in a job
+
+    Candidates are served from the pool right away, in the caller's
+    request; only the tweets the pool couldn't cover are left to a job.
+    The job's progress lists the IDs of served and stored tweets and every
+    dropped near-duplicate as they arrive, so a client can stream them
+    (GET /api/tweets/generate/jobs/{id}/stream). If the pool covered
+    everything the job is recorded as already finished.
+
+    Returns:
+        The top-up job
+    """
+    served, missing = CandidatePool(db).top_up_pending(count)
+    served_ids = [tweet.id for tweet in served]
+    served_by_source = {'claude': 0, 'chatgpt': 0}
+    for tweet in served:
+        served_by_source[tweet.ai_source] = served_by_source.get(tweet.ai_source, 0) + 1
+
+    queue = get_job_queue()
+    if missing:
+        job = queue.enqueue(
+            db, TOP_UP_JOB_KIND, run_top_up_job,
+            count=count, missing=missing, served_ids=served_ids, served_by_source=served_by_source
+        )
+    else:
+        job = queue.record(
+            db, TOP_UP_JOB_KIND,
+            result=_top_up_result(served_by_source, {'total': 0, 'claude': 0, 'chatgpt': 0, 'duplicates_dropped': 0}),
+            progress={'stage': 'done', 'target': count, 'from_pool': len(served_ids), 'tweet_ids': served_ids, 'duplicates': []},
+            count=count
+        )
+
+    request_pool_refill(db)
+    return job
+
+
+def _top_up_result(served_by_source: Dict[str, int], results: Dict[str, Any]) -> Dict[str, Any]:
+    """Result stored on a top-up job: served candidates plus generated tweets"""
+    from_pool = sum(served_by_source.values())
+    return {
+        'tweets_generated': from_pool + results['total'],
+        'from_pool': from_pool,
+        'claude': served_by_source.get('claude', 0) + results['claude'],
+        'chatgpt': served_by_source.get('chatgpt', 0) + results['chatgpt'],
+        'duplicates_dropped': results['duplicates_dropped'],
+        'timestamp': datetime.now(CENTRAL_TZ).isoformat()
+    }
+
+
+def run_top_up_job(
+    db: Session,
+    progress: Callable[..., None],
+    count: int,
+    missing: int,
+    served_ids: List[int],
+    served_by_source: Dict[str, int]
+) -> Dict[str, Any]:
+    """
+    Job queue entry point: generate the pending tweets the pool couldn't serve (see start_top_up)
+
+    Returns:
+        Result counts stored on the job
+    """
+    tweet_ids = list(served_ids)
+    duplicates = []
+    progress(stage="generating", target=count, from_pool=len(served_ids), tweet_ids=list(tweet_ids), duplicates=[])
+
+    generator = get_content_generator(db)
+    generator.prepare_generation(replace_pending=False)
+
+    async def consume() -> Dict[str, Any]:
+        async for event in generator.astream_daily_tweets(count=missing):
+            if event['event'] == 'tweet':
+                tweet_ids.append(event['tweet'].id)
+                progress(tweet_ids=list(tweet_ids))
+            elif event['event'] == 'duplicate':
+                duplicates.append(event['duplicate'])
+                progress(duplicates=list(duplicates))
+            else:
+                return event['results']
+
+    results = run_async(consume())
+    progress(stage="done")
+    return _top_up_result(served_by_source, results)
+
+
+def request_pool_refill(db: Session) -> Optional[Job]:
+    """
+    Queue a pool refill if the pool is below its low-water mark
+
+    Returns:
+        The queued job, or None if no refill was needed or one is already queued or running
+    """
+    if CandidatePool(db).size() >= settings.candidate_pool_low_water:
+        return None
+
+    in_flight = db.query(Job).filter(
+        Job.kind == REFILL_JOB_KIND,
+        Job.status.in_(["queued", "running"])
+    ).first()
+    if in_flight is not None:
+        return None
+
+    try:
+        return get_job_queue().enqueue(db, REFILL_JOB_KIND, run_pool_refill_job, background=True)
+    except IntegrityError:
+        # Another worker queued one since the check (ix_jobs_single_active_refill)
+        db.rollback()
+        return None
@@ -1,6 +1,11 @@
-from openai import OpenAI
-from typing import List
+from openai import OpenAI, AsyncOpenAI
+from typing import List, AsyncIterator, Dict, Any
 from app.config import get_settings
+from app.services.tweet_parser import TweetStreamParser, parse_tweet_list
+from app.services.prompt_builder import fit_prompt_context, max_tokens_for_tweets
+from app.services.llm_cache import get_llm_cache, make_cache_key, CACHE_USE
+from app.services.http_transport import get_http_client, get_async_http_client, get_http_transport
+import threading
 
 settings = get_settings()
 
@@ -8,11 +13,20 @@ settings = get_settings()
 class ChatGPTClient:
     """Client for OpenAI ChatGPT API"""
 
+    MAX_GENERATION_TOKENS = 4096  # Upper limit for sizing max_tokens from the tweet count
+
     def __init__(self):
-        self.client = OpenAI(api_key=settings.openai_api_key)
+        self.client = OpenAI(api_key=settings.openai_api_key, http_client=get_http_client('openai'))
         self.text_model = "gpt-4o"
         self.image_model = "gpt-4o"  # GPT-4o with native image generation
 
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """Async client for the running event loop (async connection pools can't be shared across loops)"""
+        return get_http_transport().loop_client(
+            'openai', lambda: AsyncOpenAI(api_key=settings.openai_api_key, http_client=get_async_http_client('openai'))
+        )
+
     def generate_tweets(
         self,
         count: int,
@@ -33,25 +47,17 @@ class ChatGPTClient:
         Returns:
             List of generated tweet texts
         """
-        # Create prompt with context
-        prompt = self._build_tweet_generation_prompt(
+        # Create request with context
+        params = self.tweet_generation_params(
             count, brand_voice_examples, topics, common_phrases, edit_examples
         )
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.text_model,
-                messages=[
-                    {"role": "system", "content": "You are a social media content creator for Ferta, specializing in holistic fertility education."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.8,
-                max_tokens=2000
-            )
+            response = self.client.chat.completions.create(**params)
 
             # Parse response
             content = response.choices[0].message.content
-            tweets = self._parse_tweet_list(content)
+            tweets = parse_tweet_list(content)
 
             return tweets[:count]
 
@@ -59,6 +65,67 @@ class ChatGPTClient:
             print(f"Error generating tweets with ChatGPT: {str(e)}")
             raise
 
+    async def astream_tweets(
+        self,
+        count: int,
+        brand_voice_examples: List[str],
+        topics: List[str],
+        common_phrases: List[str],
+        edit_examples: List[dict] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream generated tweets, yielding each one as soon as its line completes
+
+        Takes the same arguments as generate_tweets.
+        """
+        params = self.tweet_generation_params(
+            count, brand_voice_examples, topics, common_phrases, edit_examples
+        )
+        parser = TweetStreamParser()
+        emitted = 0
+
+        try:
+            stream = await self.async_client.chat.completions.create(**params, stream=True)
+
+            async for chunk in stream:
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                for tweet in parser.feed(chunk.choices[0].delta.content):
+                    yield tweet
+                    emitted += 1
+                    if emitted >= count:
+                        await stream.response.aclose()
+                        return
+
+            for tweet in parser.close()[:count - emitted]:
+                yield tweet
+
+        except Exception as e:
+            print(f"Error generating tweets with ChatGPT: {str(e)}")
+            raise
+
+    def tweet_generation_params(
+        self,
+        count: int,
+        brand_voice_examples: List[str],
+        topics: List[str],
+        common_phrases: List[str],
+        edit_examples: List[dict] = None
+    ) -> Dict[str, Any]:
+        """Chat Completions parameters for a tweet generation request (also used for batch requests)"""
+        prompt = self._build_tweet_generation_prompt(
+            count, brand_voice_examples, topics, common_phrases, edit_examples
+        )
+        return {
+            "model": self.text_model,
+            "messages": [
+                {"role": "system", "content": "You are a social media content creator for Ferta, specializing in holistic fertility education."},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.8,
+            "max_tokens": max_tokens_for_tweets(count, self.MAX_GENERATION_TOKENS)
+        }
+
     def _build_tweet_generation_prompt(
         self,
         count: int,
@@ -67,7 +134,12 @@ class ChatGPTClient:
         common_phrases: List[str],
         edit_examples: List[dict] = None
     ) -> str:
-        """Build the prompt for tweet generation"""
+        """Build the prompt for tweet generation (context sections are trimmed to the prompt token budget)"""
+        context = fit_prompt_context(brand_voice_examples, topics, common_phrases, edit_examples)
+        brand_voice_examples = context['brand_voice_examples']
+        topics = context['topics']
+        common_phrases = context['common_phrases']
+        edit_examples = context['edit_examples']
 
         # Build the edit examples section if available
         edit_section = ""
@@ -161,33 +233,14 @@ Format:
 etc.
 """
 
-    def _parse_tweet_list(self, content: str) -> List[str]:
-        """Parse numbered list of tweets from response"""
-        tweets = []
-        lines = content.strip().split('\n')
-
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-
-            # Remove numbering
-            import re
-            cleaned = re.sub(r'^\d+\.\s*', '', line)
-            cleaned = cleaned.strip('"\'')
-
-            if cleaned and len(cleaned) <= 280:
-                tweets.append(cleaned)
-
-        return tweets
-
-    def generate_image(self, prompt: str, tweet_text: str) -> str:
+    def generate_image(self, prompt: str, tweet_text: str, cache: str = CACHE_USE) -> str:
         """
         Generate an aesthetic image for Instagram using GPT-4o
 
         Args:
             prompt: Image generation prompt
             tweet_text: Text to overlay on image
+            cache: LLM cache mode ('use', 'refresh' or 'bypass')
 
         Returns:
             URL of generated image
@@ -209,7 +262,7 @@ Additional context: {prompt}
 
 The overall feel should be: calming, empowering, hopeful, and professional."""
 
-        try:
+        def create_image() -> str:
             # Note: As of 2025, GPT-4o supports native image generation
             # This is a placeholder for the actual API call
             # The actual implementation would use the image generation endpoint
@@ -220,23 +273,48 @@ The overall feel should be: calming, empowering, hopeful, and professional."""
                 quality="standard",
                 n=1
             )
-
             return response.data[0].url
 
+        try:
+            key = make_cache_key(
+                'chatgpt', 'dall-e-3', full_prompt, temperature=None, max_tokens=None,
+                size="1024x1024", quality="standard"
+            )
+            # Image URLs expire, so they are only cached for a short time
+            return get_llm_cache().cached_call(
+                key, create_image, cache=cache, ttl_seconds=settings.llm_cache_image_ttl_seconds
+            )
+
         except Exception as e:
             print(f"Error generating image: {str(e)}")
             raise
 
-    def expand_caption(self, tweet_text: str) -> str:
+    def expand_caption(self, tweet_text: str, cache: str = CACHE_USE) -> str:
         """
         Expand a tweet into a longer Instagram caption
 
         Args:
             tweet_text: Original tweet text
+            cache: LLM cache mode ('use', 'refresh' or 'bypass')
 
         Returns:
             Expanded Instagram caption
         """
+        params = self.caption_params(tweet_text)
+
+        def create_caption() -> str:
+            response = self.client.chat.completions.create(**params)
+            return response.choices[0].message.content.strip().strip('"\'')
+
+        try:
+            return get_llm_cache().cached_call(self.caption_cache_key(tweet_text), create_caption, cache=cache)
+
+        except Exception as e:
+            print(f"Error expanding caption: {str(e)}")
+            raise
+
+    def caption_params(self, tweet_text: str) -> Dict[str, Any]:
+        """Chat Completions parameters for a caption expansion request"""
         prompt = f"""Expand this tweet into a thoughtful Instagram caption (3-5 sentences, 150-200 words):
 
 Tweet: "{tweet_text}"
@@ -252,31 +330,39 @@ Guidelines:
 Return only the caption text.
 """
 
-        try:
-            response = self.client.chat.completions.create(
-                model=self.text_model,
-                messages=[
-                    {"role": "system", "content": "You are creating Instagram captions for Ferta's holistic fertility education content."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=400
-            )
-
-            return response.choices[0].message.content.strip().strip('"\'')
-
-        except Exception as e:
-            print(f"Error expanding caption: {str(e)}")
-            raise
+        system_prompt = "You are creating Instagram captions for Ferta's holistic fertility education content."
+
+        return {
+            "model": self.text_model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.7,
+            "max_tokens": 400
+        }
+
+    def caption_cache_key(self, tweet_text: str) -> str:
+        """LLM cache key under which a caption for this tweet is stored"""
+        params = self.caption_params(tweet_text)
+        system_prompt, prompt = (message["content"] for message in params["messages"])
+        return make_cache_key(
+            'chatgpt', params["model"], f"{system_prompt}\n\n{prompt}",
+            temperature=params["temperature"], max_tokens=params["max_tokens"]
+        )
 
 
 # Singleton instance
 _chatgpt_client = None
+_chatgpt_client_lock = threading.Lock()
 
 
 def get_chatgpt_client() -> ChatGPTClient:
     """Get or create ChatGPT client instance"""
     global _chatgpt_client
     if _chatgpt_client is None:
-        _chatgpt_client = ChatGPTClient()
+        # Scheduler and job worker threads can ask for the client at the same time
+        with _chatgpt_client_lock:
+            if _chatgpt_client is None:
+                _chatgpt_client = ChatGPTClient()
     return _chatgpt_client
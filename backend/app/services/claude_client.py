@@ -1,6 +1,11 @@
-from anthropic import Anthropic
-from typing import List, Dict, Any
+from anthropic import Anthropic, AsyncAnthropic
+from typing import List, AsyncIterator, Dict, Any
 from app.config import get_settings
+from app.services.tweet_parser import TweetStreamParser, parse_tweet_list
+from app.services.prompt_builder import fit_prompt_context, max_tokens_for_tweets
+from app.services.llm_cache import get_llm_cache, make_cache_key, CACHE_USE
+from app.services.http_transport import get_http_client, get_async_http_client, get_http_transport
+import threading
 
 settings = get_settings()
 
@@ -8,16 +13,26 @@ settings = get_settings()
 class ClaudeClient:
     """Client for Anthropic Claude API"""
 
+    MAX_GENERATION_TOKENS = 4000  # Upper limit for sizing max_tokens from the tweet count
+
     def __init__(self):
-        self.client = Anthropic(api_key=settings.anthropic_api_key)
+        self.client = Anthropic(api_key=settings.anthropic_api_key, http_client=get_http_client('anthropic'))
         self.model = "claude-3-5-sonnet-20241022"  # Latest as of Nov 2024
 
+    @property
+    def async_client(self) -> AsyncAnthropic:
+        """Async client for the running event loop (async connection pools can't be shared across loops)"""
+        return get_http_transport().loop_client(
+            'anthropic', lambda: AsyncAnthropic(api_key=settings.anthropic_api_key, http_client=get_async_http_client('anthropic'))
+        )
+
     def generate_tweets(
         self,
         count: int,
         brand_voice_examples: List[str],
         topics: List[str],
-        common_phrases: List[str]
+        common_phrases: List[str],
+        edit_examples: List[dict] = None
     ) -> List[str]:
         """
         Generate tweet ideas based on brand voice and topics
@@ -27,28 +42,22 @@ class ClaudeClient:
             brand_voice_examples: Example tweets showing brand voice
             topics: Common topics to focus on
             common_phrases: Common phrases used in past tweets
+            edit_examples: Recent user edits ({original, improved}) to learn from
 
         Returns:
             List of generated tweet texts
         """
-        # Create prompt with context
-        prompt = self._build_tweet_generation_prompt(
-            count, brand_voice_examples, topics, common_phrases
+        # Create request with context
+        params = self.tweet_generation_params(
+            count, brand_voice_examples, topics, common_phrases, edit_examples
         )
 
         try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=4000,
-                temperature=0.8,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
+            response = self.client.messages.create(**params)
 
             # Parse response - expecting numbered list
             content = response.content[0].text
-            tweets = self._parse_tweet_list(content)
+            tweets = parse_tweet_list(content)
 
             return tweets[:count]  # Ensure we return exactly the requested count
 
@@ -56,14 +65,91 @@ class ClaudeClient:
             print(f"Error generating tweets with Claude: {str(e)}")
             raise
 
+    async def astream_tweets(
+        self,
+        count: int,
+        brand_voice_examples: List[str],
+        topics: List[str],
+        common_phrases: List[str],
+        edit_examples: List[dict] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream generated tweets, yielding each one as soon as its line completes
+
+        Takes the same arguments as generate_tweets.
+        """
+        params = self.tweet_generation_params(
+            count, brand_voice_examples, topics, common_phrases, edit_examples
+        )
+        parser = TweetStreamParser()
+        emitted = 0
+
+        try:
+            stream = await self.async_client.messages.create(**params, stream=True)
+
+            async for event in stream:
+                if event.type != "content_block_delta":
+                    continue
+                for tweet in parser.feed(event.delta.text):
+                    yield tweet
+                    emitted += 1
+                    if emitted >= count:
+                        await stream.response.aclose()
+                        return
+
+            for tweet in parser.close()[:count - emitted]:
+                yield tweet
+
+        except Exception as e:
+            print(f"Error generating tweets with Claude: {str(e)}")
+            raise
+
+    def tweet_generation_params(
+        self,
+        count: int,
+        brand_voice_examples: List[str],
+        topics: List[str],
+        common_phrases: List[str],
+        edit_examples: List[dict] = None
+    ) -> Dict[str, Any]:
+        """Messages API parameters for a tweet generation request (also used for batch requests)"""
+        prompt = self._build_tweet_generation_prompt(
+            count, brand_voice_examples, topics, common_phrases, edit_examples
+        )
+        return {
+            "model": self.model,
+            "max_tokens": max_tokens_for_tweets(count, self.MAX_GENERATION_TOKENS),
+            "temperature": 0.8,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ]
+        }
+
     def _build_tweet_generation_prompt(
         self,
         count: int,
         brand_voice_examples: List[str],
         topics: List[str],
-        common_phrases: List[str]
+        common_phrases: List[str],
+        edit_examples: List[dict] = None
     ) -> str:
-        """Build the prompt for tweet generation"""
+        """Build the prompt for tweet generation (context sections are trimmed to the prompt token budget)"""
+        context = fit_prompt_context(brand_voice_examples, topics, common_phrases, edit_examples)
+        brand_voice_examples = context['brand_voice_examples']
+        topics = context['topics']
+        common_phrases = context['common_phrases']
+        edit_examples = context['edit_examples']
+
+        # Build the edit examples section if available
+        edit_section = ""
+        if edit_examples:
+            edit_section = "\n\nLEARN FROM THESE EDITS - Earlier tweets were edited by the team. Study what changed:\n\n"
+            for i, example in enumerate(edit_examples, 1):
+                edit_section += f"Example {i}:\n"
+                edit_section += f"Original: \"{example['original']}\"\n"
+                edit_section += f"Edited: \"{example['improved']}\"\n\n"
+            edit_section += "Apply the same kinds of changes to the new tweets you generate.\n"
+
         return f"""Generate {count} deeply insightful tweet ideas for @joinferta. These tweets should sound like Preethi Kasireddy and Alexander Cortes sharing hard-earned wisdom and nuanced perspectives on fertility with their community.
 
 BRAND VOICE EXAMPLES:
@@ -73,7 +159,7 @@ KEY TOPICS TO EXPLORE WITH DEPTH:
 {', '.join(topics)}
 
 COMMON PHRASES THAT RESONATE:
-{', '.join(common_phrases)}
+{', '.join(common_phrases)}{edit_section}
 
 CONTENT DEPTH REQUIREMENTS:
 - Challenge conventional thinking with specific, evidence-based counterpoints
@@ -120,38 +206,32 @@ Format:
 etc.
 """
 
-    def _parse_tweet_list(self, content: str) -> List[str]:
-        """Parse numbered list of tweets from response"""
-        tweets = []
-        lines = content.strip().split('\n')
-
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-
-            # Remove numbering (1., 2., etc.)
-            import re
-            cleaned = re.sub(r'^\d+\.\s*', '', line)
-
-            # Remove quotes if present
-            cleaned = cleaned.strip('"\'')
-
-            if cleaned and len(cleaned) <= 280:
-                tweets.append(cleaned)
-
-        return tweets
-
-    def expand_caption(self, tweet_text: str) -> str:
+    def expand_caption(self, tweet_text: str, cache: str = CACHE_USE) -> str:
         """
         Expand a tweet into a longer Instagram caption
 
         Args:
             tweet_text: Original tweet text
+            cache: LLM cache mode ('use', 'refresh' or 'bypass')
 
         Returns:
             Expanded Instagram caption
         """
+        params = self.caption_params(tweet_text)
+
+        def create_caption() -> str:
+            response = self.client.messages.create(**params)
+            return response.content[0].text.strip().strip('"\'')
+
+        try:
+            return get_llm_cache().cached_call(self.caption_cache_key(tweet_text), create_caption, cache=cache)
+
+        except Exception as e:
+            print(f"Error expanding caption with Claude: {str(e)}")
+            raise
+
+    def caption_params(self, tweet_text: str) -> Dict[str, Any]:
+        """Messages API parameters for a caption expansion request"""
         prompt = f"""You are creating Instagram content for Ferta, a holistic fertility education company.
 
 Take this tweet and expand it into a thoughtful, engaging Instagram caption (3-5 sentences, about 150-200 words):
@@ -169,30 +249,35 @@ Guidelines:
 Return ONLY the caption text, no explanations or additional formatting.
 """
 
-        try:
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=500,
-                temperature=0.7,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
-
-            return response.content[0].text.strip().strip('"\'')
-
-        except Exception as e:
-            print(f"Error expanding caption with Claude: {str(e)}")
-            raise
+        return {
+            "model": self.model,
+            "max_tokens": 500,
+            "temperature": 0.7,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ]
+        }
+
+    def caption_cache_key(self, tweet_text: str) -> str:
+        """LLM cache key under which a caption for this tweet is stored"""
+        params = self.caption_params(tweet_text)
+        return make_cache_key(
+            'claude', params["model"], params["messages"][0]["content"],
+            temperature=params["temperature"], max_tokens=params["max_tokens"]
+        )
 
 
 # Singleton instance
 _claude_client = None
+_claude_client_lock = threading.Lock()
 
 
 def get_claude_client() -> ClaudeClient:
     """Get or create Claude client instance"""
     global _claude_client
     if _claude_client is None:
-        _claude_client = ClaudeClient()
+        # Scheduler and job worker threads can ask for the client at the same time
+        with _claude_client_lock:
+            if _claude_client is None:
+                _claude_client = ClaudeClient()
     return _claude_client
@@ -1,12 +1,23 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator, Callable, Optional, Tuple
 from sqlalchemy.orm import Session
 from app.models import HistoricalTweet, Tweet, InstagramPost, TweetEdit
 from app.services.twitter_client import get_twitter_client
-from app.services.tweet_analyzer import TweetAnalyzer
+from app.services.analysis_cache import get_analysis_cache
+from app.services.historical_sync import HistoricalSync
+from app.services.dedup_index import NearDuplicateIndex
 from app.services.claude_client import get_claude_client
 from app.services.chatgpt_client import get_chatgpt_client
-from datetime import datetime
+from app.services.llm_cache import CACHE_USE
+from app.services.provider_router import get_provider_router
+from app.services.rate_limiter import RateLimited
+from app.services.post_outbox import PostOutbox
+from app.services.http_transport import run_async
+from app.config import get_settings
 from zoneinfo import ZoneInfo
+import asyncio
+import tweepy
+
+settings = get_settings()
 
 # Configure timezone to Central Time (USA)
 CENTRAL_TZ = ZoneInfo("America/Chicago")
@@ -20,69 +31,96 @@ class ContentGenerator:
         self.twitter_client = get_twitter_client()
         self.claude_client = get_claude_client()
         self.chatgpt_client = get_chatgpt_client()
+        self.provider_router = get_provider_router()
 
     def fetch_and_store_historical_tweets(self, username: str = "joinferta", count: int = 100) -> int:
         """
-        Fetch historical tweets and store in database
+        Fetch new historical tweets and store in database
+
+        Only tweets newer than the account's last completed sync are
+        fetched, across as many pages as needed (see HistoricalSync).
 
         Args:
             username: Twitter username to fetch from
-            count: Number of tweets to fetch
+            count: Maximum number of tweets to fetch in this call; a longer
+                backlog is resumed on the next call
 
         Returns:
             Number of new tweets stored
         """
-        # Fetch tweets from Twitter
-        tweets = self.twitter_client.fetch_user_tweets(username, max_results=count)
-
-        stored_count = 0
-        for tweet_data in tweets:
-            # Check if tweet already exists
-            existing = self.db.query(HistoricalTweet).filter(
-                HistoricalTweet.tweet_id == tweet_data['tweet_id']
-            ).first()
-
-            if not existing:
-                # Create new historical tweet record
-                historical_tweet = HistoricalTweet(
-                    tweet_id=tweet_data['tweet_id'],
-                    content=tweet_data['content'],
-                    posted_date=tweet_data['posted_date'],
-                    engagement_metrics=tweet_data['engagement_metrics'],
-                    topic_tags=[]  # Will be populated by analyzer
-                )
-                self.db.add(historical_tweet)
-                stored_count += 1
+        return HistoricalSync(self.db, self.twitter_client).sync(username, max_tweets=count)
 
-        self.db.commit()
-        return stored_count
+    def prepare_generation(self, replace_pending: bool = True) -> int:
+        """
+        Make sure there is historical context to learn from, optionally clearing old pending tweets
 
-    def generate_daily_tweets(self, count: int = 25) -> Dict[str, int]:
+        Args:
+            replace_pending: Delete pending tweets first so only new ones are shown
+
+        Returns:
+            Number of old pending tweets deleted
+        """
+        deleted_count = 0
+        if replace_pending:
+            # Delete all old pending tweets to show only new ones
+            old_pending = self.db.query(Tweet).filter(Tweet.status == "pending").all()
+            deleted_count = len(old_pending)
+            for tweet in old_pending:
+                self.db.delete(tweet)
+            NearDuplicateIndex(self.db).remove('tweet', [tweet.id for tweet in old_pending])
+            self.db.commit()
+            if deleted_count > 0:
+                print(f"Deleted {deleted_count} old pending tweets")
+
+        # Only fetch historical tweets if we don't have enough
+        historical_count = self.db.query(HistoricalTweet).count()
+        if historical_count < 50:
+            try:
+                stored = self.fetch_and_store_historical_tweets(count=100)
+                print(f"Fetched {stored} new historical tweets (total: {historical_count + stored})")
+            except Exception as e:
+                print(f"Note: Could not fetch historical tweets: {e}")
+                # Continue anyway - might already have some stored
+        else:
+            print(f"Using existing {historical_count} historical tweets (skipping fetch to avoid rate limits)")
+
+        return deleted_count
+
+    def generate_daily_tweets(self, count: int = 25) -> Dict[str, Any]:
         """
         Generate daily tweet ideas using both Claude and ChatGPT
 
+        Synchronous entry point for callers without an event loop (the
+        scheduler thread); async code should await agenerate_daily_tweets.
+        """
+        return run_async(self.agenerate_daily_tweets(count))
+
+    async def agenerate_daily_tweets(self, count: int = 25) -> Dict[str, Any]:
+        """
+        Generate daily tweet ideas using both Claude and ChatGPT concurrently
+
         Args:
             count: Total number of tweets to generate (split between AIs)
 
         Returns:
-            Dictionary with counts of tweets generated by each AI
-        """
-        # Get historical tweets for context
-        historical_tweets = self.db.query(HistoricalTweet).all()
-
-        if historical_tweets:
-            # Analyze historical tweets if available
-            historical_data = [
-                {
-                    'content': ht.content,
-                    'engagement_metrics': ht.engagement_metrics
-                }
-                for ht in historical_tweets
-            ]
+            Dictionary with counts of tweets generated by each AI, plus the
+            near-duplicates that were dropped instead of stored
+        """
+        async for event in self.astream_daily_tweets(count):
+            if event['event'] == 'done':
+                return event['results']
+
+    def generation_context(self) -> Dict[str, Any]:
+        """
+        Prompt context for tweet generation
 
-            analyzer = TweetAnalyzer(historical_data)
-            analysis = analyzer.get_analysis_summary()
+        Returns:
+            {'brand_voice_examples', 'topics', 'common_phrases', 'edit_examples'}
+        """
+        # Get historical analysis (cached until the corpus changes)
+        analysis = get_analysis_cache().get_summary(self.db)
 
+        if analysis['total_tweets']:
             brand_voice_examples = analysis['brand_voice_examples']
             topics = analysis['top_topics']
             common_phrases = analysis['common_phrases']
@@ -109,37 +147,231 @@ class ContentGenerator:
                 })
             print(f"Using {len(edit_examples)} edit examples to improve tweet generation")
 
-        # For now, use only ChatGPT since Claude model access may be limited
-        # Generate all tweets with ChatGPT
-        chatgpt_tweets = self.chatgpt_client.generate_tweets(
-            count=count,
-            brand_voice_examples=brand_voice_examples,
-            topics=topics,
-            common_phrases=common_phrases,
-            edit_examples=edit_examples
-        )
+        return {
+            'brand_voice_examples': brand_voice_examples,
+            'topics': topics,
+            'common_phrases': common_phrases,
+            'edit_examples': edit_examples
+        }
 
-        # Store generated tweets in database
-        for tweet_text in chatgpt_tweets:
-            tweet = Tweet(
-                content=tweet_text,
-                ai_source='chatgpt',
-                status='pending'
-            )
-            self.db.add(tweet)
+    async def astream_daily_tweets(self, count: int = 25, status: str = 'pending') -> AsyncIterator[Dict[str, Any]]:
+        """
+        Generate daily tweet ideas, storing and reporting each one as it arrives
 
-        self.db.commit()
+        Providers are streamed; every tweet is checked against the
+        near-duplicate index and committed as soon as its line is complete.
 
-        return {
-            'claude': 0,
-            'chatgpt': len(chatgpt_tweets),
-            'total': len(chatgpt_tweets)
+        Args:
+            count: Total number of tweets to generate (split between AIs)
+            status: Status to store tweets with ('candidate' fills the
+                candidate pool instead of the review queue)
+
+        Yields:
+            {'event': 'tweet', 'tweet': Tweet} for each stored tweet,
+            {'event': 'duplicate', 'duplicate': {...}} for each dropped one,
+            then {'event': 'done', 'results': {...}} with the same results
+            agenerate_daily_tweets returns
+        """
+        context = self.generation_context()
+
+        dedup_index = NearDuplicateIndex(self.db)
+        counts = {'claude': 0, 'chatgpt': 0}
+        dropped = []
+
+        # Providers run concurrently; tweets are stored in arrival order
+        async for source, tweet_text in self._stream_from_providers(count, **context):
+            tweet, duplicate = self.store_generated_tweet(dedup_index, source, tweet_text, status)
+            if duplicate is not None:
+                dropped.append(duplicate)
+                yield {'event': 'duplicate', 'duplicate': duplicate}
+                continue
+
+            counts[source] += 1
+            yield {'event': 'tweet', 'tweet': tweet}
+
+        yield {
+            'event': 'done',
+            'results': {
+                'claude': counts['claude'],
+                'chatgpt': counts['chatgpt'],
+                'total': counts['claude'] + counts['chatgpt'],
+                'duplicates_dropped': len(dropped),
+                'dropped': dropped
+            }
         }
 
+    def store_generated_tweet(
+        self,
+        dedup_index: NearDuplicateIndex,
+        source: str,
+        tweet_text: str,
+        status: str = 'pending'
+    ) -> Tuple[Optional[Tweet], Optional[Dict[str, Any]]]:
+        """
+        Store a generated tweet unless it near-duplicates one we have
+
+        Args:
+            dedup_index: Index of historical and stored tweets
+            source: AI that generated the tweet
+            tweet_text: Generated text
+            status: Status to store the tweet with
+
+        Returns:
+            (stored Tweet, None), or (None, duplicate details) if it was dropped
+        """
+        # Drop near-copies of historical tweets and of stored tweets
+        signature = dedup_index.hasher.signature(tweet_text)
+        duplicate = dedup_index.find_duplicate(tweet_text, signature)
+        if duplicate is not None:
+            duplicate = {'content': tweet_text, **duplicate}
+            print(f"Dropped near-duplicate ({duplicate['similarity']:.2f} similar to {duplicate['source']} {duplicate['source_id']}): {tweet_text[:50]}...")
+            return None, duplicate
+
+        tweet = Tweet(
+            content=tweet_text,
+            ai_source=source,
+            status=status
+        )
+        self.db.add(tweet)
+        self.db.flush()
+        dedup_index.add('tweet', tweet.id, tweet_text, signature)
+        self.db.commit()
+        return tweet, None
+
+    async def _stream_from_providers(self, count: int, **context) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Stream tweets from Claude and ChatGPT concurrently under one deadline
+
+        Each provider is asked for half of the count, split into chunks of
+        GENERATION_CHUNK_SIZE that run concurrently (at most
+        GENERATION_MAX_CONCURRENCY per provider) through the provider
+        router, which hedges slow chunks to the other provider. Exact
+        repeats are skipped, and only the shortfall is requested again in
+        up to GENERATION_TOP_UP_ROUNDS extra rounds. If a provider fails a
+        whole round, its share moves to the other provider.
+
+        Yields:
+            (provider, tweet text) in arrival order
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.generation_deadline_seconds
+
+        claude_count = count // 2
+        targets = {'claude': claude_count, 'chatgpt': count - claude_count}
+        generated = {source: 0 for source in targets}
+        seen = set()
+        errors = []
+
+        for _ in range(settings.generation_top_up_rounds + 1):
+            shortfall = {
+                source: target - generated[source]
+                for source, target in targets.items()
+                if target > generated[source]
+            }
+            if not shortfall:
+                break
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                errors.append(f"no response within {settings.generation_deadline_seconds}s")
+                break
+
+            round_errors = {source: [] for source in shortfall}
+            round_counts = {source: 0 for source in shortfall}
+            async for requested, source, tweet_text in self._stream_round(shortfall, remaining, context, round_errors):
+                key = ' '.join(tweet_text.lower().split())
+                if key in seen:
+                    continue
+                seen.add(key)
+                # Hedged chunks may be answered by the other provider; they
+                # still count towards the share they were requested for
+                generated[requested] += 1
+                round_counts[requested] += 1
+                yield source, tweet_text
+
+            failed = []
+            for source, source_errors in round_errors.items():
+                errors.extend(f"{source}: {error}" for error in source_errors)
+                if source_errors and not round_counts[source]:
+                    failed.append(source)
+
+            # Hand a failed provider's share to a provider that is still answering
+            healthy = [source for source in targets if source not in failed]
+            if healthy:
+                for source in failed:
+                    targets[healthy[0]] += targets[source] - generated[source]
+                    targets[source] = generated[source]
+
+        for error in errors:
+            print(f"Tweet generation provider failed - {error}")
+        if not any(generated.values()):
+            raise RuntimeError(f"All providers failed to generate tweets ({'; '.join(errors)})")
+
+    async def _stream_round(
+        self,
+        shortfall: Dict[str, int],
+        timeout: float,
+        context: Dict[str, Any],
+        errors: Dict[str, List[str]]
+    ) -> AsyncIterator[Tuple[str, str, str]]:
+        """
+        Run one round of chunked streaming requests
+
+        Failures are appended to errors (keyed by requested provider)
+        instead of raised.
+
+        Yields:
+            (requested provider, answering provider, tweet text) as each
+            chunk produces them
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        chunk_size = max(settings.generation_chunk_size, 1)
+        queue = asyncio.Queue()
+
+        async def stream_chunk(source: str, chunk_count: int, semaphore: asyncio.Semaphore):
+            async with semaphore:
+                async for answered_by, tweet_text in self.provider_router.astream_tweets(
+                    source, chunk_count, **context
+                ):
+                    queue.put_nowait((source, answered_by, tweet_text))
+
+        tasks = {}
+        for source, needed in shortfall.items():
+            semaphore = asyncio.Semaphore(settings.generation_max_concurrency)
+            for start in range(0, needed, chunk_size):
+                chunk_count = min(chunk_size, needed - start)
+                task = asyncio.create_task(stream_chunk(source, chunk_count, semaphore))
+                # A None item tells the consumer that a chunk has finished
+                task.add_done_callback(lambda _: queue.put_nowait(None))
+                tasks[task] = source
+
+        finished = 0
+        try:
+            while finished < len(tasks):
+                try:
+                    item = await asyncio.wait_for(queue.get(), deadline - loop.time())
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    finished += 1
+                else:
+                    yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        for task, source in tasks.items():
+            if not task.done() or task.cancelled():
+                errors[source].append(f"chunk missed the {settings.generation_deadline_seconds}s deadline")
+            elif task.exception() is not None:
+                errors[source].append(str(task.exception()))
+
     def create_instagram_post_from_tweet(
         self,
         tweet_id: int,
-        ai_source: str = 'claude'
+        ai_source: str = 'claude',
+        cache: str = CACHE_USE
     ) -> InstagramPost:
         """
         Convert a tweet into an Instagram post with image
@@ -147,6 +379,10 @@ class ContentGenerator:
         Args:
             tweet_id: ID of the tweet to convert
             ai_source: Which AI to use ('claude' or 'chatgpt')
+            cache: LLM cache mode for the caption and image ('use', 'refresh'
+                or 'bypass'). By default cached responses are reused (e.g. a
+                batch-generated caption), retries included; pass 'refresh'
+                for a new caption and image.
 
         Returns:
             Created InstagramPost object
@@ -158,14 +394,15 @@ class ContentGenerator:
 
         # Expand into Instagram caption
         if ai_source == 'claude':
-            caption = self.claude_client.expand_caption(tweet.content)
+            caption = self.claude_client.expand_caption(tweet.content, cache=cache)
         else:
-            caption = self.chatgpt_client.expand_caption(tweet.content)
+            caption = self.chatgpt_client.expand_caption(tweet.content, cache=cache)
 
         # Generate image (using ChatGPT/DALL-E as it has image generation)
         image_url = self.chatgpt_client.generate_image(
             prompt="Holistic fertility and wellness theme",
-            tweet_text=tweet.content
+            tweet_text=tweet.content,
+            cache=cache
         )
 
         # Create Instagram post record
@@ -191,6 +428,9 @@ class ContentGenerator:
 
         Returns:
             True if successful
+
+        Raises:
+            RateLimited: The post budget is spent (the tweet is left as it was)
         """
         tweet = self.db.query(Tweet).filter(Tweet.id == tweet_id).first()
         if not tweet:
@@ -199,24 +439,107 @@ class ContentGenerator:
         if tweet.status == 'posted':
             raise ValueError("Tweet has already been posted")
 
+        # Claim the tweet in the outbox first so no other worker can post it too
+        outbox = PostOutbox(self.db)
+        outbox.enqueue([(tweet.id, tweet.content)])
+        claimed = outbox.claim(1, tweet_ids=[tweet.id], scheduled_only=False)
+        if not claimed:
+            raise ValueError("Tweet is already being posted")
+
         try:
             # Post to Twitter
-            twitter_id = self.twitter_client.post_tweet(tweet.content)
+            twitter_id = self.twitter_client.post_tweet(claimed[0][2])
 
-            # Update tweet record (use Central Time)
-            tweet.twitter_id = twitter_id
-            tweet.status = 'posted'
-            tweet.posted_time = datetime.now(CENTRAL_TZ)
-
-            self.db.commit()
-            return True
+        except RateLimited as e:
+            # Nothing was sent; the tweet keeps its status so it can be retried
+            outbox.complete(claimed, [{'id': tweet.id, 'status': 'rate_limited', 'retry_at': e.retry_at}])
+            raise
 
         except Exception as e:
-            tweet.status = 'failed'
-            self.db.commit()
+            # A refused request failed; anything else (a timeout, a 5xx) may
+            # have posted, so the claim is left for the outbox to reconcile
+            refused = isinstance(e, ValueError) or (isinstance(e, tweepy.HTTPException) and e.response.status_code < 500)
+            if refused:
+                outbox.complete(claimed, [{'id': tweet.id, 'status': 'failed', 'error': str(e)}])
             raise
 
+        # Mark the outbox row sent and the tweet posted together
+        outbox.complete(claimed, [{'id': tweet.id, 'status': 'posted', 'twitter_id': twitter_id}])
+        return True
+
 
 def get_content_generator(db: Session) -> ContentGenerator:
     """Get content generator instance"""
     return ContentGenerator(db)
+
+
+def run_generation_job(
+    db: Session,
+    progress: Callable[..., None],
+    count: int = 25,
+    replace_pending: bool = True,
+    status: str = 'pending'
+) -> Dict[str, Any]:
+    """
+    Job queue entry point: generate tweets for review
+
+    Args:
+        db: The job's database session
+        progress: Job progress reporter
+        count: Number of tweets to generate
+        replace_pending: Delete existing pending tweets first
+        status: Status to store the tweets with ('candidate' to fill the pool)
+
+    Returns:
+        Result counts stored on the job
+    """
+    generator = ContentGenerator(db)
+    progress(stage="preparing", target=count, generated=0, duplicates_dropped=0)
+    deleted_count = generator.prepare_generation(replace_pending=replace_pending)
+
+    async def generate() -> Dict[str, Any]:
+        generated = 0
+        dropped = 0
+        progress(stage="generating")
+        async for event in generator.astream_daily_tweets(count, status=status):
+            if event['event'] == 'tweet':
+                generated += 1
+                progress(generated=generated)
+            elif event['event'] == 'duplicate':
+                dropped += 1
+                progress(duplicates_dropped=dropped)
+            else:
+                return event['results']
+
+    results = run_async(generate())
+    progress(stage="done")
+
+    return {
+        'tweets_generated': results['total'],
+        'claude': results['claude'],
+        'chatgpt': results['chatgpt'],
+        'duplicates_dropped': results['duplicates_dropped'],
+        'pending_deleted': deleted_count
+    }
+
+
+def run_instagram_post_job(
+    db: Session,
+    progress: Callable[..., None],
+    tweet_id: int,
+    ai_source: str = 'claude',
+    cache: str = CACHE_USE
+) -> Dict[str, Any]:
+    """
+    Job queue entry point: turn a tweet into an Instagram post
+
+    A caption from the nightly caption batch (BATCH_CAPTION_EXPANSION) is
+    served from the LLM cache, so only the image is generated.
+
+    Returns:
+        The new post's ID, stored on the job
+    """
+    progress(stage="generating", tweet_id=tweet_id)
+    post = ContentGenerator(db).create_instagram_post_from_tweet(tweet_id, ai_source=ai_source, cache=cache)
+    progress(stage="done")
+    return {'instagram_post_id': post.id}
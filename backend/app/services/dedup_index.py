@@ -0,0 +1,237 @@
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+from sqlalchemy.orm import Session
+from app.config import get_settings
+from app.models import ContentFingerprint, FingerprintBand, HistoricalTweet, Tweet
+import hashlib
+import random
+import re
+import zlib
+
+# Everything that is not a word character or whitespace is ignored when shingling
+_STRIP_PATTERN = re.compile(r'[^\w\s]')
+
+# Mersenne prime used for the universal hash family
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+class MinHasher:
+    """
+    Compute MinHash signatures over word shingles
+
+    Signatures are deterministic across processes (CRC32 shingle hashes and a
+    fixed permutation seed), so they can be stored and compared later.
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 3, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+
+        rng = random.Random(seed)
+        self._permutations = [
+            (rng.randrange(1, _PRIME), rng.randrange(0, _PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def shingles(self, text: str) -> set:
+        """Hashed word shingles of a text"""
+        words = _STRIP_PATTERN.sub('', text.lower()).split()
+        size = min(self.shingle_size, len(words)) or 1
+        return {
+            zlib.crc32(' '.join(words[i:i + size]).encode('utf-8'))
+            for i in range(max(len(words) - size + 1, 1))
+        }
+
+    def signature(self, text: str) -> List[int]:
+        """MinHash signature of a text"""
+        shingles = self.shingles(text)
+        return [
+            min(((a * shingle + b) % _PRIME) & _MAX_HASH for shingle in shingles)
+            for a, b in self._permutations
+        ]
+
+    @staticmethod
+    def similarity(signature: List[int], other: List[int]) -> float:
+        """Estimated Jaccard similarity of two signatures"""
+        matches = sum(1 for x, y in zip(signature, other) if x == y)
+        return matches / len(signature)
+
+
+class NearDuplicateIndex:
+    """
+    Persistent MinHash + LSH index over historical and generated tweet content
+
+    Each signature is split into bands; a text is only compared against
+    stored signatures that share at least one band bucket, which is an
+    indexed lookup on fingerprint_bands.band_key.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        threshold: Optional[float] = None,
+        bands: int = 32,
+        rows: int = 4
+    ):
+        self.db = db
+        self.threshold = threshold if threshold is not None else get_settings().dedup_similarity_threshold
+        self.bands = bands
+        self.rows = rows
+        self.hasher = get_min_hasher(bands * rows)
+
+    def band_keys(self, signature: List[int]) -> List[str]:
+        """LSH bucket keys for a signature, one per band"""
+        keys = []
+        for band in range(self.bands):
+            rows = signature[band * self.rows:(band + 1) * self.rows]
+            digest = hashlib.blake2b(
+                b''.join(value.to_bytes(4, 'big') for value in rows), digest_size=8
+            ).hexdigest()
+            keys.append(f"{band}:{digest}")
+        return keys
+
+    def find_duplicate(
+        self,
+        text: str,
+        signature: Optional[List[int]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Find the most similar indexed content at or above the threshold
+
+        Returns:
+            {'source', 'source_id', 'similarity'} or None
+        """
+        signature = signature or self.hasher.signature(text)
+        candidate_ids = [
+            row.fingerprint_id for row in self.db.query(FingerprintBand.fingerprint_id).filter(
+                FingerprintBand.band_key.in_(self.band_keys(signature))
+            ).distinct()
+        ]
+        if not candidate_ids:
+            return None
+
+        best = None
+        for fingerprint in self.db.query(ContentFingerprint).filter(ContentFingerprint.id.in_(candidate_ids)):
+            similarity = MinHasher.similarity(signature, fingerprint.signature)
+            if similarity >= self.threshold and (best is None or similarity > best['similarity']):
+                best = {
+                    'source': fingerprint.source,
+                    'source_id': fingerprint.source_id,
+                    'similarity': similarity
+                }
+        return best
+
+    def add(self, source: str, source_id: int, text: str, signature: Optional[List[int]] = None):
+        """Index a piece of content (the caller commits)"""
+        signature = signature or self.hasher.signature(text)
+        fingerprint = ContentFingerprint(source=source, source_id=source_id, signature=signature)
+        self.db.add(fingerprint)
+        self.db.flush()
+
+        for band_key in self.band_keys(signature):
+            self.db.add(FingerprintBand(fingerprint_id=fingerprint.id, band_key=band_key))
+
+    def remove(self, source: str, source_ids: Iterable[int]):
+        """Drop indexed content, e.g. when the tweets it belongs to are deleted"""
+        fingerprint_ids = [
+            row.id for row in self.db.query(ContentFingerprint.id).filter(
+                ContentFingerprint.source == source,
+                ContentFingerprint.source_id.in_(list(source_ids))
+            )
+        ]
+        if not fingerprint_ids:
+            return
+
+        self.db.query(FingerprintBand).filter(
+            FingerprintBand.fingerprint_id.in_(fingerprint_ids)
+        ).delete(synchronize_session=False)
+        self.db.query(ContentFingerprint).filter(
+            ContentFingerprint.id.in_(fingerprint_ids)
+        ).delete(synchronize_session=False)
+
+    def filter_candidates(self, candidates: List[str]) -> Tuple[List[Tuple[str, List[int]]], List[Dict[str, Any]]]:
+        """
+        Split candidate texts into fresh content and near-duplicates
+
+        Candidates are checked against the index and against the candidates
+        kept before them in the same batch.
+
+        Returns:
+            (kept, dropped) - kept is a list of (text, signature) so the
+            signatures can be reused when indexing; dropped is a list of
+            {'content', 'source', 'source_id', 'similarity'}
+        """
+        kept = []
+        dropped = []
+        batch_buckets: Dict[str, List[int]] = {}
+
+        for text in candidates:
+            signature = self.hasher.signature(text)
+            band_keys = self.band_keys(signature)
+
+            duplicate = self.find_duplicate(text, signature)
+            if duplicate is None:
+                batch_matches = {index for key in band_keys for index in batch_buckets.get(key, [])}
+                for index in sorted(batch_matches):
+                    similarity = MinHasher.similarity(signature, kept[index][1])
+                    if similarity >= self.threshold:
+                        duplicate = {'source': 'batch', 'source_id': None, 'similarity': similarity}
+                        break
+
+            if duplicate is not None:
+                dropped.append({'content': text, **duplicate})
+                continue
+
+            for key in band_keys:
+                batch_buckets.setdefault(key, []).append(len(kept))
+            kept.append((text, signature))
+
+        return kept, dropped
+
+
+def backfill_fingerprints(db: Session, batch_size: int = 500) -> int:
+    """
+    Index historical and generated tweets stored before the index existed
+
+    Returns:
+        Number of tweets indexed
+    """
+    index = NearDuplicateIndex(db)
+    indexed = 0
+
+    for source, model in (('historical', HistoricalTweet), ('tweet', Tweet)):
+        last_id = 0
+        while True:
+            batch = db.query(model.id, model.content).filter(
+                model.id > last_id
+            ).order_by(model.id).limit(batch_size).all()
+            if not batch:
+                break
+
+            existing = {
+                row.source_id for row in db.query(ContentFingerprint.source_id).filter(
+                    ContentFingerprint.source == source,
+                    ContentFingerprint.source_id.in_([row.id for row in batch])
+                )
+            }
+            for row in batch:
+                if row.id not in existing:
+                    index.add(source, row.id, row.content)
+                    indexed += 1
+
+            db.commit()
+            last_id = batch[-1].id
+
+    return indexed
+
+
+# Singleton instance
+_min_hasher = None
+
+
+def get_min_hasher(num_perm: int = 128) -> MinHasher:
+    """Get or create the shared MinHasher (permutations are generated once)"""
+    global _min_hasher
+    if _min_hasher is None or _min_hasher.num_perm != num_perm:
+        _min_hasher = MinHasher(num_perm=num_perm)
+    return _min_hasher
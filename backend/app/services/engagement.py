@@ -0,0 +1,111 @@
+from typing import List, Dict, Any, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.config import get_settings
+from app.models import HistoricalTweet, AnalyzerState
+
+
+def compute_engagement_score(metrics: Optional[Dict[str, Any]]) -> float:
+    """
+    Compute the weighted engagement score used to rank historical tweets
+
+    Args:
+        metrics: Engagement metrics dict ({likes, retweets, ...})
+
+    Returns:
+        likes * like weight + retweets * retweet weight
+    """
+    settings = get_settings()
+    metrics = metrics or {}
+    return (
+        metrics.get('likes', 0) * settings.engagement_like_weight +
+        metrics.get('retweets', 0) * settings.engagement_retweet_weight
+    )
+
+
+def set_engagement_metrics(historical_tweet: HistoricalTweet, metrics: Dict[str, Any]):
+    """Update a historical tweet's metrics and keep its engagement score in sync"""
+    historical_tweet.engagement_metrics = metrics
+    historical_tweet.engagement_score = compute_engagement_score(metrics)
+
+
+def get_top_engagement_tweets(db: Session, count: int = 5) -> List[str]:
+    """
+    Get the highest-engagement historical tweets via the engagement score index
+
+    Returns:
+        List of tweet texts, best first
+    """
+    rows = db.query(HistoricalTweet.content).order_by(
+        HistoricalTweet.engagement_score.desc(),
+        HistoricalTweet.id
+    ).limit(count).all()
+
+    return [row.content for row in rows]
+
+
+def get_total_engagement(db: Session) -> int:
+    """
+    Sum likes and retweets over all historical tweets, from their current metrics
+
+    Returns:
+        Total likes + retweets
+    """
+    metrics = HistoricalTweet.engagement_metrics
+    total = db.query(func.sum(
+        func.coalesce(metrics['likes'].as_integer(), 0) +
+        func.coalesce(metrics['retweets'].as_integer(), 0)
+    )).scalar()
+    return int(total or 0)
+
+
+def recompute_engagement_scores(db: Session, batch_size: int = 500) -> int:
+    """
+    Recompute every stored engagement score, e.g. after changing the weights
+
+    Returns:
+        Number of tweets updated
+    """
+    updated = 0
+    last_id = 0
+
+    while True:
+        batch = db.query(
+            HistoricalTweet.id,
+            HistoricalTweet.engagement_metrics
+        ).filter(
+            HistoricalTweet.id > last_id
+        ).order_by(HistoricalTweet.id).limit(batch_size).all()
+        if not batch:
+            break
+
+        db.bulk_update_mappings(HistoricalTweet, [
+            {'id': row.id, 'engagement_score': compute_engagement_score(row.engagement_metrics)}
+            for row in batch
+        ])
+        db.commit()
+
+        updated += len(batch)
+        last_id = batch[-1].id
+
+    if updated:
+        # Brand voice rankings changed - invalidate cached analysis summaries
+        bump_metrics_epoch(db)
+        db.commit()
+
+    return updated
+
+
+def get_metrics_epoch(db: Session) -> int:
+    """Get the counter that changes whenever stored engagement metrics change"""
+    epoch = db.query(AnalyzerState.metrics_epoch).filter(AnalyzerState.name == "historical").scalar()
+    return epoch or 0
+
+
+def bump_metrics_epoch(db: Session):
+    """Record that engagement metrics or scores changed (the caller commits)"""
+    state = db.query(AnalyzerState).filter(AnalyzerState.name == "historical").first()
+    if state is None:
+        state = AnalyzerState(name="historical", last_tweet_id=0, snapshot={}, metrics_epoch=0)
+        db.add(state)
+    state.metrics_epoch = (state.metrics_epoch or 0) + 1
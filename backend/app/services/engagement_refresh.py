@@ -0,0 +1,233 @@
+from typing import Any, Dict, List, Optional
+from sqlalchemy import insert, or_
+from sqlalchemy.orm import Session
+from app.models import EngagementSnapshot, HistoricalTweet, Tweet
+from app.services.twitter_client import TwitterClient
+from app.services.rate_limiter import RateLimited
+from app.services.engagement import compute_engagement_score, bump_metrics_epoch
+from app.config import get_settings
+from datetime import datetime, timedelta, timezone
+import logging
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+LOOKUP_BATCH_SIZE = 100  # Tweet IDs per lookup call (Twitter API maximum)
+MIN_VELOCITY_SPAN = timedelta(minutes=30)  # Shorter spans between snapshots are too noisy to rate
+
+# (max tweet age, refresh interval): engagement moves fastest right after
+# posting, so young tweets are refreshed often and older ones rarely. The
+# last tier runs to engagement_refresh_max_age_days.
+REFRESH_TIERS = [
+    (timedelta(days=1), timedelta(hours=1)),
+    (timedelta(days=7), timedelta(hours=6)),
+    (timedelta(days=30), timedelta(days=1)),
+    (None, timedelta(days=7))
+]
+
+
+class EngagementRefresher:
+    """
+    Refreshes engagement metrics for historical and posted tweets
+
+    Each run looks up at most engagement_refresh_max_lookups batches of 100
+    tweets, youngest due tweets first, writes the new metrics back with bulk
+    UPDATEs and appends one snapshot row per tweet for velocity.
+    """
+
+    def __init__(self, db: Session, twitter_client: TwitterClient):
+        self.db = db
+        self.twitter_client = twitter_client
+
+    def refresh(self, max_lookups: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Refresh the tweets that are due, stopping early if the lookup budget runs out
+
+        Args:
+            max_lookups: Lookup calls to spend (default: engagement_refresh_max_lookups)
+
+        Returns:
+            Counts of tweets looked up, updated and missing, plus whether the run was rate limited
+        """
+        max_lookups = settings.engagement_refresh_max_lookups if max_lookups is None else max_lookups
+        due = self.due_tweets(max_lookups * LOOKUP_BATCH_SIZE)
+
+        counts = {'looked_up': 0, 'updated': 0, 'missing': 0, 'rate_limited': False}
+        for start in range(0, len(due), LOOKUP_BATCH_SIZE):
+            batch = due[start:start + LOOKUP_BATCH_SIZE]
+            try:
+                metrics = self.twitter_client.fetch_tweet_metrics([item['twitter_id'] for item in batch])
+            except RateLimited as e:
+                # Whatever is left stays due for the next run
+                logger.warning(f"Engagement refresh stopped early: {e}")
+                counts['rate_limited'] = True
+                break
+
+            updated = self._apply(batch, metrics)
+            counts['looked_up'] += len(batch)
+            counts['updated'] += updated
+            counts['missing'] += len(batch) - updated
+
+        self.prune_snapshots()
+        return counts
+
+    def due_tweets(self, limit: int) -> List[Dict[str, Any]]:
+        """
+        Tweets whose metrics are due for a refresh, youngest first
+
+        Returns:
+            Up to limit dicts with source ('historical'/'tweet'), id, twitter_id and current metrics
+        """
+        now = datetime.now(timezone.utc)
+        max_age = timedelta(days=settings.engagement_refresh_max_age_days)
+
+        due = []
+        newer_than = timedelta(0)
+        for tier_age, interval in REFRESH_TIERS:
+            tier_age = min(tier_age or max_age, max_age)
+            if tier_age <= newer_than or len(due) >= limit:
+                break
+
+            window = (now - tier_age, now - newer_than)
+            stale_before = now - interval
+            tier = (
+                self._due_historical(window, stale_before, limit - len(due)) +
+                self._due_posted(window, stale_before, limit - len(due))
+            )
+            tier.sort(key=lambda item: item['posted'], reverse=True)
+            due.extend(tier[:limit - len(due)])
+            newer_than = tier_age
+
+        return due
+
+    def _due_historical(self, window, stale_before: datetime, limit: int) -> List[Dict[str, Any]]:
+        rows = self.db.query(
+            HistoricalTweet.id,
+            HistoricalTweet.tweet_id,
+            HistoricalTweet.posted_date,
+            HistoricalTweet.engagement_metrics
+        ).filter(
+            HistoricalTweet.posted_date >= window[0],
+            HistoricalTweet.posted_date < window[1],
+            or_(HistoricalTweet.metrics_refreshed_at.is_(None), HistoricalTweet.metrics_refreshed_at < stale_before)
+        ).order_by(HistoricalTweet.posted_date.desc()).limit(limit).all()
+
+        return [
+            {'source': 'historical', 'id': row.id, 'twitter_id': row.tweet_id, 'posted': row.posted_date, 'metrics': row.engagement_metrics}
+            for row in rows
+        ]
+
+    def _due_posted(self, window, stale_before: datetime, limit: int) -> List[Dict[str, Any]]:
+        rows = self.db.query(
+            Tweet.id,
+            Tweet.twitter_id,
+            Tweet.posted_time,
+            Tweet.engagement_metrics
+        ).filter(
+            Tweet.status == 'posted',
+            Tweet.twitter_id.isnot(None),
+            Tweet.posted_time >= window[0],
+            Tweet.posted_time < window[1],
+            or_(Tweet.metrics_refreshed_at.is_(None), Tweet.metrics_refreshed_at < stale_before)
+        ).order_by(Tweet.posted_time.desc()).limit(limit).all()
+
+        return [
+            {'source': 'tweet', 'id': row.id, 'twitter_id': row.twitter_id, 'posted': row.posted_time, 'metrics': row.engagement_metrics}
+            for row in rows
+        ]
+
+    def _apply(self, batch: List[Dict[str, Any]], metrics: Dict[str, Dict[str, int]]) -> int:
+        """Write one lookup's results with bulk UPDATEs and a multi-row snapshot INSERT"""
+        now = datetime.now(timezone.utc)
+        historical_updates = []
+        tweet_updates = []
+        snapshots = []
+        historical_changed = False
+
+        for item in batch:
+            current = metrics.get(item['twitter_id'])
+            # Deleted or protected tweets only get their refresh time bumped, so they go to the back of the line
+            update = {'id': item['id'], 'metrics_refreshed_at': now}
+            if current is not None:
+                update['engagement_metrics'] = current
+                snapshots.append({'twitter_id': item['twitter_id'], 'captured_at': now, **current})
+
+            if item['source'] == 'historical':
+                if current is not None:
+                    update['engagement_score'] = compute_engagement_score(current)
+                    historical_changed = historical_changed or current != item['metrics']
+                historical_updates.append(update)
+            else:
+                tweet_updates.append(update)
+
+        if historical_updates:
+            self.db.bulk_update_mappings(HistoricalTweet, historical_updates)
+        if tweet_updates:
+            self.db.bulk_update_mappings(Tweet, tweet_updates)
+        if snapshots:
+            self.db.execute(insert(EngagementSnapshot), snapshots)
+        if historical_changed:
+            # Brand voice rankings changed - invalidate cached analysis summaries
+            bump_metrics_epoch(self.db)
+        self.db.commit()
+
+        return len(snapshots)
+
+    def prune_snapshots(self) -> int:
+        """Delete snapshots older than engagement_snapshot_retention_days"""
+        cutoff = datetime.now(timezone.utc) - timedelta(days=settings.engagement_snapshot_retention_days)
+        deleted = self.db.query(EngagementSnapshot).filter(
+            EngagementSnapshot.captured_at < cutoff
+        ).delete(synchronize_session=False)
+        self.db.commit()
+        return deleted
+
+
+def get_engagement_velocity(db: Session, hours: int = 24, limit: int = 10) -> List[Dict[str, Any]]:
+    """
+    Tweets gaining engagement fastest, from the snapshots of the last hours
+
+    Velocity is the change in weighted engagement score per hour between a
+    tweet's first and last snapshot in the window. Tweets whose snapshots
+    span less than MIN_VELOCITY_SPAN are left out.
+
+    Returns:
+        Up to limit dicts ({twitter_id, content, velocity, likes_per_hour, retweets_per_hour}), fastest first
+    """
+    since = datetime.now(timezone.utc) - timedelta(hours=hours)
+    rows = db.query(EngagementSnapshot).filter(
+        EngagementSnapshot.captured_at >= since
+    ).order_by(EngagementSnapshot.twitter_id, EngagementSnapshot.captured_at).all()
+
+    spans = {}  # twitter_id -> [first, last]
+    for row in rows:
+        span = spans.setdefault(row.twitter_id, [row, row])
+        span[1] = row
+
+    velocities = []
+    for twitter_id, (first, last) in spans.items():
+        if last.captured_at - first.captured_at < MIN_VELOCITY_SPAN:
+            continue
+        elapsed_hours = (last.captured_at - first.captured_at).total_seconds() / 3600
+
+        score_delta = (
+            compute_engagement_score({'likes': last.likes, 'retweets': last.retweets}) -
+            compute_engagement_score({'likes': first.likes, 'retweets': first.retweets})
+        )
+        velocities.append({
+            'twitter_id': twitter_id,
+            'velocity': score_delta / elapsed_hours,
+            'likes_per_hour': (last.likes - first.likes) / elapsed_hours,
+            'retweets_per_hour': (last.retweets - first.retweets) / elapsed_hours
+        })
+
+    velocities.sort(key=lambda item: item['velocity'], reverse=True)
+    velocities = velocities[:limit]
+
+    twitter_ids = [item['twitter_id'] for item in velocities]
+    content = dict(db.query(HistoricalTweet.tweet_id, HistoricalTweet.content).filter(HistoricalTweet.tweet_id.in_(twitter_ids)).all())
+    content.update(db.query(Tweet.twitter_id, Tweet.content).filter(Tweet.twitter_id.in_(twitter_ids)).all())
+    for item in velocities:
+        item['content'] = content.get(item['twitter_id'], "")
+
+    return velocities
@@ -0,0 +1,143 @@
+from typing import Any, Dict, List, Optional
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models import HistoricalTweet, HistoricalTweetTopic, SyncCursor
+from app.services.twitter_client import TwitterClient
+from app.services.analyzer_store import AnalyzerStateStore
+from app.services.analysis_cache import get_analysis_cache
+from app.services.topic_tagger import get_topic_matcher
+from app.services.engagement import compute_engagement_score
+from app.services.dedup_index import NearDuplicateIndex
+from datetime import datetime, timezone
+
+
+class HistoricalSync:
+    """
+    Incremental, resumable sync of an account's timeline into historical_tweets
+
+    Each account has a cursor row: the newest tweet ID of the last completed
+    sync (since_id) plus the pagination state of a sync in progress. A sync
+    pages through everything newer than since_id, committing each page's
+    tweets together with the cursor, so an interrupted or capped sync picks
+    up at the next page. since_id only moves once every page is stored.
+    """
+
+    PAGE_SIZE = 100  # Twitter API maximum
+
+    def __init__(self, db: Session, twitter_client: TwitterClient):
+        self.db = db
+        self.twitter_client = twitter_client
+
+    def sync(self, username: str, max_tweets: Optional[int] = None) -> int:
+        """
+        Fetch and store an account's new tweets
+
+        Args:
+            username: Twitter username (without @)
+            max_tweets: Stop after fetching about this many tweets; the
+                next sync resumes where this one stopped
+
+        Returns:
+            Number of new tweets stored
+        """
+        cursor = self._get_or_create_cursor(username)
+        if not cursor.user_id:
+            cursor.user_id = self.twitter_client.get_user_id(username)
+            self.db.commit()
+
+        fetched = 0
+        stored = 0
+        while max_tweets is None or fetched < max_tweets:
+            page_size = self.PAGE_SIZE if max_tweets is None else min(self.PAGE_SIZE, max_tweets - fetched)
+            page = self.twitter_client.fetch_user_tweets_page(
+                cursor.user_id,
+                since_id=cursor.since_id,
+                pagination_token=cursor.next_token,
+                max_results=page_size
+            )
+            fetched += len(page['tweets'])
+            stored += self.store_tweets(page['tweets'])
+
+            if cursor.next_token is None:
+                # First page of this sync holds its newest tweet
+                cursor.pending_newest_id = page['newest_id']
+            cursor.next_token = page['next_token']
+
+            if cursor.next_token is None:
+                # Every page newer than since_id is stored
+                if cursor.pending_newest_id:
+                    cursor.since_id = cursor.pending_newest_id
+                cursor.pending_newest_id = None
+                cursor.last_synced_at = datetime.now(timezone.utc)
+
+            self.db.commit()
+            if cursor.next_token is None:
+                break
+
+        if stored:
+            # Fold the new tweets into the persisted analyzer state
+            AnalyzerStateStore(self.db).refresh()
+            get_analysis_cache().invalidate()
+
+        return stored
+
+    def store_tweets(self, tweets: List[Dict[str, Any]]) -> int:
+        """
+        Insert tweets we don't have yet with one multi-row INSERT ... ON CONFLICT DO NOTHING
+
+        New tweets are also topic-tagged and added to the near-duplicate
+        index. The caller commits.
+
+        Args:
+            tweets: Tweets as returned by TwitterClient
+
+        Returns:
+            Number of tweets inserted
+        """
+        matcher = get_topic_matcher()
+        rows = {}
+        for tweet_data in tweets:
+            rows[tweet_data['tweet_id']] = {
+                'tweet_id': tweet_data['tweet_id'],
+                'content': tweet_data['content'],
+                'posted_date': tweet_data['posted_date'],
+                'engagement_metrics': tweet_data['engagement_metrics'],
+                'engagement_score': compute_engagement_score(tweet_data['engagement_metrics']),
+                'topic_tags': matcher.match(tweet_data['content'])
+            }
+        if not rows:
+            return 0
+
+        dialect_insert = postgresql.insert if self.db.get_bind().dialect.name == 'postgresql' else sqlite.insert
+        inserted = self.db.execute(
+            dialect_insert(HistoricalTweet)
+            .values(list(rows.values()))
+            .on_conflict_do_nothing(index_elements=['tweet_id'])
+            .returning(HistoricalTweet.id, HistoricalTweet.tweet_id)
+        ).all()
+        if not inserted:
+            return 0
+
+        topic_rows = [
+            {'historical_tweet_id': historical_id, 'topic': topic}
+            for historical_id, tweet_id in inserted
+            for topic in rows[tweet_id]['topic_tags']
+        ]
+        if topic_rows:
+            self.db.execute(insert(HistoricalTweetTopic), topic_rows)
+
+        dedup_index = NearDuplicateIndex(self.db)
+        for historical_id, tweet_id in inserted:
+            dedup_index.add('historical', historical_id, rows[tweet_id]['content'])
+
+        return len(inserted)
+
+    def _get_or_create_cursor(self, username: str) -> SyncCursor:
+        account = username.lower()
+        cursor = self.db.query(SyncCursor).filter(SyncCursor.account == account).first()
+        if cursor is None:
+            cursor = SyncCursor(account=account)
+            self.db.add(cursor)
+            self.db.commit()
+        return cursor
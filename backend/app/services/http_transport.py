@@ -0,0 +1,272 @@
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+from app.config import get_settings
+from requests.adapters import HTTPAdapter
+import asyncio
+import httpx
+import threading
+import weakref
+
+settings = get_settings()
+
+# Upstreams served by the shared clients, with their base URLs
+UPSTREAMS = {
+    'anthropic': "https://api.anthropic.com",
+    'openai': "https://api.openai.com",
+    'twitter': "https://api.twitter.com"
+}
+
+T = TypeVar('T')
+
+# httpcore trace event fired when a request has to open a new TCP connection
+_NEW_CONNECTION_EVENT = "connection.connect_tcp.complete"
+
+
+def http2_available() -> bool:
+    """Whether HTTP/2 can be negotiated (needs the optional h2 package)"""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class ConnectionStats:
+    """Counts requests and newly opened connections for one upstream"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_new_connection(self):
+        with self._lock:
+            self.new_connections += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            requests = self.requests
+            new_connections = self.new_connections
+        reused = max(requests - new_connections, 0)
+        return {
+            'requests': requests,
+            'new_connections': new_connections,
+            'reused_connections': reused,
+            'reuse_rate': reused / requests if requests else 0.0
+        }
+
+
+class HTTPTransport:
+    """
+    Shared, tuned httpx clients - one per upstream
+
+    Sync clients are shared process-wide. Async clients are shared per
+    event loop, since an async connection pool is bound to the loop that
+    opened its connections, and so are the SDK clients built on them
+    (loop_client). Clients are created lazily under a lock, so concurrent
+    first use from worker threads still builds exactly one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: Dict[str, httpx.Client] = {}
+        self._async_clients = weakref.WeakKeyDictionary()  # Event loop -> {upstream: client}
+        self._loop_clients = weakref.WeakKeyDictionary()  # Event loop -> {name: SDK client}
+        self.stats = {upstream: ConnectionStats() for upstream in UPSTREAMS}
+        self.http2 = settings.http2_enabled and http2_available()
+
+    def _client_options(self, upstream: str) -> Dict[str, Any]:
+        if upstream not in UPSTREAMS:
+            raise ValueError(f"Unknown upstream '{upstream}' (expected one of {', '.join(UPSTREAMS)})")
+
+        read_timeout = settings.http_twitter_read_timeout_seconds if upstream == 'twitter' else settings.http_read_timeout_seconds
+        return {
+            'base_url': UPSTREAMS[upstream],
+            'http2': self.http2,
+            'limits': httpx.Limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive_connections,
+                keepalive_expiry=settings.http_keepalive_expiry_seconds
+            ),
+            'timeout': httpx.Timeout(
+                connect=settings.http_connect_timeout_seconds,
+                read=read_timeout,
+                write=settings.http_write_timeout_seconds,
+                pool=settings.http_pool_timeout_seconds
+            )
+        }
+
+    def client(self, upstream: str) -> httpx.Client:
+        """Shared sync client for an upstream"""
+        client = self._clients.get(upstream)
+        if client is not None:
+            return client
+
+        with self._lock:
+            if upstream not in self._clients:
+                stats = self.stats[upstream]
+                options = self._client_options(upstream)
+
+                def trace(event: str, info: Dict[str, Any]):
+                    if event == _NEW_CONNECTION_EVENT:
+                        stats.record_new_connection()
+
+                def on_request(request: httpx.Request):
+                    stats.record_request()
+                    request.extensions['trace'] = trace
+
+                self._clients[upstream] = httpx.Client(**options, event_hooks={'request': [on_request]})
+            return self._clients[upstream]
+
+    def async_client(self, upstream: str) -> httpx.AsyncClient:
+        """Shared async client for an upstream on the running event loop"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._async_clients.setdefault(loop, {})
+            if upstream not in clients:
+                stats = self.stats[upstream]
+                options = self._client_options(upstream)
+
+                async def trace(event: str, info: Dict[str, Any]):
+                    if event == _NEW_CONNECTION_EVENT:
+                        stats.record_new_connection()
+
+                async def on_request(request: httpx.Request):
+                    stats.record_request()
+                    request.extensions['trace'] = trace
+
+                clients[upstream] = httpx.AsyncClient(**options, event_hooks={'request': [on_request]})
+            return clients[upstream]
+
+    def loop_client(self, name: str, factory: Callable[[], T]) -> T:
+        """
+        Client built by factory, shared on the running event loop
+
+        For SDK clients wrapping an async client of this transport, so they
+        are closed together with it by aclose_loop_clients.
+
+        Args:
+            name: Cache key, e.g. 'anthropic'
+            factory: Builds the client; called without the lock held
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._loop_clients.get(loop, {}).get(name)
+        if client is not None:
+            return client
+
+        client = factory()
+        with self._lock:
+            return self._loop_clients.setdefault(loop, {}).setdefault(name, client)
+
+    async def aclose_loop_clients(self):
+        """Close the running event loop's SDK and async clients, for short-lived loops such as asyncio.run"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            sdk_clients = self._loop_clients.pop(loop, {})
+            clients = self._async_clients.pop(loop, {})
+        for sdk_client in sdk_clients.values():
+            await sdk_client.close()
+        for client in clients.values():
+            await client.aclose()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Connection reuse per upstream plus the pool configuration"""
+        return {
+            'http2': self.http2,
+            'max_connections': settings.http_max_connections,
+            'max_keepalive_connections': settings.http_max_keepalive_connections,
+            'upstreams': {upstream: stats.snapshot() for upstream, stats in self.stats.items()}
+        }
+
+    def close(self):
+        """Close the sync clients (async clients are dropped along with their event loop)"""
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients.clear()
+
+
+class PooledRequestsAdapter(HTTPAdapter):
+    """
+    requests adapter with the transport's pool size, timeouts and reuse stats
+
+    For SDKs that talk HTTP through requests rather than httpx (tweepy):
+    mount it on the SDK's session so it gets the same tuning.
+    """
+
+    def __init__(self, upstream: str):
+        self.upstream = upstream
+        super().__init__(
+            pool_connections=1,
+            pool_maxsize=settings.http_max_connections,
+            pool_block=True  # Wait for a free connection instead of opening throwaway ones
+        )
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        stats = get_http_transport().stats[self.upstream]
+
+        def counting(pool_class):
+            class CountingConnectionPool(pool_class):
+                def _new_conn(self):
+                    stats.record_new_connection()
+                    return super()._new_conn()
+            return CountingConnectionPool
+
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: counting(pool_class)
+            for scheme, pool_class in self.poolmanager.pool_classes_by_scheme.items()
+        }
+
+    def send(self, request, timeout=None, **kwargs):
+        if timeout is None:
+            read_timeout = settings.http_twitter_read_timeout_seconds if self.upstream == 'twitter' else settings.http_read_timeout_seconds
+            timeout = (settings.http_connect_timeout_seconds, read_timeout)
+
+        get_http_transport().stats[self.upstream].record_request()
+        return super().send(request, timeout=timeout, **kwargs)
+
+
+# Singleton instance
+_http_transport = None
+_http_transport_lock = threading.Lock()
+
+
+def get_http_transport() -> HTTPTransport:
+    """Get or create the shared HTTP transport"""
+    global _http_transport
+    if _http_transport is None:
+        with _http_transport_lock:
+            if _http_transport is None:
+                _http_transport = HTTPTransport()
+    return _http_transport
+
+
+def get_http_client(upstream: str) -> httpx.Client:
+    """Shared sync httpx client for 'anthropic', 'openai' or 'twitter'"""
+    return get_http_transport().client(upstream)
+
+
+def get_async_http_client(upstream: str) -> httpx.AsyncClient:
+    """Shared async httpx client for 'anthropic', 'openai' or 'twitter' on the running loop"""
+    return get_http_transport().async_client(upstream)
+
+
+def run_async(main: Awaitable[T]) -> T:
+    """
+    asyncio.run for sync callers (jobs, the scheduler thread)
+
+    Closes the loop's pooled and SDK clients before the loop goes away, so
+    short-lived loops don't leave their clients and sockets behind.
+    """
+    async def run() -> T:
+        try:
+            return await main
+        finally:
+            await get_http_transport().aclose_loop_clients()
+
+    return asyncio.run(run())
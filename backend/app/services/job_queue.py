@@ -0,0 +1,289 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from sqlalchemy import or_, update
+from sqlalchemy.orm import Session
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models import Job
+from datetime import datetime, timedelta, timezone
+import logging
+import os
+import socket
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# A job function receives its own session, a progress callback and the job params
+JobFunction = Callable[..., Dict[str, Any]]
+
+
+class JobCancelled(Exception):
+    """Raised from a progress report once the job has been asked to stop"""
+
+
+class JobProgress:
+    """Progress reporter handed to a running job"""
+
+    def __init__(self, db: Session, job: Job):
+        self.db = db
+        self.job = job
+
+    def __call__(self, **fields: Any):
+        """
+        Merge fields into the job's progress and commit so pollers see it
+
+        Raises:
+            JobCancelled: The job was cancelled; the job function should let it propagate
+        """
+        self.job.progress = {**(self.job.progress or {}), **fields}
+        self.job.heartbeat_at = datetime.now(timezone.utc)
+        self.db.commit()
+        # The commit expired the job, so this reads the current flag
+        if self.job.cancel_requested:
+            raise JobCancelled("Cancelled")
+
+
+class JobQueue:
+    """
+    Run jobs on a worker thread pool, off the API event loop
+
+    Job state lives in the jobs table so any API worker can report it.
+    Each job runs with its own database session. Background upkeep jobs
+    (e.g. candidate pool refills) run on their own workers, so a slow one
+    never delays a job a user is waiting on. Jobs are stamped with the
+    owning process ("<host>:<pid>:<token>") and a heartbeat the owner
+    refreshes every job_heartbeat_seconds, so recovery only touches jobs
+    whose process is gone.
+    """
+
+    def __init__(self, workers: int = 1, background_workers: int = 1, heartbeat_seconds: Optional[float] = None):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job-worker")
+        self._background_executor = ThreadPoolExecutor(max_workers=background_workers, thread_name_prefix="job-background")
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._heartbeat_seconds = heartbeat_seconds or get_settings().job_heartbeat_seconds
+        self._stopping = threading.Event()
+        self._heartbeat_thread = threading.Thread(target=self._heartbeat_loop, name="job-heartbeat", daemon=True)
+        self._heartbeat_thread.start()
+
+    def enqueue(self, db: Session, kind: str, func: JobFunction, background: bool = False, **params: Any) -> Job:
+        """
+        Record a job and hand it to a worker
+
+        Args:
+            db: Session used to create the job row
+            kind: Job type, e.g. 'generate_tweets'
+            func: Called as func(db, progress, **params); returns the job result
+            background: Run on the background workers (upkeep no request waits on)
+            params: JSON-serializable job parameters
+
+        Returns:
+            The queued Job
+        """
+        job = Job(
+            id=uuid.uuid4().hex,
+            kind=kind,
+            status="queued",
+            params=params,
+            progress={},
+            owner=self.owner,
+            heartbeat_at=datetime.now(timezone.utc)
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+
+        executor = self._background_executor if background else self._executor
+        executor.submit(self._run, job.id, func, params)
+        return job
+
+    def record(self, db: Session, kind: str, result: Dict[str, Any], progress: Optional[Dict[str, Any]] = None, **params: Any) -> Job:
+        """
+        Record a job that finished without needing a worker
+
+        For requests that were served completely inline, so clients can
+        still follow them through the job API.
+
+        Returns:
+            The succeeded Job
+        """
+        now = datetime.now(timezone.utc)
+        job = Job(
+            id=uuid.uuid4().hex,
+            kind=kind,
+            status="succeeded",
+            params=params,
+            progress=progress or {},
+            result=result,
+            started_at=now,
+            finished_at=now
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+
+    def _run(self, job_id: str, func: JobFunction, params: Dict[str, Any]):
+        db = SessionLocal()
+        try:
+            job = db.get(Job, job_id)
+            if job.cancel_requested:
+                job.status = "failed"
+                job.error = "Cancelled"
+                job.finished_at = datetime.now(timezone.utc)
+                db.commit()
+                return
+
+            job.status = "running"
+            job.started_at = job.heartbeat_at = datetime.now(timezone.utc)
+            db.commit()
+
+            try:
+                result = func(db, JobProgress(db, job), **params)
+            except JobCancelled as e:
+                logger.info(f"Job {job_id} ({job.kind}) cancelled")
+                db.rollback()
+                job.status = "failed"
+                job.error = str(e)
+            except Exception as e:
+                logger.exception(f"Job {job_id} ({job.kind}) failed")
+                db.rollback()
+                job.status = "failed"
+                job.error = str(e)
+            else:
+                job.status = "succeeded"
+                job.result = result
+
+            job.finished_at = datetime.now(timezone.utc)
+            db.commit()
+        finally:
+            db.close()
+
+    def cancel(self, db: Session, job_id: str) -> bool:
+        """
+        Ask a queued or running job to stop
+
+        A queued job is dropped when a worker picks it up; a running one
+        stops at its next progress report. Either way it ends up failed
+        with the error 'Cancelled'.
+
+        Returns:
+            True if the job was still queued or running
+        """
+        result = db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status.in_(["queued", "running"]))
+            .values(cancel_requested=True)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return result.rowcount > 0
+
+    def heartbeat(self, db: Session) -> int:
+        """
+        Mark this process's queued and running jobs alive
+
+        Returns:
+            Number of jobs touched
+        """
+        result = db.execute(
+            update(Job)
+            .where(Job.owner == self.owner, Job.status.in_(["queued", "running"]))
+            .values(heartbeat_at=datetime.now(timezone.utc))
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return result.rowcount
+
+    def recover(self, db: Session) -> int:
+        """
+        Fail queued or running jobs whose owning process is gone
+
+        A job is abandoned when its heartbeat is older than
+        job_heartbeat_timeout_seconds, or when it belongs to another process
+        on this host that is no longer running (a previous run of this
+        server, including one that had the same pid). Jobs of live peers are
+        left alone. Called on startup and from the heartbeat thread.
+
+        Returns:
+            Number of jobs marked failed
+        """
+        now = datetime.now(timezone.utc)
+        expired_before = now - timedelta(seconds=get_settings().job_heartbeat_timeout_seconds)
+        host = socket.gethostname()
+
+        active = db.query(Job).filter(
+            Job.status.in_(["queued", "running"]),
+            or_(Job.owner.is_(None), Job.owner != self.owner)
+        ).all()
+
+        interrupted = 0
+        for job in active:
+            last_seen = job.heartbeat_at or job.created_at
+            if last_seen is not None and last_seen.tzinfo is None:
+                last_seen = last_seen.replace(tzinfo=timezone.utc)
+            expired = last_seen is None or last_seen < expired_before
+            if not expired and not self._owner_gone(job.owner, host):
+                continue
+
+            job.status = "failed"
+            job.error = "Interrupted: the worker running it stopped"
+            job.finished_at = now
+            interrupted += 1
+        db.commit()
+        return interrupted
+
+    @staticmethod
+    def _owner_gone(owner: Optional[str], host: str) -> bool:
+        """Whether owner is a process on this host that isn't running any more"""
+        owner_host, _, rest = (owner or "").partition(":")
+        pid, _, _ = rest.partition(":")
+        if owner_host != host or not pid.isdigit():
+            # Another host's jobs are only failed once their heartbeat expires
+            return False
+        if int(pid) == os.getpid():
+            # Same pid but a different token: an earlier run of this process
+            return True
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            return False
+        return False
+
+    def _heartbeat_loop(self):
+        while not self._stopping.wait(self._heartbeat_seconds):
+            db = SessionLocal()
+            try:
+                self.heartbeat(db)
+                interrupted = self.recover(db)
+                if interrupted:
+                    logger.warning(f"Failed {interrupted} abandoned job(s)")
+            except Exception:
+                logger.exception("Job heartbeat failed")
+                db.rollback()
+            finally:
+                db.close()
+
+    def shutdown(self):
+        """Stop accepting jobs and wait for running ones to finish"""
+        self._executor.shutdown(wait=True)
+        self._background_executor.shutdown(wait=True)
+        self._stopping.set()
+
+
+# Singleton instance
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Get or create the background job queue"""
+    global _job_queue
+    if _job_queue is None:
+        with _job_queue_lock:
+            if _job_queue is None:
+                settings = get_settings()
+                _job_queue = JobQueue(workers=settings.job_workers, background_workers=settings.job_background_workers)
+    return _job_queue
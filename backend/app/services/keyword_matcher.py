@@ -0,0 +1,107 @@
+from typing import List, Dict, Iterable
+from collections import deque
+
+
+class KeywordMatcher:
+    """
+    Find which keywords occur in a text with a single linear scan
+
+    Builds an Aho-Corasick automaton over the (lowercased) keyword vocabulary,
+    so matching cost depends on the text length rather than on the number of
+    keywords.
+    """
+
+    def __init__(self, keywords: Iterable[str], whole_words: bool = False):
+        """
+        Args:
+            keywords: Keyword vocabulary
+            whole_words: Only match keywords bounded by non-word characters
+                (otherwise plain substring matches count, e.g. 'cycle' in 'cycles')
+        """
+        self.keywords: List[str] = []
+        self.whole_words = whole_words
+
+        # Trie transitions, failure links and keyword indexes ending at each state
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+
+        for keyword in keywords:
+            keyword = keyword.lower()
+            if keyword and keyword not in self.keywords:
+                self._add(keyword)
+
+        self._build_failure_links()
+
+    def _add(self, keyword: str):
+        index = len(self.keywords)
+        self.keywords.append(keyword)
+
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][char] = next_state
+            state = next_state
+
+        self._output[state].append(index)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                link = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = link if link != next_state else 0
+
+                # A state also matches everything its failure state matches
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def match(self, text: str) -> List[str]:
+        """
+        Find the keywords that occur in a text
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            Distinct matched keywords, in vocabulary order
+        """
+        text = text.lower()
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        found = set()
+
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            for index in output[state]:
+                if index in found:
+                    continue
+                if self.whole_words and not self._is_whole_word(text, position, len(self.keywords[index])):
+                    continue
+                found.add(index)
+
+        return [self.keywords[index] for index in sorted(found)]
+
+    @staticmethod
+    def _is_whole_word(text: str, end: int, length: int) -> bool:
+        """Check that the match ending at `end` is not part of a longer word"""
+        start = end - length + 1
+        before = text[start - 1] if start > 0 else ' '
+        after = text[end + 1] if end + 1 < len(text) else ' '
+        return not (before.isalnum() or before == '_' or after.isalnum() or after == '_')
@@ -0,0 +1,306 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+from app.config import get_settings
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Per-call cache controls
+CACHE_USE = "use"  # Serve a cached response if there is one, store new responses
+CACHE_REFRESH = "refresh"  # Always call the provider, then overwrite the cached response
+CACHE_BYPASS = "bypass"  # Always call the provider and leave the cache untouched
+CACHE_MODES = (CACHE_USE, CACHE_REFRESH, CACHE_BYPASS)
+
+
+def make_cache_key(
+    provider: str,
+    model: str,
+    prompt: str,
+    temperature: float,
+    max_tokens: Optional[int],
+    **extra: Any
+) -> str:
+    """
+    Content-addressed key for an LLM call
+
+    Args:
+        provider: 'claude' or 'chatgpt'
+        model: Model name
+        prompt: Full prompt text (including any system prompt)
+        temperature: Sampling temperature
+        max_tokens: Completion token limit
+        extra: Any other request parameters that change the response
+
+    Returns:
+        SHA-256 hex digest of the canonical request
+    """
+    request = {
+        'provider': provider,
+        'model': model,
+        'prompt': prompt,
+        'temperature': temperature,
+        'max_tokens': max_tokens,
+        **extra
+    }
+    canonical = json.dumps(request, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    """
+    Two-level cache of LLM responses keyed by make_cache_key
+
+    An in-memory LRU sits in front of an optional on-disk store (one JSON
+    file per key). Entries expire after a TTL; the disk store is kept under
+    a size limit by evicting the least recently used files.
+    """
+
+    def __init__(
+        self,
+        memory_entries: int = 256,
+        cache_dir: str = "",
+        max_disk_bytes: int = 100 * 1024 * 1024,
+        ttl_seconds: float = 7 * 24 * 3600
+    ):
+        self.memory_entries = memory_entries
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()  # key -> (expires_at, value)
+        self._disk_bytes: Optional[int] = None  # Computed on first write
+        self._stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'writes': 0,
+            'evictions': 0,
+            'bypassed': 0
+        }
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a cached response, or None if missing or expired"""
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self._stats['memory_hits'] += 1
+                    return entry[1]
+                del self._memory[key]
+
+        entry = self._read_disk(key, now)
+        with self._lock:
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            self._stats['disk_hits'] += 1
+            self._remember(key, *entry)
+        return entry[1]
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        """Store a response (ttl_seconds overrides the default TTL for this entry)"""
+        expires_at = time.time() + (ttl_seconds if ttl_seconds is not None else self.ttl_seconds)
+
+        with self._lock:
+            self._remember(key, expires_at, value)
+            self._stats['writes'] += 1
+
+        self._write_disk(key, expires_at, value)
+
+    def cached_call(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        cache: str = CACHE_USE,
+        ttl_seconds: Optional[float] = None
+    ) -> Any:
+        """
+        Serve a response from the cache, calling the provider on a miss
+
+        Args:
+            key: Key from make_cache_key
+            compute: Makes the provider call
+            cache: One of CACHE_MODES
+            ttl_seconds: Optional TTL override for a newly stored response
+
+        Returns:
+            Cached or freshly computed response
+        """
+        if cache not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode '{cache}' (expected one of {', '.join(CACHE_MODES)})")
+
+        if cache == CACHE_BYPASS:
+            with self._lock:
+                self._stats['bypassed'] += 1
+            return compute()
+
+        if cache == CACHE_USE:
+            cached = self.get(key)
+            if cached is not None:
+                return cached
+
+        value = compute()
+        self.set(key, value, ttl_seconds)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters plus current cache sizes"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._memory)
+            stats['disk_bytes'] = self._disk_bytes
+
+        lookups = stats['memory_hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['memory_hits'] + stats['disk_hits']) / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        """Drop every cached response (memory and disk)"""
+        with self._lock:
+            self._memory.clear()
+
+        if self.cache_dir and os.path.isdir(self.cache_dir):
+            for path, _, _ in self._disk_entries():
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            with self._lock:
+                self._disk_bytes = 0
+
+    def _remember(self, key: str, expires_at: float, value: Any):
+        # Caller holds the lock
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _read_disk(self, key: str, now: float) -> Optional[Tuple[float, Any]]:
+        if not self.cache_dir:
+            return None
+
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                cached = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        if cached['expires_at'] <= now:
+            self._remove_file(path)
+            return None
+
+        # Touch the file so size-based eviction sees it as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return cached['expires_at'], cached['value']
+
+    def _write_disk(self, key: str, expires_at: float, value: Any):
+        if not self.cache_dir:
+            return
+
+        path = self._path(key)
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+            # Write a private temp file then rename, so readers never see a partial
+            # file and concurrent writers (threads or worker processes) never share one
+            with tempfile.NamedTemporaryFile('w', dir=os.path.dirname(path), prefix=f"{key}.", suffix=".tmp", delete=False) as f:
+                tmp_path = f.name
+                json.dump({'expires_at': expires_at, 'value': value}, f)
+            os.replace(tmp_path, path)
+            size = os.path.getsize(path)
+        except (OSError, TypeError) as e:
+            logger.warning(f"Could not write LLM cache entry to {self.cache_dir}: {e}")
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+            return
+
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(entry_size for _, entry_size, _ in self._disk_entries())
+            else:
+                self._disk_bytes += size - previous_size
+            over_limit = self._disk_bytes > self.max_disk_bytes
+
+        if over_limit:
+            self._evict_disk()
+
+    def _disk_entries(self):
+        """(path, size, mtime) for every file in the disk store"""
+        entries = []
+        for directory, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict_disk(self):
+        """
+        Delete the least recently used files until under the size limit
+
+        Expired files are also deleted whenever they are read, and as they
+        stop being touched they are the first to go here.
+        """
+        entries = sorted(self._disk_entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        # Leave some headroom so every write doesn't trigger another scan
+        target = self.max_disk_bytes * 0.9
+
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            self._remove_file(path)
+            total -= size
+
+        with self._lock:
+            self._disk_bytes = total
+
+    def _remove_file(self, path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self._stats['evictions'] += 1
+
+
+# Singleton instance
+_llm_cache = None
+
+
+def get_llm_cache() -> LLMCache:
+    """Get or create the shared LLM response cache"""
+    global _llm_cache
+    if _llm_cache is None:
+        settings = get_settings()
+        _llm_cache = LLMCache(
+            memory_entries=settings.llm_cache_memory_entries,
+            cache_dir=settings.llm_cache_dir,
+            max_disk_bytes=settings.llm_cache_max_disk_mb * 1024 * 1024,
+            ttl_seconds=settings.llm_cache_ttl_seconds
+        )
+    return _llm_cache
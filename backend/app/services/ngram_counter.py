@@ -0,0 +1,202 @@
+from typing import List, Dict, Any, Iterable, Tuple, Optional
+from collections import Counter
+from operator import itemgetter
+import heapq
+import re
+
+# Everything that is not a word character or whitespace is stripped before tokenizing
+_STRIP_PATTERN = re.compile(r'[^\w\s]')
+
+# Bits reserved per word when packing an n-gram into a single integer key
+_ID_BITS = 32
+_ID_MASK = (1 << _ID_BITS) - 1
+
+
+class NGramCounter:
+    """
+    Count word n-grams in a single pass over each text
+
+    Words are interned into integer IDs once per tweet, and each n-gram is
+    packed into one integer key (one 32-bit slot per word, holding ID + 1).
+    Phrase strings are only built for the handful of n-grams returned by
+    most_common().
+    """
+
+    def __init__(
+        self,
+        min_words: int = 2,
+        max_words: int = 4,
+        stop_words: Iterable[str] = ()
+    ):
+        self.min_words = min_words
+        self.max_words = max_words
+        self.stop_words = frozenset(stop_words)
+
+        self.tokens: List[str] = []  # Token ID -> word
+        self.token_ids: Dict[str, int] = {}  # Word -> token ID
+        self.stop_ids = set()
+        self.counts = Counter()  # Packed n-gram key -> count
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def intern(self, word: str) -> int:
+        """Get the integer ID for a word, assigning a new one if needed"""
+        token_id = self.token_ids.get(word)
+        if token_id is None:
+            token_id = len(self.tokens)
+            self.tokens.append(word)
+            self.token_ids[word] = token_id
+            if word in self.stop_words:
+                self.stop_ids.add(token_id)
+        return token_id
+
+    def add(self, text: str):
+        """
+        Count every n-gram in a text
+
+        N-grams made up entirely of stop words are skipped.
+        """
+        token_ids = self.token_ids
+        intern = self.intern
+        ids = [
+            token_ids[word] if word in token_ids else intern(word)
+            for word in _STRIP_PATTERN.sub('', text.lower()).split()
+        ]
+
+        stop_ids = self.stop_ids
+        is_content = [token_id not in stop_ids for token_id in ids]
+
+        # Extend every window by one word per round: keys[i] and has_content[i]
+        # describe the n-gram starting at word i
+        keys = [token_id + 1 for token_id in ids]
+        has_content = is_content
+        counts = self.counts
+        for n in range(1, self.max_words + 1):
+            if n > 1:
+                keys = [
+                    (key << _ID_BITS) | (token_id + 1)
+                    for key, token_id in zip(keys, ids[n - 1:])
+                ]
+                has_content = [
+                    earlier or last
+                    for earlier, last in zip(has_content, is_content[n - 1:])
+                ]
+            if n >= self.min_words:
+                counts.update([key for key, keep in zip(keys, has_content) if keep])
+
+    def merge(self, other: 'NGramCounter'):
+        """
+        Add another counter's counts into this one
+
+        The other counter's token IDs are remapped onto this vocabulary.
+        Merging partial counters in corpus order gives exactly the same
+        counts, IDs and first-seen order as counting the corpus serially.
+        """
+        intern = self.intern
+        remap = [intern(word) + 1 for word in other.tokens]
+
+        counts = self.counts
+        for key, count in other.counts.items():
+            counts[self._repack(key, remap)] += count
+
+    def keys_in(self, other: 'NGramCounter') -> List[int]:
+        """
+        This counter's n-gram keys re-packed with another counter's token IDs
+
+        Every word must already be interned in other, e.g. after other.merge(self).
+        """
+        token_ids = other.token_ids
+        remap = [token_ids[word] + 1 for word in self.tokens]
+        return [self._repack(key, remap) for key in self.counts]
+
+    @staticmethod
+    def _repack(key: int, remap: List[int]) -> int:
+        repacked = 0
+        for token_id in NGramCounter.unpack(key):
+            repacked = (repacked << _ID_BITS) | remap[token_id]
+        return repacked
+
+    @staticmethod
+    def unpack(key: int) -> Tuple[int, ...]:
+        """Split a packed n-gram key back into its token IDs"""
+        ids = []
+        while key:
+            ids.append((key & _ID_MASK) - 1)
+            key >>= _ID_BITS
+        return tuple(reversed(ids))
+
+    @staticmethod
+    def key_length(key: int) -> int:
+        """Number of words in a packed n-gram key"""
+        return (key.bit_length() + _ID_BITS - 1) // _ID_BITS
+
+    def pack(self, phrase: str) -> int:
+        """Packed key of a phrase() string, interning any new words"""
+        key = 0
+        for word in phrase.split():
+            key = (key << _ID_BITS) | (self.intern(word) + 1)
+        return key
+
+    def phrase(self, key: int) -> str:
+        """Convert a packed n-gram key back into its phrase string"""
+        tokens = self.tokens
+        return ' '.join(tokens[token_id] for token_id in self.unpack(key))
+
+    def most_common(
+        self,
+        k: int,
+        min_count: int = 1,
+        min_words: Optional[int] = None,
+        max_words: Optional[int] = None
+    ) -> List[Tuple[str, int]]:
+        """
+        Get the top k phrases by count
+
+        Ties keep first-seen order, matching Counter.most_common().
+
+        Args:
+            k: Number of phrases to consider
+            min_count: Drop phrases among the top k seen fewer times than this
+            min_words: Only consider phrases with at least this many words
+            max_words: Only consider phrases with at most this many words
+
+        Returns:
+            List of (phrase, count) tuples
+        """
+        items = self.counts.items()
+        low = min_words if min_words is not None else self.min_words
+        high = max_words if max_words is not None else self.max_words
+        if low > self.min_words or high < self.max_words:
+            key_length = self.key_length
+            items = ((key, count) for key, count in items if low <= key_length(key) <= high)
+
+        top = heapq.nlargest(k, items, key=itemgetter(1))
+        return [(self.phrase(key), count) for key, count in top if count >= min_count]
+
+    def to_dict(self, include_counts: bool = True) -> Dict[str, Any]:
+        """
+        Serialize the counter to a JSON-compatible dict
+
+        Args:
+            include_counts: Leave the counts out (only the vocabulary and
+                settings are written) when the caller stores them elsewhere
+                by packed key
+        """
+        data = {
+            'min_words': self.min_words,
+            'max_words': self.max_words,
+            'tokens': self.tokens
+        }
+        if include_counts:
+            data['counts'] = [[key, count] for key, count in self.counts.items()]
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], stop_words: Iterable[str] = ()) -> 'NGramCounter':
+        """Restore a counter serialized with to_dict()"""
+        counter = cls(data['min_words'], data['max_words'], stop_words)
+        for word in data['tokens']:
+            counter.intern(word)
+        counter.counts = Counter({key: count for key, count in data.get('counts', [])})
+        return counter
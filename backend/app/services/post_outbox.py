@@ -0,0 +1,316 @@
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models import PostOutboxEntry, Tweet
+from app.services.twitter_client import get_twitter_client
+from app.services.async_twitter_client import get_async_twitter_client, tweet_status_updates
+from app.services.http_transport import run_async
+from app.services.rate_limiter import RateLimited
+from app.config import get_settings
+from datetime import datetime, timedelta, timezone
+import hashlib
+import html
+import logging
+import os
+import re
+import socket
+import uuid
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+OUTBOX_PENDING = "pending"
+OUTBOX_CLAIMED = "claimed"
+OUTBOX_SENT = "sent"
+OUTBOX_FAILED = "failed"
+
+_URL_PATTERN = re.compile(r"https?://\S+")
+
+
+def idempotency_key(tweet_id: int, content: str) -> str:
+    """Key for one post of one tweet's text; editing the text gives a new key"""
+    return hashlib.sha256(f"{tweet_id}\n{content}".encode("utf-8")).hexdigest()
+
+
+def _normalize_text(text: str) -> str:
+    # Twitter HTML-escapes &<> and rewrites links to t.co
+    text = _URL_PATTERN.sub("<url>", html.unescape(text))
+    return " ".join(text.split())
+
+
+class PostOutbox:
+    """
+    Posting through an outbox of claims, safe to run from several workers
+
+    Posting is split into steps so a crash can never make a tweet go out twice:
+
+    1. Due tweets get an outbox row (unique per tweet and idempotency key).
+    2. A worker claims pending rows in one compare-and-set UPDATE, taking a
+       lease. Only rows still pending are claimed, so concurrent workers
+       never claim the same row.
+    3. The claimed tweets are posted.
+    4. The worker confirms it still holds the claims, then marks the outbox
+       rows and tweets posted in the same transaction.
+
+    A claim whose lease runs out was left by a worker that died somewhere in
+    steps 3-4. Before it's released, the account's recent timeline is
+    checked for the text: if it's there the post went out and is recorded,
+    otherwise the row goes back to pending.
+    """
+
+    def __init__(self, db: Session, worker_id: Optional[str] = None):
+        self.db = db
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def enqueue(self, tweets: List[Tuple[int, str]]) -> int:
+        """
+        Add outbox rows for tweets about to be posted
+
+        Tweets that already have a row are left alone, except failed rows
+        and pending rows whose text is out of date (the tweet was edited
+        after a rate-limited attempt), which are re-armed with the current
+        text.
+
+        Args:
+            tweets: (tweet ID, text) pairs
+
+        Returns:
+            Number of rows added or re-armed
+        """
+        if not tweets:
+            return 0
+
+        rows = [
+            {'tweet_id': tweet_id, 'idempotency_key': idempotency_key(tweet_id, content), 'content': content, 'status': OUTBOX_PENDING}
+            for tweet_id, content in tweets
+        ]
+        dialect_insert = postgresql.insert if self.db.get_bind().dialect.name == 'postgresql' else sqlite.insert
+        added = self.db.execute(
+            dialect_insert(PostOutboxEntry).values(rows).on_conflict_do_nothing().returning(PostOutboxEntry.id)
+        ).all()
+
+        rearmed = 0
+        for row in rows:
+            rearmed += self.db.execute(
+                update(PostOutboxEntry).where(
+                    PostOutboxEntry.tweet_id == row['tweet_id'],
+                    (PostOutboxEntry.status == OUTBOX_FAILED) | (
+                        (PostOutboxEntry.status == OUTBOX_PENDING) &
+                        (PostOutboxEntry.idempotency_key != row['idempotency_key'])
+                    )
+                ).values(
+                    status=OUTBOX_PENDING,
+                    idempotency_key=row['idempotency_key'],
+                    content=row['content'],
+                    last_error=None
+                ).execution_options(synchronize_session=False)
+            ).rowcount
+
+        self.db.commit()
+        return len(added) + rearmed
+
+    def enqueue_due(self, now: Optional[datetime] = None, tweet_ids: Optional[List[int]] = None) -> int:
+        """Add outbox rows for every scheduled tweet that is due (or just those in tweet_ids)"""
+        now = now or datetime.now(timezone.utc)
+        query = self.db.query(Tweet.id, Tweet.content).outerjoin(
+            PostOutboxEntry, PostOutboxEntry.tweet_id == Tweet.id
+        ).filter(
+            Tweet.status == 'scheduled',
+            Tweet.scheduled_time <= now,
+            (PostOutboxEntry.id.is_(None)) | (PostOutboxEntry.status.in_([OUTBOX_FAILED, OUTBOX_PENDING]))
+        )
+        if tweet_ids is not None:
+            query = query.filter(Tweet.id.in_(tweet_ids))
+        return self.enqueue([(row.id, row.content) for row in query.all()])
+
+    def claim(self, limit: int, tweet_ids: Optional[List[int]] = None, scheduled_only: bool = True) -> List[Tuple[int, int, str]]:
+        """
+        Atomically claim pending rows for this worker
+
+        A row is only claimed while its text still matches the tweet's, so
+        an edit after a rate-limited attempt is never posted in its old form
+        (enqueue() refreshes the row).
+
+        Args:
+            limit: Maximum rows to claim
+            tweet_ids: Only claim rows for these tweets
+            scheduled_only: Only claim rows whose tweet is still scheduled and
+                due (False for posting a tweet on demand)
+
+        Returns:
+            (outbox ID, tweet ID, text) for each claimed row
+        """
+        now = datetime.now(timezone.utc)
+        current = select(Tweet.id).where(Tweet.id == PostOutboxEntry.tweet_id, Tweet.content == PostOutboxEntry.content)
+        if scheduled_only:
+            # Rows for tweets unscheduled or moved later since they were enqueued stay put
+            current = current.where(Tweet.status == 'scheduled', Tweet.scheduled_time <= datetime.now(timezone.utc))
+        candidates = select(PostOutboxEntry.id).where(PostOutboxEntry.status == OUTBOX_PENDING, current.exists())
+        if tweet_ids is not None:
+            candidates = candidates.where(PostOutboxEntry.tweet_id.in_(tweet_ids))
+        # Postgres: skip rows another worker is claiming right now (SQLite serializes writers)
+        candidates = candidates.order_by(PostOutboxEntry.id).limit(limit).with_for_update(skip_locked=True)
+
+        claimed = self.db.execute(
+            update(PostOutboxEntry).where(
+                PostOutboxEntry.id.in_(candidates.scalar_subquery()),
+                PostOutboxEntry.status == OUTBOX_PENDING  # Compare-and-set: still unclaimed
+            ).values(
+                status=OUTBOX_CLAIMED,
+                claimed_by=self.worker_id,
+                claimed_at=now,
+                lease_expires_at=now + timedelta(seconds=settings.post_outbox_lease_seconds),
+                attempts=PostOutboxEntry.attempts + 1
+            ).returning(
+                PostOutboxEntry.id, PostOutboxEntry.tweet_id, PostOutboxEntry.content
+            ).execution_options(synchronize_session=False)
+        ).all()
+        self.db.commit()
+        return [(row.id, row.tweet_id, row.content) for row in claimed]
+
+    def complete(self, claimed: List[Tuple[int, int, str]], outcomes: List[Dict[str, Any]]) -> int:
+        """
+        Record post outcomes for claimed rows in one transaction
+
+        Posted rows become sent (and their tweets posted), failed rows
+        failed, and rate-limited rows go back to pending. Unknown rows keep
+        their claim until the lease runs out and reconcile() checks the
+        timeline. Rows whose claim this worker no longer holds are skipped.
+
+        Args:
+            claimed: Rows returned by claim()
+            outcomes: post_many outcomes keyed by tweet ID
+
+        Returns:
+            Number of rows recorded
+        """
+        outbox_ids = {tweet_id: outbox_id for outbox_id, tweet_id, _ in claimed}
+
+        # Confirm and lock the claims we still hold before writing anything
+        owned = set(self.db.execute(
+            update(PostOutboxEntry).where(
+                PostOutboxEntry.id.in_(outbox_ids.values()),
+                PostOutboxEntry.status == OUTBOX_CLAIMED,
+                PostOutboxEntry.claimed_by == self.worker_id
+            ).values(
+                lease_expires_at=datetime.now(timezone.utc) + timedelta(seconds=settings.post_outbox_lease_seconds)
+            ).returning(PostOutboxEntry.id).execution_options(synchronize_session=False)
+        ).scalars())
+        outcomes = [outcome for outcome in outcomes if outbox_ids.get(outcome['id']) in owned]
+
+        outbox_updates = []
+        for outcome in outcomes:
+            if outcome['status'] == 'unknown':
+                continue
+            update_row = {'id': outbox_ids[outcome['id']], 'claimed_by': None, 'lease_expires_at': None}
+            if outcome['status'] == 'posted':
+                update_row.update(status=OUTBOX_SENT, twitter_id=outcome['twitter_id'])
+            elif outcome['status'] == 'failed':
+                update_row.update(status=OUTBOX_FAILED, last_error=outcome['error'])
+            else:
+                update_row.update(status=OUTBOX_PENDING)
+            outbox_updates.append(update_row)
+
+        if outbox_updates:
+            self.db.execute(update(PostOutboxEntry), outbox_updates)
+        tweet_updates = tweet_status_updates(outcomes, posted_time=datetime.now(timezone.utc))
+        if tweet_updates:
+            self.db.execute(update(Tweet), tweet_updates)
+        self.db.commit()
+        return len(outbox_updates)
+
+    def reconcile(self) -> Dict[str, int]:
+        """
+        Resolve claims whose lease ran out, by checking the timeline for their text
+
+        Returns:
+            {'recovered': found on the timeline and recorded as sent,
+             'released': back to pending, 'deferred': left for later (rate limited)}
+        """
+        now = datetime.now(timezone.utc)
+        expired = self.db.query(PostOutboxEntry.id, PostOutboxEntry.tweet_id, PostOutboxEntry.content).filter(
+            PostOutboxEntry.status == OUTBOX_CLAIMED,
+            PostOutboxEntry.lease_expires_at < now
+        ).all()
+        if not expired:
+            return {'recovered': 0, 'released': 0, 'deferred': 0}
+
+        try:
+            recent = get_twitter_client().fetch_own_recent_tweets()
+        except RateLimited as e:
+            # Releasing without checking could double-post; wait for the budget instead
+            logger.warning(f"Deferring outbox reconciliation: {e}")
+            return {'recovered': 0, 'released': 0, 'deferred': len(expired)}
+
+        posted = {_normalize_text(tweet['content']): tweet for tweet in recent}
+        counts = {'recovered': 0, 'released': 0, 'deferred': 0}
+        for entry_id, tweet_id, content in expired:
+            match = posted.get(_normalize_text(content))
+            values = {'status': OUTBOX_PENDING} if match is None else {'status': OUTBOX_SENT, 'twitter_id': match['tweet_id']}
+            # Compare-and-set, in case another worker is reconciling the same claim
+            resolved = self.db.execute(
+                update(PostOutboxEntry).where(
+                    PostOutboxEntry.id == entry_id,
+                    PostOutboxEntry.status == OUTBOX_CLAIMED,
+                    PostOutboxEntry.lease_expires_at < now
+                ).values(
+                    claimed_by=None,
+                    lease_expires_at=None,
+                    **values
+                ).execution_options(synchronize_session=False)
+            ).rowcount
+            if not resolved:
+                continue
+
+            if match is None:
+                counts['released'] += 1
+                continue
+            self.db.execute(
+                update(Tweet).where(Tweet.id == tweet_id).values(
+                    status='posted',
+                    twitter_id=match['tweet_id'],
+                    posted_time=match['posted_date'] or now
+                ).execution_options(synchronize_session=False)
+            )
+            counts['recovered'] += 1
+
+        self.db.commit()
+        if counts['recovered'] or counts['released']:
+            logger.info(f"Reconciled expired post claims: {counts['recovered']} already posted, {counts['released']} released")
+        return counts
+
+    def drain(self, tweet_ids: Optional[List[int]] = None) -> Dict[str, Any]:
+        """
+        Post every due scheduled tweet, a claimed batch at a time
+
+        Args:
+            tweet_ids: Only post these tweets (if due)
+
+        Returns:
+            Counts of posted, failed, unknown and rate-limited tweets, plus
+            'retry_at' (the budget's reset time) if posting stopped on the rate limit
+        """
+        self.reconcile()
+        self.enqueue_due(tweet_ids=tweet_ids)
+
+        counts = {'posted': 0, 'failed': 0, 'unknown': 0, 'rate_limited': 0, 'errors': [], 'retry_at': None}
+        while True:
+            claimed = self.claim(settings.post_outbox_claim_batch, tweet_ids=tweet_ids)
+            if not claimed:
+                break
+
+            outcomes = run_async(get_async_twitter_client().post_many([(tweet_id, content) for _, tweet_id, content in claimed]))
+            self.complete(claimed, outcomes)
+
+            for outcome in outcomes:
+                counts[outcome['status']] += 1
+                if outcome['status'] in ('failed', 'unknown'):
+                    counts['errors'].append(f"Tweet {outcome['id']}: {outcome['error']}")
+                elif outcome['status'] == 'rate_limited':
+                    counts['retry_at'] = max(counts['retry_at'] or outcome['retry_at'], outcome['retry_at'])
+            if counts['retry_at'] is not None:
+                break
+
+        return counts
+
@@ -0,0 +1,121 @@
+from typing import Any, Dict, List, Optional
+from app.config import get_settings
+import math
+import re
+
+# Word runs and individual punctuation marks, roughly how BPE tokenizers split text
+_PIECE_PATTERN = re.compile(r'\w+|[^\w\s]')
+
+# Tokens for list numbering, quotes and the newline around each generated tweet
+_TWEET_FORMAT_TOKENS = 6
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the token count of a text without calling a provider tokenizer
+
+    Each word costs one token per six characters (common English words are
+    a single token; long or rare ones split), and each punctuation mark
+    costs one token. This tracks the Claude and GPT tokenizers closely
+    enough to budget English prompts.
+    """
+    return sum(max(1, math.ceil(len(piece) / 6)) for piece in _PIECE_PATTERN.findall(text))
+
+
+def _normalize(text: str) -> str:
+    return ' '.join(text.lower().split())
+
+
+def _dedupe(items: List[Any], key) -> List[Any]:
+    seen = set()
+    unique = []
+    for item in items:
+        item_key = key(item)
+        if item_key and item_key not in seen:
+            seen.add(item_key)
+            unique.append(item)
+    return unique
+
+
+def fit_prompt_context(
+    brand_voice_examples: List[str],
+    topics: List[str],
+    common_phrases: List[str],
+    edit_examples: Optional[List[dict]] = None,
+    budget_tokens: Optional[int] = None
+) -> Dict[str, List[Any]]:
+    """
+    Dedupe and trim the context sections of a generation prompt to a token budget
+
+    Every section is expected best-first (brand voice by engagement, edits
+    newest first), so trimming drops items from the end of whichever
+    section currently costs the most. At least one brand voice example is
+    always kept.
+
+    Args:
+        brand_voice_examples: Example tweets showing brand voice
+        topics: Common topics to focus on
+        common_phrases: Common phrases used in past tweets
+        edit_examples: Recent user edits ({original, improved})
+        budget_tokens: Token budget for all sections (defaults to
+            PROMPT_CONTEXT_TOKEN_BUDGET)
+
+    Returns:
+        {'brand_voice_examples', 'topics', 'common_phrases', 'edit_examples'}
+    """
+    if budget_tokens is None:
+        budget_tokens = get_settings().prompt_context_token_budget
+
+    sections = {
+        'brand_voice_examples': _dedupe(brand_voice_examples, _normalize),
+        'topics': _dedupe(topics, _normalize),
+        'common_phrases': _dedupe(common_phrases, _normalize),
+        # An edit that didn't change anything teaches nothing
+        'edit_examples': _dedupe(
+            [e for e in edit_examples or [] if _normalize(e['original']) != _normalize(e['improved'])],
+            lambda e: (_normalize(e['original']), _normalize(e['improved']))
+        )
+    }
+    minimums = {'brand_voice_examples': 1, 'topics': 0, 'common_phrases': 0, 'edit_examples': 0}
+
+    def item_tokens(section: str, item: Any) -> int:
+        if section == 'edit_examples':
+            # Each edit pair is rendered with labels and quotes around both texts
+            return estimate_tokens(item['original']) + estimate_tokens(item['improved']) + 16
+        return estimate_tokens(item) + 3
+
+    costs = {
+        section: [item_tokens(section, item) for item in items]
+        for section, items in sections.items()
+    }
+    total = sum(sum(section_costs) for section_costs in costs.values())
+
+    while total > budget_tokens:
+        trimmable = [
+            section for section in sections
+            if len(sections[section]) > minimums[section]
+        ]
+        if not trimmable:
+            break
+        section = max(trimmable, key=lambda name: sum(costs[name]))
+        sections[section].pop()
+        total -= costs[section].pop()
+
+    return sections
+
+
+def max_tokens_for_tweets(count: int, ceiling: int) -> int:
+    """
+    Size a generation call's max_tokens from the number of tweets requested
+
+    Args:
+        count: Number of tweets requested
+        ceiling: Provider-specific upper limit
+
+    Returns:
+        count x (expected tweet length + list formatting), plus headroom
+    """
+    settings = get_settings()
+    per_tweet = math.ceil(settings.prompt_expected_tweet_chars / 4) + _TWEET_FORMAT_TOKENS
+    budget = math.ceil(count * per_tweet * settings.prompt_max_tokens_headroom)
+    return max(min(budget, ceiling), per_tweet)
@@ -0,0 +1,266 @@
+from collections import deque
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from app.config import get_settings
+from app.services.claude_client import get_claude_client
+from app.services.chatgpt_client import get_chatgpt_client
+import asyncio
+import threading
+import time
+
+settings = get_settings()
+
+
+class ProviderStats:
+    """
+    Rolling latency/error stats and a circuit breaker for one provider
+
+    Latency is time to the first streamed tweet, which is what a hedge is
+    waiting on. A request cancelled before its first tweet (usually the
+    loser of a hedge race) still contributes a censored sample: the time
+    it had been waiting, a lower bound on its real latency. Dropping those
+    would leave only the fast requests and pull the hedge delay down. The
+    circuit opens after CIRCUIT_FAILURE_THRESHOLD
+    consecutive failures; after the cooldown one trial request is let
+    through (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, window: int = 50, failure_threshold: int = 3, cooldown_seconds: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)  # (seconds, censored)
+        self._outcomes = deque(maxlen=window)  # True for success
+        self._consecutive_failures = 0
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    def allow_request(self) -> bool:
+        """Whether a request may be sent (claims the half-open trial slot if needed)"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown_seconds:
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self, latency: Optional[float]):
+        with self._lock:
+            if latency is not None:
+                self._latencies.append((latency, False))
+            self._outcomes.append(True)
+            self._consecutive_failures = 0
+            self._state = self.CLOSED
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._outcomes.append(False)
+            self._consecutive_failures += 1
+            if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def record_abandoned(self, latency: Optional[float], censored: bool = False):
+        """
+        A request was cancelled (e.g. it lost a hedge race) - no outcome to record
+
+        Args:
+            latency: Time to its first tweet, or if censored the time it
+                had waited without one (the real latency is at least this)
+            censored: No tweet had arrived before the cancellation
+        """
+        with self._lock:
+            if latency is not None:
+                self._latencies.append((latency, censored))
+            self._trial_in_flight = False
+
+    def latency_percentile(self, percentile: float) -> Optional[float]:
+        with self._lock:
+            latencies = sorted(latency for latency, _ in self._latencies)
+        if not latencies:
+            return None
+        index = min(int(len(latencies) * percentile), len(latencies) - 1)
+        return latencies[index]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current state for monitoring"""
+        with self._lock:
+            outcomes = list(self._outcomes)
+            state = self._state
+            samples = len(self._latencies)
+            censored = sum(1 for _, is_censored in self._latencies if is_censored)
+        return {
+            'state': state,
+            'requests': len(outcomes),
+            'error_rate': outcomes.count(False) / len(outcomes) if outcomes else 0.0,
+            'latency_samples': samples,
+            'censored_samples': censored,
+            'p50_seconds': self.latency_percentile(0.5),
+            'p95_seconds': self.latency_percentile(0.95)
+        }
+
+
+class ProviderRouter:
+    """
+    Route streaming tweet generation across Claude and ChatGPT
+
+    Each request goes to its preferred provider. If no tweet has arrived
+    within that provider's hedge delay (its p95 time to first tweet), or it
+    fails first, the same request is sent to the other provider; whichever
+    produces a tweet first wins and the other request is cancelled.
+    Providers with an open circuit are skipped.
+    """
+
+    def __init__(self, clients: Dict[str, Any]):
+        self.clients = clients
+        self.stats = {
+            source: ProviderStats(
+                window=settings.provider_stats_window,
+                failure_threshold=settings.provider_circuit_failure_threshold,
+                cooldown_seconds=settings.provider_circuit_cooldown_seconds
+            )
+            for source in clients
+        }
+
+    def hedge_delay(self, source: str) -> float:
+        """Seconds to wait for a provider's first tweet before hedging"""
+        stats = self.stats[source]
+        if stats.snapshot()['latency_samples'] < settings.provider_hedge_min_samples:
+            return settings.provider_hedge_default_delay_seconds
+        return max(stats.latency_percentile(0.95), settings.provider_hedge_min_delay_seconds)
+
+    async def astream_tweets(self, preferred: str, count: int, **context) -> AsyncIterator[Tuple[str, str]]:
+        """
+        Stream generated tweets, hedging across providers
+
+        Args:
+            preferred: Provider to try first ('claude' or 'chatgpt')
+            count: Number of tweets to generate
+            context: Prompt arguments passed through to astream_tweets
+
+        Yields:
+            (provider that produced the tweet, tweet text)
+        """
+        candidates = [preferred] + [source for source in self.clients if source != preferred]
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        tasks: Dict[str, asyncio.Task] = {}
+        skipped: List[str] = []
+        last_error: Optional[BaseException] = None
+
+        def launch_next() -> bool:
+            while len(tasks) + len(skipped) < len(candidates):
+                source = candidates[len(tasks) + len(skipped)]
+                if self.stats[source].allow_request():
+                    tasks[source] = asyncio.create_task(self._pump(source, count, context, queue))
+                    return True
+                skipped.append(source)
+            return False
+
+        if not launch_next():
+            raise RuntimeError(f"All providers are unavailable (circuit open: {', '.join(skipped)})")
+
+        hedge_at = loop.time() + self.hedge_delay(next(iter(tasks)))
+        winner = None
+        failed = set()
+
+        try:
+            while True:
+                can_hedge = winner is None and len(tasks) + len(skipped) < len(candidates)
+                try:
+                    kind, source, payload = await asyncio.wait_for(
+                        queue.get(), max(hedge_at - loop.time(), 0) if can_hedge else None
+                    )
+                except asyncio.TimeoutError:
+                    launch_next()
+                    continue
+
+                if winner is not None and source != winner:
+                    continue
+
+                if kind == 'tweet':
+                    if winner is None:
+                        winner = source
+                        for other, task in tasks.items():
+                            if other != source:
+                                task.cancel()
+                    yield source, payload
+
+                elif kind == 'done':
+                    if winner is None and len(failed) + 1 < len(tasks):
+                        # Finished without a tweet while a hedge is still running
+                        failed.add(source)
+                        continue
+                    return
+
+                else:
+                    if winner == source:
+                        raise payload
+                    failed.add(source)
+                    last_error = payload
+                    # Hedge immediately instead of waiting out the delay
+                    if launch_next():
+                        continue
+                    if len(failed) == len(tasks):
+                        raise last_error
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+    async def _pump(self, source: str, count: int, context: Dict[str, Any], queue: asyncio.Queue):
+        """Run one provider stream, forwarding its tweets and outcome to the queue"""
+        stats = self.stats[source]
+        started = time.monotonic()
+        first_latency = None
+
+        try:
+            async for tweet_text in self.clients[source].astream_tweets(count=count, **context):
+                if first_latency is None:
+                    first_latency = time.monotonic() - started
+                queue.put_nowait(('tweet', source, tweet_text))
+        except asyncio.CancelledError:
+            if first_latency is None:
+                stats.record_abandoned(time.monotonic() - started, censored=True)
+            else:
+                stats.record_abandoned(first_latency)
+            raise
+        except Exception as e:
+            stats.record_failure()
+            queue.put_nowait(('error', source, e))
+            return
+
+        stats.record_success(first_latency)
+        queue.put_nowait(('done', source, None))
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Per-provider stats, circuit state and current hedge delay"""
+        return {
+            source: {**stats.snapshot(), 'hedge_delay_seconds': self.hedge_delay(source)}
+            for source, stats in self.stats.items()
+        }
+
+
+# Singleton instance
+_provider_router = None
+
+
+def get_provider_router() -> ProviderRouter:
+    """Get or create the provider router"""
+    global _provider_router
+    if _provider_router is None:
+        _provider_router = ProviderRouter({
+            'claude': get_claude_client(),
+            'chatgpt': get_chatgpt_client()
+        })
+    return _provider_router
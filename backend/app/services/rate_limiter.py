@@ -0,0 +1,169 @@
+from typing import Dict, Mapping, Optional, Tuple
+from datetime import datetime, timezone
+import re
+import threading
+import time
+
+# Starting budgets (requests, window seconds) per endpoint until the API's
+# x-rate-limit-* headers report the real numbers for our access tier
+DEFAULT_LIMITS: Dict[str, Tuple[int, float]] = {
+    'post': (100, 15 * 60),  # POST /2/tweets
+    'delete': (50, 15 * 60),  # DELETE /2/tweets/:id
+    'user_lookup': (100, 24 * 3600),  # GET /2/users/by/username/:username
+    'timeline': (10, 15 * 60),  # GET /2/users/:id/tweets
+    'tweet_lookup': (15, 15 * 60),  # GET /2/tweets
+    'other': (15, 15 * 60)
+}
+
+_ENDPOINT_ROUTES = [
+    ('POST', re.compile(r'^/2/tweets$'), 'post'),
+    ('DELETE', re.compile(r'^/2/tweets/[^/]+$'), 'delete'),
+    ('GET', re.compile(r'^/2/users/by/username/[^/]+$'), 'user_lookup'),
+    ('GET', re.compile(r'^/2/users/[^/]+/tweets$'), 'timeline'),
+    ('GET', re.compile(r'^/2/tweets$'), 'tweet_lookup')
+]
+
+
+def endpoint_for(method: str, route: str) -> str:
+    """Rate limit bucket for a Twitter API v2 request"""
+    for route_method, pattern, endpoint in _ENDPOINT_ROUTES:
+        if method == route_method and pattern.match(route):
+            return endpoint
+    return 'other'
+
+
+class RateLimited(Exception):
+    """A call was refused locally (or with a 429) because the endpoint's budget is spent"""
+
+    def __init__(self, endpoint: str, retry_at: datetime):
+        self.endpoint = endpoint
+        self.retry_at = retry_at
+        super().__init__(f"Twitter rate limit for '{endpoint}' exhausted; retry at {retry_at.isoformat()}")
+
+    @property
+    def retry_after_seconds(self) -> float:
+        return max((self.retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class TokenBucket:
+    """
+    Request budget for one endpoint
+
+    Twitter refills a whole window at once at its reset time, so the bucket
+    does the same. Whenever a response carries x-rate-limit-* headers they
+    replace the local estimate.
+    """
+
+    def __init__(self, capacity: int, window_seconds: float):
+        self.capacity = capacity
+        self.window_seconds = window_seconds
+        self.tokens = float(capacity)
+        self.reset_at = time.time() + window_seconds
+
+    def _refill(self, now: float):
+        if now >= self.reset_at:
+            self.tokens = float(self.capacity)
+            self.reset_at = now + self.window_seconds
+
+    def try_acquire(self, now: float) -> Optional[float]:
+        """Take a token; returns None on success or the epoch time to retry at"""
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return None
+        return self.reset_at
+
+    def update(self, limit: Optional[int], remaining: Optional[int], reset: Optional[float]):
+        if limit is not None:
+            self.capacity = limit
+        if remaining is not None:
+            self.tokens = float(remaining)
+        if reset is not None:
+            self.reset_at = reset
+
+
+class RateLimiter:
+    """Per-endpoint token buckets shared by every caller in the process"""
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[int, float]]] = None):
+        self._lock = threading.Lock()
+        self._limits = limits or DEFAULT_LIMITS
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def _bucket(self, endpoint: str) -> TokenBucket:
+        # Caller holds the lock
+        bucket = self._buckets.get(endpoint)
+        if bucket is None:
+            capacity, window = self._limits.get(endpoint, self._limits['other'])
+            bucket = self._buckets[endpoint] = TokenBucket(capacity, window)
+        return bucket
+
+    def acquire(self, endpoint: str):
+        """
+        Spend one request from an endpoint's budget without waiting
+
+        Raises:
+            RateLimited: The budget is spent; carries the time it refills
+        """
+        with self._lock:
+            retry_at = self._bucket(endpoint).try_acquire(time.time())
+        if retry_at is not None:
+            raise RateLimited(endpoint, datetime.fromtimestamp(retry_at, timezone.utc))
+
+    def update_from_headers(self, endpoint: str, headers: Mapping[str, str]):
+        """Sync an endpoint's bucket with the API's x-rate-limit-* response headers"""
+        def header(name: str) -> Optional[int]:
+            value = headers.get(name)
+            try:
+                return int(value) if value is not None else None
+            except ValueError:
+                return None
+
+        limit = header('x-rate-limit-limit')
+        remaining = header('x-rate-limit-remaining')
+        reset = header('x-rate-limit-reset')
+        if limit is None and remaining is None and reset is None:
+            return
+
+        with self._lock:
+            self._bucket(endpoint).update(limit, remaining, reset)
+
+    def exhausted(self, endpoint: str) -> RateLimited:
+        """Mark an endpoint as spent after a 429 and return the error to raise"""
+        now = time.time()
+        with self._lock:
+            bucket = self._bucket(endpoint)
+            bucket.tokens = 0
+            if bucket.reset_at <= now:
+                # No usable reset header; wait out a full window
+                bucket.reset_at = now + bucket.window_seconds
+            retry_at = bucket.reset_at
+        return RateLimited(endpoint, datetime.fromtimestamp(retry_at, timezone.utc))
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Remaining budget and reset time per endpoint"""
+        now = time.time()
+        with self._lock:
+            return {
+                endpoint: {
+                    'remaining': int(bucket.tokens) if now < bucket.reset_at else bucket.capacity,
+                    'limit': bucket.capacity,
+                    'reset_in_seconds': max(bucket.reset_at - now, 0.0)
+                }
+                for endpoint, bucket in self._buckets.items()
+            }
+
+
+# Singleton instance
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get or create the Twitter API rate limiter"""
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = RateLimiter()
+    return _rate_limiter
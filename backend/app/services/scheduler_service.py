@@ -1,10 +1,21 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from apscheduler.triggers.date import DateTrigger
+from apscheduler.events import EVENT_JOB_MISSED
 from sqlalchemy.orm import Session
 from app.database import SessionLocal
+from app.models import Tweet
 from app.services.content_generator import ContentGenerator
+from app.services.batch_generation import submit_daily_batches, poll_generation_batches
+from app.services.candidate_pool import request_pool_refill
+from app.services.rate_limiter import RateLimited
+from app.services.engagement_refresh import EngagementRefresher
+from app.services.twitter_client import get_twitter_client
+from app.services.post_outbox import PostOutbox
 from app.config import get_settings
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
 from zoneinfo import ZoneInfo
 import logging
 
@@ -14,6 +25,8 @@ settings = get_settings()
 # Configure timezone to Central Time (USA)
 CENTRAL_TZ = ZoneInfo("America/Chicago")
 
+POST_JOB_PREFIX = "post_tweet_"  # Posting trigger job ids: post_tweet_<tweet id>
+
 
 class SchedulerService:
     """Service for scheduling automated tasks"""
@@ -40,15 +53,42 @@ class SchedulerService:
             replace_existing=True
         )
 
-        # Schedule tweet posting (check every hour for scheduled tweets, in Central Time)
+        # One precise trigger per scheduled tweet; no polling for due tweets
+        self.scheduler.add_listener(self._on_job_missed, EVENT_JOB_MISSED)
+        self.rebuild_post_jobs()
+
+        # Claims orphaned by the previous process become reconcilable once their
+        # lease runs out; anything they release is posted then
+        self._schedule_outbox_recovery()
+
+        # Keep the candidate pool stocked so Generate can serve instantly
         self.scheduler.add_job(
-            self.post_scheduled_tweets,
-            trigger=CronTrigger(minute=0, timezone=CENTRAL_TZ),  # Every hour at minute 0
-            id='post_scheduled_tweets',
-            name='Post scheduled tweets',
+            self.refill_candidate_pool,
+            trigger=IntervalTrigger(minutes=settings.candidate_pool_check_minutes, timezone=CENTRAL_TZ),
+            id='refill_candidate_pool',
+            name='Refill candidate tweet pool',
             replace_existing=True
         )
 
+        # Keep engagement metrics current, youngest tweets first
+        self.scheduler.add_job(
+            self.refresh_engagement_metrics,
+            trigger=IntervalTrigger(minutes=settings.engagement_refresh_interval_minutes, timezone=CENTRAL_TZ),
+            id='refresh_engagement_metrics',
+            name='Refresh engagement metrics',
+            replace_existing=True
+        )
+
+        # Collect results of jobs running in batch mode
+        if settings.batch_generation_jobs:
+            self.scheduler.add_job(
+                self.poll_generation_batches,
+                trigger=IntervalTrigger(minutes=settings.batch_poll_interval_minutes, timezone=CENTRAL_TZ),
+                id='poll_generation_batches',
+                name='Ingest finished generation batches',
+                replace_existing=True
+            )
+
         self.scheduler.start()
         self.running = True
         logger.info("Scheduler started successfully")
@@ -73,57 +113,240 @@ class SchedulerService:
             try:
                 stored = generator.fetch_and_store_historical_tweets(count=50)
                 logger.info(f"Fetched and stored {stored} new historical tweets")
+            except RateLimited as e:
+                # Generate from what we have; sync again once the budget refills
+                self._retry_at(e, self.sync_historical_tweets, 'retry_sync_historical_tweets', 'Retry historical tweet sync')
             except Exception as e:
                 logger.error(f"Error fetching historical tweets: {e}")
 
+            if 'daily_content_generation' in settings.batch_generation_jobs:
+                # No one is waiting on the nightly run, so use the cheaper batch APIs
+                batches = submit_daily_batches(db, count=settings.tweets_per_day)
+                logger.info(f"Submitted {len(batches)} generation batches; results are ingested as they finish")
+                return
+
             # Generate new tweet ideas
             results = generator.generate_daily_tweets(count=settings.tweets_per_day)
             logger.info(f"Generated {results['total']} tweets: {results['claude']} from Claude, {results['chatgpt']} from ChatGPT")
+            if results['duplicates_dropped']:
+                logger.info(f"Dropped {results['duplicates_dropped']} near-duplicate tweets")
 
         except Exception as e:
             logger.error(f"Error in daily content generation: {e}")
         finally:
             db.close()
 
-    def post_scheduled_tweets(self):
-        """Post tweets that are scheduled for this hour"""
-        logger.info("Checking for scheduled tweets to post")
+    def poll_generation_batches(self):
+        """Ingest tweets and captions from finished provider batches"""
         db = SessionLocal()
         try:
-            from app.models import Tweet
+            counts = poll_generation_batches(db)
+            if counts['ingested'] or counts['failed']:
+                logger.info(f"Generation batches: {counts['ingested']} ingested, {counts['failed']} failed, {counts['pending']} pending")
 
-            # Get current hour window in Central Time
-            now = datetime.now(CENTRAL_TZ)
-            hour_start = now.replace(minute=0, second=0, microsecond=0)
-            hour_end = hour_start + timedelta(hours=1)
+        except Exception as e:
+            logger.error(f"Error polling generation batches: {e}")
+        finally:
+            db.close()
+
+    def refill_candidate_pool(self):
+        """Queue a candidate pool refill if the pool is below its low-water mark"""
+        db = SessionLocal()
+        try:
+            job = request_pool_refill(db)
+            if job is not None:
+                logger.info(f"Queued candidate pool refill (job {job.id})")
+
+        except Exception as e:
+            logger.error(f"Error checking candidate pool: {e}")
+        finally:
+            db.close()
+
+    def refresh_engagement_metrics(self):
+        """Look up fresh engagement metrics for the tweets that are due"""
+        db = SessionLocal()
+        try:
+            counts = EngagementRefresher(db, get_twitter_client()).refresh()
+            logger.info(f"Refreshed engagement for {counts['updated']}/{counts['looked_up']} tweets ({counts['missing']} missing)")
+
+        except Exception as e:
+            logger.error(f"Error refreshing engagement metrics: {e}")
+        finally:
+            db.close()
+
+    def sync_historical_tweets(self):
+        """Fetch new historical tweets"""
+        db = SessionLocal()
+        try:
+            stored = ContentGenerator(db).fetch_and_store_historical_tweets(count=50)
+            logger.info(f"Fetched and stored {stored} new historical tweets")
+
+        except RateLimited as e:
+            self._retry_at(e, self.sync_historical_tweets, 'retry_sync_historical_tweets', 'Retry historical tweet sync')
+        except Exception as e:
+            logger.error(f"Error fetching historical tweets: {e}")
+        finally:
+            db.close()
+
+    def schedule_tweet_post(self, tweet_id: int, scheduled_time: datetime):
+        """
+        Register (or move) the trigger that posts a tweet at its scheduled time
+
+        A tweet whose time has passed by less than the misfire grace window
+        is posted right away.
+
+        Args:
+            tweet_id: ID of the scheduled tweet
+            scheduled_time: When to post (naive times are UTC, as stored)
+        """
+        if scheduled_time.tzinfo is None:
+            scheduled_time = scheduled_time.replace(tzinfo=timezone.utc)
+
+        self.scheduler.add_job(
+            self.post_tweet_at_scheduled_time,
+            trigger=DateTrigger(run_date=scheduled_time, timezone=CENTRAL_TZ),
+            args=[tweet_id],
+            id=f"{POST_JOB_PREFIX}{tweet_id}",
+            name=f"Post tweet {tweet_id}",
+            replace_existing=True,
+            misfire_grace_time=settings.post_misfire_grace_seconds
+        )
 
-            # Find tweets scheduled for this hour
-            scheduled_tweets = db.query(Tweet).filter(
+    def unschedule_tweet_post(self, tweet_id: int):
+        """Drop a tweet's posting trigger (unscheduled or deleted)"""
+        if not self.running:
+            return
+
+        job = self.scheduler.get_job(f"{POST_JOB_PREFIX}{tweet_id}")
+        if job is not None:
+            job.remove()
+
+    def sync_tweet_post(self, tweet_id: int, status: str, scheduled_time: Optional[datetime]):
+        """Keep a tweet's posting trigger in step with its status and scheduled time"""
+        if not self.running:
+            # Triggers are registered from the database when the scheduler starts
+            return
+
+        if status == 'scheduled' and scheduled_time is not None:
+            self.schedule_tweet_post(tweet_id, scheduled_time)
+        else:
+            self.unschedule_tweet_post(tweet_id)
+
+    def rebuild_post_jobs(self) -> int:
+        """
+        Register a posting trigger for every scheduled tweet (triggers live in memory)
+
+        Tweets that missed their time by more than the misfire grace window,
+        e.g. while the app was down, go back to approved for rescheduling
+        instead of going out late.
+
+        Returns:
+            Number of triggers registered
+        """
+        db = SessionLocal()
+        try:
+            # Stored times are naive UTC
+            cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=settings.post_misfire_grace_seconds)
+            registered = 0
+            missed = []
+            for tweet in db.query(Tweet.id, Tweet.scheduled_time).filter(
                 Tweet.status == 'scheduled',
-                Tweet.scheduled_time >= hour_start,
-                Tweet.scheduled_time < hour_end
-            ).all()
+                Tweet.scheduled_time.isnot(None)
+            ):
+                if tweet.scheduled_time < cutoff:
+                    missed.append(tweet.id)
+                else:
+                    self.schedule_tweet_post(tweet.id, tweet.scheduled_time)
+                    registered += 1
 
-            logger.info(f"Found {len(scheduled_tweets)} tweets to post")
+            self._release_missed_tweets(db, missed)
+            logger.info(f"Registered {registered} tweet posting triggers")
+            return registered
 
-            generator = ContentGenerator(db)
-            posted_count = 0
+        except Exception as e:
+            logger.error(f"Error registering tweet posting triggers: {e}")
+            return 0
+        finally:
+            db.close()
+
+    def post_tweet_at_scheduled_time(self, tweet_id: int):
+        """Post one tweet when its trigger fires"""
+        self._post_due_tweets([tweet_id])
+
+    def post_scheduled_tweets(self):
+        """Post every scheduled tweet that is due, through the posting outbox"""
+        self._post_due_tweets()
+
+    def _post_due_tweets(self, tweet_ids: Optional[List[int]] = None):
+        db = SessionLocal()
+        try:
+            counts = PostOutbox(db).drain(tweet_ids=tweet_ids)
 
-            for tweet in scheduled_tweets:
-                try:
-                    generator.post_tweet(tweet.id)
-                    posted_count += 1
-                    logger.info(f"Posted tweet {tweet.id}: {tweet.content[:50]}...")
-                except Exception as e:
-                    logger.error(f"Error posting tweet {tweet.id}: {e}")
+            for error in counts['errors']:
+                logger.error(f"Error posting tweet: {error}")
+            if counts['retry_at'] is not None:
+                # The outbox keeps the unposted tweets; drain again once the budget refills
+                error = RateLimited('post', counts['retry_at'])
+                self._retry_at(error, self.post_scheduled_tweets, 'retry_post_tweets', 'Retry rate-limited tweet posts')
+            if counts['unknown']:
+                self._schedule_outbox_recovery()
 
-            logger.info(f"Successfully posted {posted_count}/{len(scheduled_tweets)} tweets")
+            logger.info(f"Posted {counts['posted']} tweets ({counts['failed']} failed, {counts['unknown']} awaiting reconciliation)")
 
         except Exception as e:
             logger.error(f"Error in scheduled tweet posting: {e}")
         finally:
             db.close()
 
+    def _schedule_outbox_recovery(self):
+        """Reconcile posting claims once their lease has run out, then post whatever they released"""
+        self.scheduler.add_job(
+            self.post_scheduled_tweets,
+            trigger=DateTrigger(run_date=datetime.now(CENTRAL_TZ) + timedelta(seconds=settings.post_outbox_lease_seconds + 5)),
+            id='reconcile_post_outbox',
+            name='Reconcile interrupted tweet posts',
+            replace_existing=True,
+            misfire_grace_time=None
+        )
+
+    def _on_job_missed(self, event):
+        """A posting trigger fired later than the grace window allows (e.g. the process was suspended)"""
+        if not event.job_id.startswith(POST_JOB_PREFIX):
+            return
+
+        db = SessionLocal()
+        try:
+            self._release_missed_tweets(db, [int(event.job_id[len(POST_JOB_PREFIX):])])
+        except Exception as e:
+            logger.error(f"Error releasing missed tweet: {e}")
+        finally:
+            db.close()
+
+    def _release_missed_tweets(self, db: Session, tweet_ids: List[int]):
+        """Move tweets that missed their slot back to approved"""
+        if not tweet_ids:
+            return
+
+        db.query(Tweet).filter(
+            Tweet.id.in_(tweet_ids),
+            Tweet.status == 'scheduled'
+        ).update({'status': 'approved'}, synchronize_session=False)
+        db.commit()
+        logger.warning(f"Tweets {tweet_ids} missed their posting time by more than {settings.post_misfire_grace_seconds}s; moved back to approved")
+
+    def _retry_at(self, error: RateLimited, func, job_id: str, name: str, args: list = None):
+        """Requeue rate-limited work as a one-off job at the time its budget refills"""
+        self.scheduler.add_job(
+            func,
+            trigger=DateTrigger(run_date=error.retry_at),
+            args=args or [],
+            id=job_id,
+            name=name,
+            replace_existing=True,
+            misfire_grace_time=None  # Run late rather than drop it
+        )
+        logger.warning(f"{error}; requeued '{name}'")
+
 
 # Global scheduler instance
 _scheduler_service = None
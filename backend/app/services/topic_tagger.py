@@ -0,0 +1,100 @@
+from typing import List, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.config import get_settings
+from app.models import HistoricalTweet, HistoricalTweetTopic
+from app.services.keyword_matcher import KeywordMatcher
+
+# Fertility-related keywords tracked as topics
+FERTILITY_KEYWORDS = [
+    'fertility', 'ivf', 'natural', 'holistic', 'treatment', 'health',
+    'nutrition', 'lifestyle', 'hormones', 'cycle', 'ovulation',
+    'conception', 'pregnancy', 'women', 'wellness', 'restoration',
+    'conventional', 'alternative', 'approach', 'success'
+]
+
+
+def tag_historical_tweet(db: Session, historical_tweet: HistoricalTweet) -> List[str]:
+    """
+    Tag a historical tweet with the topics it mentions
+
+    Sets topic_tags and adds one historical_tweet_topics row per topic. The
+    tweet is flushed first if it doesn't have an ID yet; the caller commits.
+
+    Returns:
+        Matched topics
+    """
+    topics = get_topic_matcher().match(historical_tweet.content)
+    historical_tweet.topic_tags = topics
+
+    if historical_tweet.id is None:
+        db.flush()
+
+    for topic in topics:
+        db.add(HistoricalTweetTopic(historical_tweet_id=historical_tweet.id, topic=topic))
+
+    return topics
+
+
+def get_topic_counts(db: Session, limit: int = 10) -> List[Tuple[str, int]]:
+    """
+    Count historical tweets per topic using the topic index
+
+    Returns:
+        List of (topic, tweet count) tuples, most common first
+    """
+    tweet_count = func.count(HistoricalTweetTopic.id).label('tweet_count')
+    rows = db.query(HistoricalTweetTopic.topic, tweet_count).group_by(
+        HistoricalTweetTopic.topic
+    ).order_by(tweet_count.desc(), HistoricalTweetTopic.topic).limit(limit).all()
+
+    return [(row.topic, row.tweet_count) for row in rows]
+
+
+def backfill_topic_tags(db: Session, batch_size: int = 500) -> int:
+    """
+    Tag historical tweets stored before ingest-time tagging existed
+
+    Returns:
+        Number of tweets tagged
+    """
+    tagged = 0
+    last_id = 0
+
+    while True:
+        batch = db.query(HistoricalTweet).filter(
+            HistoricalTweet.id > last_id
+        ).order_by(HistoricalTweet.id).limit(batch_size).all()
+        if not batch:
+            break
+
+        tagged_ids = {
+            row.historical_tweet_id for row in db.query(HistoricalTweetTopic.historical_tweet_id).filter(
+                HistoricalTweetTopic.historical_tweet_id.in_([tweet.id for tweet in batch])
+            )
+        }
+        for historical_tweet in batch:
+            if historical_tweet.id not in tagged_ids:
+                tag_historical_tweet(db, historical_tweet)
+                tagged += 1
+
+        db.commit()
+        last_id = batch[-1].id
+
+    return tagged
+
+
+# Singleton instance
+_topic_matcher = None
+
+
+def get_topic_matcher() -> KeywordMatcher:
+    """Get or create the topic matcher for the configured keyword vocabulary"""
+    global _topic_matcher
+    if _topic_matcher is None:
+        settings = get_settings()
+        _topic_matcher = KeywordMatcher(
+            settings.topic_keywords or FERTILITY_KEYWORDS,
+            whole_words=settings.topic_match_whole_words
+        )
+    return _topic_matcher
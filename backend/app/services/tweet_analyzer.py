@@ -1,69 +1,131 @@
-from typing import List, Dict, Any
-from collections import Counter
-import re
+from typing import List, Dict, Any, Iterable, Optional
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import multiprocessing
+import os
+from app.services.ngram_counter import NGramCounter
 
+STOP_WORDS = frozenset(['the', 'a', 'an', 'to', 'of', 'and', 'is', 'in', 'for', 'on'])
 
-class TweetAnalyzer:
-    """Analyze historical tweets to extract patterns and insights"""
-
-    def __init__(self, historical_tweets: List[Dict[str, Any]]):
-        self.tweets = historical_tweets
 
-    def extract_topics(self) -> List[str]:
+class TweetAnalyzer:
+    """
+    Analyze historical tweets to extract patterns and insights
+
+    All results are derived from running counters rather than the raw tweet
+    list, so an analyzer can be serialized with to_state(), restored later
+    and brought up to date by calling update() with only the new tweets.
+    Topics and engagement aren't counted here: they change after ingestion
+    and are queried from the database (topic_tagger, engagement).
+    """
+
+    # Bumped whenever the to_state() layout changes
+    STATE_VERSION = 4
+
+    # Number of phrases reported by extract_common_phrases()
+    COMMON_PHRASE_COUNT = 15
+
+    def __init__(
+        self,
+        historical_tweets: Optional[Iterable[Dict[str, Any]]] = None,
+        state: Optional[Dict[str, Any]] = None,
+        min_words: int = 2,
+        max_words: int = 4
+    ):
+        self.min_words = min_words
+        self.max_words = max_words
+
+        self.total_tweets = 0
+        self.total_length = 0
+        self.phrases = NGramCounter(min_words, max_words, STOP_WORDS)
+
+        if state:
+            self.load_state(state)
+        if historical_tweets:
+            self.update(historical_tweets)
+
+    def update(self, tweets: Iterable[Dict[str, Any]]) -> int:
         """
-        Extract common topics/themes from tweets
+        Fold new tweets into the running counters
+
+        Args:
+            tweets: Tweet dicts with 'content'
 
         Returns:
-            List of identified topics
+            Number of tweets added
         """
-        # Common fertility-related keywords to look for
-        fertility_keywords = [
-            'fertility', 'ivf', 'natural', 'holistic', 'treatment', 'health',
-            'nutrition', 'lifestyle', 'hormones', 'cycle', 'ovulation',
-            'conception', 'pregnancy', 'women', 'wellness', 'restoration',
-            'conventional', 'alternative', 'approach', 'success'
-        ]
-
-        topic_counts = Counter()
+        added = 0
+        for tweet in tweets:
+            content = tweet['content']
+            self.phrases.add(content)
+            self.total_tweets += 1
+            self.total_length += len(content)
+            added += 1
+
+        return added
+
+    def update_parallel(
+        self,
+        tweets: Iterable[Dict[str, Any]],
+        workers: Optional[int] = None,
+        shard_size: int = 10000
+    ) -> int:
+        """
+        Fold new tweets into the running counters using a process pool
 
-        for tweet in self.tweets:
-            content_lower = tweet['content'].lower()
-            for keyword in fertility_keywords:
-                if keyword in content_lower:
-                    topic_counts[keyword] += 1
+        The stream is cut into shards that are analyzed in worker processes;
+        partial results are merged back in shard order, so the outcome is
+        identical to update(). At most two shards per worker are in flight.
 
-        # Return top topics
-        return [topic for topic, count in topic_counts.most_common(10)]
+        Args:
+            tweets: Tweet dicts, as for update()
+            workers: Worker processes (defaults to the CPU count)
+            shard_size: Tweets per shard
 
-    def get_brand_voice_examples(self, count: int = 5) -> List[str]:
+        Returns:
+            Number of tweets added
         """
-        Get example tweets that represent the brand voice
-
-        Args:
-            count: Number of examples to return
+        workers = workers or os.cpu_count() or 1
+        tweets = iter(tweets)
+        added = 0
+
+        # Spawn rather than fork: callers run inside a threaded server/scheduler
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            in_flight = deque()
+            while True:
+                shard = list(islice(tweets, shard_size))
+                if shard:
+                    in_flight.append(executor.submit(
+                        _analyze_shard, shard, self.min_words, self.max_words
+                    ))
+                if in_flight and (not shard or len(in_flight) >= workers * 2):
+                    added += self.merge(in_flight.popleft().result())
+                if not shard and not in_flight:
+                    break
+
+        return added
+
+    def merge(self, other: 'TweetAnalyzer') -> int:
+        """
+        Merge the counters of an analyzer built from the tweets that follow this one's
 
         Returns:
-            List of tweet texts
+            Number of tweets added
         """
-        # Sort by engagement (sum of likes + retweets)
-        sorted_tweets = sorted(
-            self.tweets,
-            key=lambda t: (
-                t['engagement_metrics'].get('likes', 0) +
-                t['engagement_metrics'].get('retweets', 0) * 2  # Weight retweets more
-            ),
-            reverse=True
-        )
-
-        return [tweet['content'] for tweet in sorted_tweets[:count]]
+        self.phrases.merge(other.phrases)
+        self.total_tweets += other.total_tweets
+        self.total_length += other.total_length
+
+        return other.total_tweets
 
     def get_average_length(self) -> int:
         """Get average tweet length"""
-        if not self.tweets:
+        if not self.total_tweets:
             return 0
 
-        total_length = sum(len(tweet['content']) for tweet in self.tweets)
-        return total_length // len(self.tweets)
+        return self.total_length // self.total_tweets
 
     def extract_common_phrases(self, min_words: int = 2, max_words: int = 4) -> List[str]:
         """
@@ -76,23 +138,12 @@ class TweetAnalyzer:
         Returns:
             List of common phrases
         """
-        phrase_counter = Counter()
-
-        for tweet in self.tweets:
-            # Clean and tokenize
-            text = re.sub(r'[^\w\s]', '', tweet['content'].lower())
-            words = text.split()
-
-            # Extract n-grams
-            for n in range(min_words, max_words + 1):
-                for i in range(len(words) - n + 1):
-                    phrase = ' '.join(words[i:i + n])
-                    # Filter out very common words
-                    if not all(word in ['the', 'a', 'an', 'to', 'of', 'and', 'is', 'in', 'for', 'on'] for word in phrase.split()):
-                        phrase_counter[phrase] += 1
-
         # Return top phrases that appear more than once
-        return [phrase for phrase, count in phrase_counter.most_common(15) if count > 1]
+        return [
+            phrase for phrase, count in self.phrases.most_common(
+                self.COMMON_PHRASE_COUNT, min_count=2, min_words=min_words, max_words=max_words
+            )
+        ]
 
     def get_analysis_summary(self) -> Dict[str, Any]:
         """
@@ -102,14 +153,41 @@ class TweetAnalyzer:
             Dictionary with analysis results
         """
         return {
-            'total_tweets': len(self.tweets),
+            'total_tweets': self.total_tweets,
             'average_length': self.get_average_length(),
-            'top_topics': self.extract_topics(),
-            'brand_voice_examples': self.get_brand_voice_examples(),
-            'common_phrases': self.extract_common_phrases(),
-            'total_engagement': sum(
-                tweet['engagement_metrics'].get('likes', 0) +
-                tweet['engagement_metrics'].get('retweets', 0)
-                for tweet in self.tweets
-            )
+            'common_phrases': self.extract_common_phrases()
         }
+
+    def to_state(self, include_phrase_counts: bool = True) -> Dict[str, Any]:
+        """
+        Serialize the running counters to a JSON-compatible dict
+
+        Phrase counts are exact; nothing is pruned. Callers that keep them
+        elsewhere (AnalyzerStateStore writes one row per n-gram) pass
+        include_phrase_counts=False, and the snapshot then only holds the
+        phrase vocabulary the packed n-gram keys refer to.
+        """
+        return {
+            'version': self.STATE_VERSION,
+            'total_tweets': self.total_tweets,
+            'total_length': self.total_length,
+            'phrases': self.phrases.to_dict(include_counts=include_phrase_counts)
+        }
+
+    def load_state(self, state: Dict[str, Any]):
+        """Restore running counters from a to_state() snapshot"""
+        if state.get('version') != self.STATE_VERSION:
+            raise ValueError(f"Unsupported analyzer state version: {state.get('version')}")
+
+        self.total_tweets = state.get('total_tweets', 0)
+        self.total_length = state.get('total_length', 0)
+        self.phrases = NGramCounter.from_dict(state['phrases'], STOP_WORDS)
+        self.min_words = self.phrases.min_words
+        self.max_words = self.phrases.max_words
+
+
+def _analyze_shard(tweets: List[Dict[str, Any]], min_words: int, max_words: int) -> TweetAnalyzer:
+    """Analyze one shard of the corpus in a worker process"""
+    analyzer = TweetAnalyzer(min_words=min_words, max_words=max_words)
+    analyzer.update(tweets)
+    return analyzer
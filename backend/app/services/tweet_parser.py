@@ -0,0 +1,60 @@
+from typing import List, Optional
+import re
+
+# Leading list numbering ("1. ", "12.")
+_NUMBERING_PATTERN = re.compile(r'^\d+\.\s*')
+
+
+def parse_tweet_line(line: str) -> Optional[str]:
+    """
+    Clean one line of a numbered tweet list
+
+    Returns:
+        Tweet text, or None if the line is blank or too long to post
+    """
+    cleaned = _NUMBERING_PATTERN.sub('', line.strip())
+    cleaned = cleaned.strip('"\'')
+
+    if cleaned and len(cleaned) <= 280:
+        return cleaned
+    return None
+
+
+def parse_tweet_list(content: str) -> List[str]:
+    """Parse a numbered list of tweets from a complete response"""
+    parser = TweetStreamParser()
+    return parser.feed(content) + parser.close()
+
+
+class TweetStreamParser:
+    """
+    Incrementally parse a numbered tweet list from streamed text
+
+    Text deltas are fed in as they arrive; a tweet is emitted as soon as the
+    newline ending its line has been received.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, delta: str) -> List[str]:
+        """
+        Add streamed text
+
+        Returns:
+            Tweets whose lines were completed by this delta
+        """
+        self._buffer += delta
+        *lines, self._buffer = self._buffer.split('\n')
+        return [tweet for tweet in map(parse_tweet_line, lines) if tweet]
+
+    def close(self) -> List[str]:
+        """
+        Finish the stream
+
+        Returns:
+            The last tweet if the response didn't end with a newline
+        """
+        tweet = parse_tweet_line(self._buffer)
+        self._buffer = ""
+        return [tweet] if tweet else []
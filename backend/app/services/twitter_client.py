@@ -2,22 +2,130 @@ import tweepy
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from app.config import get_settings
+from app.services.http_transport import PooledRequestsAdapter
+from app.services.rate_limiter import get_rate_limiter, endpoint_for
+import threading
 
 settings = get_settings()
 
 
+class RateLimitedTweepyClient(tweepy.Client):
+    """
+    tweepy client that checks a per-endpoint budget instead of sleeping on 429s
+
+    Every request spends a token from the shared RateLimiter first and
+    feeds the response's x-rate-limit-* headers back into it. An exhausted
+    endpoint raises RateLimited immediately, so no thread is parked.
+    """
+
+    def request(self, method, route, params=None, json=None, user_auth=False):
+        limiter = get_rate_limiter()
+        endpoint = endpoint_for(method, route)
+        limiter.acquire(endpoint)
+
+        try:
+            response = super().request(method, route, params=params, json=json, user_auth=user_auth)
+        except tweepy.TooManyRequests as e:
+            limiter.update_from_headers(endpoint, e.response.headers)
+            raise limiter.exhausted(endpoint) from e
+
+        limiter.update_from_headers(endpoint, response.headers)
+        return response
+
+
 class TwitterClient:
     """Client for Twitter API v2 operations"""
 
     def __init__(self):
-        self.client = tweepy.Client(
+        self.client = RateLimitedTweepyClient(
             bearer_token=settings.twitter_bearer_token,
             consumer_key=settings.twitter_api_key,
             consumer_secret=settings.twitter_api_secret,
             access_token=settings.twitter_access_token,
             access_token_secret=settings.twitter_access_token_secret,
-            wait_on_rate_limit=True
+            wait_on_rate_limit=False  # RateLimitedTweepyClient fails fast with RateLimited instead
         )
+        # tweepy talks HTTP through requests; give its session the shared pool tuning
+        self.client.session.mount("https://", PooledRequestsAdapter('twitter'))
+        self._user_ids: Dict[str, str] = {}  # Lowercased username -> user ID
+        self._user_ids_lock = threading.Lock()
+        self._own_user_id: Optional[str] = None
+
+    def get_user_id(self, username: str) -> str:
+        """
+        Look up a user's ID (cached - usernames are looked up once per process)
+
+        Args:
+            username: Twitter username (without @)
+
+        Returns:
+            The user's ID
+        """
+        username = username.lower()
+        user_id = self._user_ids.get(username)
+        if user_id is not None:
+            return user_id
+
+        user = self.client.get_user(username=username)
+        if not user.data:
+            raise ValueError(f"User @{username} not found")
+
+        with self._user_ids_lock:
+            self._user_ids[username] = str(user.data.id)
+        return self._user_ids[username]
+
+    def get_own_user_id(self) -> str:
+        """ID of the account the access token posts as (cached)"""
+        if self._own_user_id is None:
+            self._own_user_id = str(self.client.get_me().data.id)
+        return self._own_user_id
+
+    def fetch_own_recent_tweets(self, max_results: int = 100) -> List[Dict[str, Any]]:
+        """
+        Fetch the posting account's most recent original tweets, newest first
+
+        Args:
+            max_results: Number of tweets (5-100)
+
+        Returns:
+            List of tweet dictionaries with content and metadata
+        """
+        return self.fetch_user_tweets_page(self.get_own_user_id(), max_results=max_results)['tweets']
+
+    def fetch_user_tweets_page(
+        self,
+        user_id: str,
+        since_id: Optional[str] = None,
+        pagination_token: Optional[str] = None,
+        max_results: int = 100
+    ) -> Dict[str, Any]:
+        """
+        Fetch one page of a user's original tweets, newest first
+
+        Args:
+            user_id: Twitter user ID
+            since_id: Only return tweets newer than this ID
+            pagination_token: next_token from the previous page
+            max_results: Page size (5-100)
+
+        Returns:
+            {'tweets': [...], 'next_token': token or None, 'newest_id': ID or None}
+        """
+        response = self.client.get_users_tweets(
+            id=user_id,
+            since_id=since_id,
+            pagination_token=pagination_token,
+            max_results=min(max(max_results, 5), 100),
+            tweet_fields=['created_at', 'public_metrics', 'text'],
+            exclude=['retweets', 'replies']  # Only original tweets
+        )
+
+        meta = response.meta or {}
+        return {
+            'tweets': [self._format_tweet(tweet) for tweet in response.data or []],
+            'next_token': meta.get('next_token'),
+            'newest_id': meta.get('newest_id')
+        }
 
     def fetch_user_tweets(
         self,
@@ -29,51 +137,72 @@ class TwitterClient:
 
         Args:
             username: Twitter username (without @)
-            max_results: Maximum number of tweets to fetch (max 100 per request)
+            max_results: Maximum number of tweets to fetch (paged 100 at a time)
 
         Returns:
             List of tweet dictionaries with content and metadata
         """
         try:
-            # Get user ID from username
-            user = self.client.get_user(username=username)
-            if not user.data:
-                raise ValueError(f"User @{username} not found")
-
-            user_id = user.data.id
-
-            # Fetch user's tweets
-            tweets = self.client.get_users_tweets(
-                id=user_id,
-                max_results=max_results,
-                tweet_fields=['created_at', 'public_metrics', 'text'],
-                exclude=['retweets', 'replies']  # Only original tweets
-            )
+            user_id = self.get_user_id(username)
 
-            if not tweets.data:
-                return []
-
-            # Format tweets
             formatted_tweets = []
-            for tweet in tweets.data:
-                formatted_tweets.append({
-                    'tweet_id': str(tweet.id),
-                    'content': tweet.text,
-                    'posted_date': tweet.created_at,
-                    'engagement_metrics': {
-                        'likes': tweet.public_metrics.get('like_count', 0),
-                        'retweets': tweet.public_metrics.get('retweet_count', 0),
-                        'replies': tweet.public_metrics.get('reply_count', 0),
-                        'quotes': tweet.public_metrics.get('quote_count', 0)
-                    }
-                })
-
-            return formatted_tweets
+            pagination_token = None
+            while len(formatted_tweets) < max_results:
+                page = self.fetch_user_tweets_page(
+                    user_id,
+                    pagination_token=pagination_token,
+                    max_results=max_results - len(formatted_tweets)
+                )
+                formatted_tweets.extend(page['tweets'])
+                pagination_token = page['next_token']
+                if not pagination_token:
+                    break
+
+            return formatted_tweets[:max_results]
 
         except Exception as e:
             print(f"Error fetching tweets for @{username}: {str(e)}")
             raise
 
+    def fetch_tweet_metrics(self, tweet_ids: List[str]) -> Dict[str, Dict[str, int]]:
+        """
+        Look up current engagement metrics for up to 100 tweets in one call
+
+        Args:
+            tweet_ids: Twitter tweet IDs (at most 100)
+
+        Returns:
+            Tweet ID -> engagement metrics; deleted or protected tweets are missing
+        """
+        if len(tweet_ids) > 100:
+            raise ValueError("At most 100 tweets can be looked up per call")
+        if not tweet_ids:
+            return {}
+
+        response = self.client.get_tweets(ids=tweet_ids, tweet_fields=['public_metrics'])
+        return {
+            str(tweet.id): self._format_metrics(tweet.public_metrics)
+            for tweet in response.data or []
+        }
+
+    @staticmethod
+    def _format_metrics(public_metrics: Dict[str, int]) -> Dict[str, int]:
+        return {
+            'likes': public_metrics.get('like_count', 0),
+            'retweets': public_metrics.get('retweet_count', 0),
+            'replies': public_metrics.get('reply_count', 0),
+            'quotes': public_metrics.get('quote_count', 0)
+        }
+
+    @staticmethod
+    def _format_tweet(tweet) -> Dict[str, Any]:
+        return {
+            'tweet_id': str(tweet.id),
+            'content': tweet.text,
+            'posted_date': tweet.created_at,
+            'engagement_metrics': TwitterClient._format_metrics(tweet.public_metrics)
+        }
+
     def post_tweet(self, content: str) -> Optional[str]:
         """
         Post a tweet
@@ -116,11 +245,15 @@ class TwitterClient:
 
 # Singleton instance
 _twitter_client = None
+_twitter_client_lock = threading.Lock()
 
 
 def get_twitter_client() -> TwitterClient:
     """Get or create Twitter client instance"""
     global _twitter_client
     if _twitter_client is None:
-        _twitter_client = TwitterClient()
+        # Scheduler and job worker threads can ask for the client at the same time
+        with _twitter_client_lock:
+            if _twitter_client is None:
+                _twitter_client = TwitterClient()
     return _twitter_client
@@ -0,0 +1,209 @@
+"""
+Benchmark dashboard request throughput with sync vs async database sessions
+
+Starts a uvicorn server per variant against the same SQLite database and
+drives the dashboard's read endpoints (tweets, Instagram posts, schedules)
+from many concurrent clients:
+
+    sync   the routers as they were before the async port - blocking
+           Session calls, in sync handlers and in an async cron handler
+    async  the current routers (AsyncSession via get_async_db)
+
+Run from the backend directory (needs the usual .env settings):
+    python -m benchmarks.concurrency_benchmark --concurrency 1 10 50 --seconds 5
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List, Tuple
+from fastapi import Depends, FastAPI
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+import httpx
+
+DASHBOARD_PATHS = ["/api/tweets/", "/api/instagram/", "/api/scheduler/"]
+# Vercel Cron and the dashboard hit the API at the same time
+CRON_PATH = "/api/scheduler/cron/post-scheduled-tweets"
+REQUEST_TIMEOUT = 10.0
+
+
+def build_database(path: str, tweets: int):
+    """Create a SQLite database with a dashboard-sized set of tweets and posts"""
+    from app.database import Base
+    from app.models import Tweet, InstagramPost
+
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+
+    rng = random.Random(7)
+    statuses = ['pending', 'approved', 'scheduled', 'posted']
+    with engine.begin() as conn:
+        conn.execute(Tweet.__table__.insert(), [
+            {
+                'content': f"Tweet {i}: " + "fertility " * rng.randint(10, 25),
+                'ai_source': rng.choice(['claude', 'chatgpt']),
+                'status': statuses[i % len(statuses)],
+                # Scheduled tweets are in the future so the cron endpoint only reads
+                'scheduled_time': datetime(2099, 1, 1) + timedelta(hours=i) if i % 4 == 2 else None,
+                'edited': False
+            }
+            for i in range(tweets)
+        ])
+        conn.execute(InstagramPost.__table__.insert(), [
+            {'caption': f"Caption {i}", 'image_url': f"https://example.com/{i}.png", 'status': 'pending'}
+            for i in range(tweets // 5)
+        ])
+
+    engine.dispose()
+
+
+def create_sync_app() -> FastAPI:
+    """The dashboard endpoints as they were implemented with blocking Sessions"""
+    from app.database import get_db
+    from app.models import Tweet, InstagramPost, PostingSchedule
+    from app.schemas import TweetResponse, InstagramPostResponse, PostingScheduleResponse
+    from zoneinfo import ZoneInfo
+
+    app = FastAPI()
+
+    @app.get("/api/tweets/", response_model=List[TweetResponse])
+    def get_tweets(status: str = None, skip: int = 0, limit: int = 500, db: Session = Depends(get_db)):
+        query = db.query(Tweet)
+        if status:
+            query = query.filter(Tweet.status == status)
+        return query.order_by(Tweet.created_at.desc()).offset(skip).limit(limit).all()
+
+    @app.get("/api/instagram/", response_model=List[InstagramPostResponse])
+    def get_instagram_posts(status: str = None, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+        query = db.query(InstagramPost)
+        if status:
+            query = query.filter(InstagramPost.status == status)
+        return query.order_by(InstagramPost.created_at.desc()).offset(skip).limit(limit).all()
+
+    @app.get("/api/scheduler/", response_model=List[PostingScheduleResponse])
+    def get_schedules(db: Session = Depends(get_db)):
+        return db.query(PostingSchedule).all()
+
+    @app.get(CRON_PATH)
+    async def cron_post_scheduled_tweets(db: Session = Depends(get_db)):
+        now = datetime.now(ZoneInfo("America/Chicago"))
+        due_tweets = db.query(Tweet).filter(Tweet.status == "scheduled", Tweet.scheduled_time <= now).all()
+        return {"total_checked": len(due_tweets)}
+
+    return app
+
+
+def create_async_app() -> FastAPI:
+    """The current routers, without the scheduler/job queue lifespan"""
+    from app.api import tweets, instagram, scheduler
+
+    app = FastAPI()
+    app.include_router(tweets.router, prefix="/api/tweets")
+    app.include_router(instagram.router, prefix="/api/instagram")
+    app.include_router(scheduler.router, prefix="/api/scheduler")
+    return app
+
+
+async def drive_load(base_url: str, concurrency: int, seconds: float, cron_share: float) -> Tuple[float, int]:
+    """
+    Issue requests from concurrent clients for a fixed time
+
+    Returns:
+        (successful requests/sec, failed or timed-out requests)
+    """
+    deadline = time.monotonic() + seconds
+    completed = 0
+    failed = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=REQUEST_TIMEOUT) as client:
+        async def worker(seed: int):
+            nonlocal completed, failed
+            rng = random.Random(seed)
+            while time.monotonic() < deadline:
+                path = CRON_PATH if rng.random() < cron_share else rng.choice(DASHBOARD_PATHS)
+                try:
+                    response = await client.get(path)
+                    response.raise_for_status()
+                    completed += 1
+                except httpx.HTTPError:
+                    failed += 1
+
+        started = time.monotonic()
+        await asyncio.gather(*(worker(seed) for seed in range(concurrency)))
+        elapsed = time.monotonic() - started
+
+    return completed / elapsed, failed
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(variant: str, database_path: str, port: int) -> subprocess.Popen:
+    env = {**os.environ, 'DATABASE_URL': f"sqlite:///{database_path}"}
+    server = subprocess.Popen(
+        [
+            sys.executable, '-m', 'uvicorn', '--factory',
+            f"benchmarks.concurrency_benchmark:create_{variant}_app",
+            '--port', str(port), '--log-level', 'warning'
+        ],
+        env=env,
+        stderr=subprocess.DEVNULL
+    )
+
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/api/scheduler/", timeout=1).raise_for_status()
+            return server
+        except httpx.HTTPError:
+            time.sleep(0.1)
+
+    server.kill()
+    raise RuntimeError(f"{variant} server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 10, 50])
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--tweets', type=int, default=500)
+    parser.add_argument('--cron-share', type=float, default=0.1, help='Fraction of requests to the cron endpoint')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_path = os.path.join(tmp, "dashboard.db")
+        build_database(database_path, args.tweets)
+
+        results = {}
+        for variant in ('sync', 'async'):
+            port = free_port()
+            server = start_server(variant, database_path, port)
+            try:
+                for concurrency in args.concurrency:
+                    results[(variant, concurrency)] = asyncio.run(drive_load(
+                        f"http://127.0.0.1:{port}", concurrency, args.seconds, args.cron_share
+                    ))
+            finally:
+                server.terminate()
+                server.wait()
+
+    print(f"Dashboard requests/sec ({args.tweets} tweets, failures = errors or >{REQUEST_TIMEOUT:.0f}s timeouts)")
+    print(f"{'clients':>8} {'sync':>10} {'failed':>8} {'async':>10} {'failed':>8}")
+    for concurrency in args.concurrency:
+        sync_rps, sync_failed = results[('sync', concurrency)]
+        async_rps, async_failed = results[('async', concurrency)]
+        print(f"{concurrency:>8} {sync_rps:>10.1f} {sync_failed:>8} {async_rps:>10.1f} {async_failed:>8}")
+
+
+if __name__ == "__main__":
+    main()
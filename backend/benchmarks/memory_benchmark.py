@@ -0,0 +1,104 @@
+"""
+Benchmark peak memory of historical-corpus analysis as the corpus grows
+
+Compares the original load-everything path (all ORM rows plus a list of
+dicts) with the streaming AnalyzerStateStore path. Each measurement runs in
+a fresh subprocess so peak RSS isn't shared between runs.
+
+Run from the backend directory (needs the usual .env settings):
+    python -m benchmarks.memory_benchmark --sizes 10000 50000 100000 200000
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models import HistoricalTweet
+from benchmarks.ngram_benchmark import synthetic_corpus
+
+
+def build_database(path: str, tweets: int):
+    """Create a SQLite database holding a synthetic historical corpus"""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+
+    with engine.begin() as conn:
+        batch = []
+        # A small fragment pool keeps the n-gram table from growing with the
+        # corpus, so what's measured is the cost of loading the rows
+        for i, content in enumerate(synthetic_corpus(tweets, fragment_count=20)):
+            batch.append({
+                'tweet_id': str(i),
+                'content': content,
+                'posted_date': datetime(2024, 1, 1),
+                'engagement_metrics': {'likes': i % 97, 'retweets': i % 13},
+                'engagement_score': i % 97 + (i % 13) * 2,
+                'topic_tags': []
+            })
+            if len(batch) == 5000:
+                conn.execute(HistoricalTweet.__table__.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(HistoricalTweet.__table__.insert(), batch)
+
+    engine.dispose()
+
+
+def measure(path: str, mode: str) -> int:
+    """Run one analysis pass against a database; returns peak RSS in KB"""
+    from app.services.analyzer_store import AnalyzerStateStore
+    from app.services.tweet_analyzer import TweetAnalyzer
+
+    engine = create_engine(f"sqlite:///{path}")
+    db = sessionmaker(bind=engine)()
+
+    if mode == 'legacy':
+        historical_tweets = db.query(HistoricalTweet).all()
+        historical_data = [
+            {'content': ht.content, 'engagement_metrics': ht.engagement_metrics}
+            for ht in historical_tweets
+        ]
+        TweetAnalyzer(historical_data).get_analysis_summary()
+    else:
+        store = AnalyzerStateStore(db)
+        store.reset()
+        store.get_analysis_summary()
+
+    db.close()
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 50000, 100000, 200000])
+    parser.add_argument('--measure', nargs=2, metavar=('DB_PATH', 'MODE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(measure(*args.measure))
+        return
+
+    print(f"Peak RSS per analysis pass\n{'tweets':>10} {'legacy MB':>12} {'streaming MB':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = os.path.join(tmp, f"corpus_{size}.db")
+            build_database(path, size)
+
+            peaks = []
+            for mode in ('legacy', 'streaming'):
+                output = subprocess.run(
+                    [sys.executable, '-m', 'benchmarks.memory_benchmark', '--measure', path, mode],
+                    check=True, capture_output=True, text=True
+                ).stdout
+                peaks.append(int(output.strip().splitlines()[-1]) / 1024)
+
+            print(f"{size:>10,} {peaks[0]:>12.1f} {peaks[1]:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
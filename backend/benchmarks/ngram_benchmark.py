@@ -0,0 +1,83 @@
+"""
+Benchmark phrase extraction: legacy string n-grams vs NGramCounter
+
+Run from the backend directory:
+    python -m benchmarks.ngram_benchmark --tweets 1000000
+"""
+import argparse
+import random
+import re
+import time
+from collections import Counter
+from app.services.ngram_counter import NGramCounter
+from app.services.tweet_analyzer import STOP_WORDS
+
+
+def synthetic_corpus(tweets: int, seed: int = 42, fragment_count: int = 300):
+    """Yield tweet texts assembled from a fixed pool of random sentence fragments"""
+    rng = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(400)] + sorted(STOP_WORDS) * 10
+    fragments = [
+        ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(4, 8)))
+        for _ in range(fragment_count)
+    ]
+    punctuation = ['.', ',', '!', '?', '']
+
+    for _ in range(tweets):
+        yield ' '.join(
+            rng.choice(fragments).capitalize() + rng.choice(punctuation)
+            for _ in range(rng.randint(3, 5))
+        )
+
+
+def legacy_common_phrases(texts, min_words: int = 2, max_words: int = 4):
+    """The original TweetAnalyzer.extract_common_phrases algorithm"""
+    phrase_counter = Counter()
+
+    for content in texts:
+        text = re.sub(r'[^\w\s]', '', content.lower())
+        words = text.split()
+
+        for n in range(min_words, max_words + 1):
+            for i in range(len(words) - n + 1):
+                phrase = ' '.join(words[i:i + n])
+                if not all(word in ['the', 'a', 'an', 'to', 'of', 'and', 'is', 'in', 'for', 'on'] for word in phrase.split()):
+                    phrase_counter[phrase] += 1
+
+    return [phrase for phrase, count in phrase_counter.most_common(15) if count > 1]
+
+
+def ngram_common_phrases(texts, min_words: int = 2, max_words: int = 4):
+    """Phrase extraction using NGramCounter"""
+    counter = NGramCounter(min_words, max_words, STOP_WORDS)
+    for content in texts:
+        counter.add(content)
+
+    return [phrase for phrase, count in counter.most_common(15, min_count=2)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tweets', type=int, default=1000000, help='Synthetic corpus size')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    corpus = list(synthetic_corpus(args.tweets, args.seed))
+    print(f"Corpus: {len(corpus):,} synthetic tweets")
+
+    start = time.perf_counter()
+    legacy = legacy_common_phrases(corpus)
+    legacy_seconds = time.perf_counter() - start
+    print(f"  legacy string n-grams: {legacy_seconds:8.2f}s")
+
+    start = time.perf_counter()
+    engine = ngram_common_phrases(corpus)
+    engine_seconds = time.perf_counter() - start
+    print(f"  integer-token engine:  {engine_seconds:8.2f}s")
+
+    print(f"  speedup: {legacy_seconds / engine_seconds:.2f}x")
+    print(f"  identical top phrases: {legacy == engine}")
+
+
+if __name__ == "__main__":
+    main()
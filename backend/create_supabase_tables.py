@@ -4,11 +4,17 @@ Create all database tables in Supabase PostgreSQL
 from app.database import Base, engine
 from app.models import (
     HistoricalTweet,
+    HistoricalTweetTopic,
     Tweet,
     TweetEdit,
     InstagramPost,
     APICredential,
-    PostingSchedule
+    PostingSchedule,
+    AnalyzerState,
+    AnalyzerPhraseCount,
+    ContentFingerprint,
+    FingerprintBand,
+    Job
 )
 
 def create_tables():
@@ -26,11 +32,21 @@ def create_tables():
     print("✓ All tables created successfully!")
     print("\nTables created:")
     print("  - historical_tweets")
+    print("  - historical_tweet_topics")
     print("  - tweets")
     print("  - tweet_edits")
     print("  - instagram_posts")
     print("  - api_credentials")
     print("  - posting_schedule")
+    print("  - analyzer_state")
+    print("  - analyzer_phrase_counts")
+    print("  - content_fingerprints")
+    print("  - fingerprint_bands")
+    print("  - jobs")
+    print("  - generation_batches")
+    print("  - sync_cursors")
+    print("  - engagement_snapshots")
+    print("  - post_outbox")
 
 if __name__ == "__main__":
     create_tables()
@@ -0,0 +1,160 @@
+"""
+Local stand-in for the Anthropic and OpenAI batch APIs
+
+Implements just enough of both APIs for batch generation to run end to end
+without provider accounts. Completions are canned: numbered tweet lists for
+generation prompts and a short caption for anything else. Batches finish
+FAKE_BATCH_DELAY_SECONDS after they are submitted.
+
+Run from the backend directory:
+    uvicorn fake_batch_server:app --port 8787
+
+and point the app at it:
+    ANTHROPIC_BATCH_BASE_URL=http://127.0.0.1:8787
+    OPENAI_BATCH_BASE_URL=http://127.0.0.1:8787
+"""
+from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import PlainTextResponse
+import json
+import os
+import re
+import time
+import uuid
+
+DELAY_SECONDS = float(os.environ.get("FAKE_BATCH_DELAY_SECONDS", "2"))
+
+app = FastAPI(title="Fake batch API")
+
+batches = {}  # id -> {'created', 'requests': [(custom_id, params)]}
+files = {}  # id -> JSONL text
+
+
+def _complete(params: dict) -> str:
+    prompt = params["messages"][-1]["content"]
+    match = re.match(r"Generate (\d+) ", prompt)
+    if not match:
+        return "A fake Instagram caption that expands on the tweet with a question at the end?"
+
+    suffix = uuid.uuid4().hex[:8]
+    return "\n".join(
+        f"{i}. Fake tweet {suffix}-{i} about stress, hormones and what to do about them today."
+        for i in range(1, int(match.group(1)) + 1)
+    )
+
+
+def _ended(batch: dict) -> bool:
+    return time.time() - batch['created'] >= DELAY_SECONDS
+
+
+# Anthropic Message Batches
+
+def _anthropic_batch(batch_id: str, request: Request) -> dict:
+    batch = batches.get(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    ended = _ended(batch)
+    return {
+        "id": batch_id,
+        "type": "message_batch",
+        "processing_status": "ended" if ended else "in_progress",
+        "results_url": str(request.url_for("anthropic_results", batch_id=batch_id)) if ended else None
+    }
+
+
+@app.post("/v1/messages/batches")
+async def anthropic_create_batch(request: Request):
+    body = await request.json()
+    batch_id = f"msgbatch_{uuid.uuid4().hex}"
+    batches[batch_id] = {
+        'created': time.time(),
+        'requests': [(item["custom_id"], item["params"]) for item in body["requests"]]
+    }
+    return _anthropic_batch(batch_id, request)
+
+
+@app.get("/v1/messages/batches/{batch_id}")
+def anthropic_get_batch(batch_id: str, request: Request):
+    return _anthropic_batch(batch_id, request)
+
+
+@app.get("/v1/messages/batches/{batch_id}/results", name="anthropic_results")
+def anthropic_results(batch_id: str):
+    batch = batches[batch_id]
+    lines = [
+        json.dumps({
+            "custom_id": custom_id,
+            "result": {
+                "type": "succeeded",
+                "message": {"role": "assistant", "content": [{"type": "text", "text": _complete(params)}]}
+            }
+        })
+        for custom_id, params in batch['requests']
+    ]
+    return PlainTextResponse("\n".join(lines))
+
+
+# OpenAI Files and Batches
+
+@app.post("/v1/files")
+async def openai_upload_file(purpose: str = Form(...), file: UploadFile = File(...)):
+    file_id = f"file-{uuid.uuid4().hex}"
+    files[file_id] = (await file.read()).decode("utf-8")
+    return {"id": file_id, "object": "file", "purpose": purpose}
+
+
+@app.get("/v1/files/{file_id}/content")
+def openai_file_content(file_id: str):
+    if file_id not in files:
+        raise HTTPException(status_code=404, detail="File not found")
+    return PlainTextResponse(files[file_id])
+
+
+def _openai_batch(batch_id: str) -> dict:
+    batch = batches.get(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    if _ended(batch) and 'output_file_id' not in batch:
+        output_file_id = f"file-{uuid.uuid4().hex}"
+        files[output_file_id] = "\n".join(
+            json.dumps({
+                "id": f"batch_req_{uuid.uuid4().hex}",
+                "custom_id": custom_id,
+                "response": {
+                    "status_code": 200,
+                    "body": {"choices": [{"index": 0, "message": {"role": "assistant", "content": _complete(params)}}]}
+                },
+                "error": None
+            })
+            for custom_id, params in batch['requests']
+        )
+        batch['output_file_id'] = output_file_id
+
+    return {
+        "id": batch_id,
+        "object": "batch",
+        "status": "completed" if 'output_file_id' in batch else "in_progress",
+        "output_file_id": batch.get('output_file_id')
+    }
+
+
+@app.post("/v1/batches")
+async def openai_create_batch(request: Request):
+    body = await request.json()
+    if body["input_file_id"] not in files:
+        raise HTTPException(status_code=400, detail="Unknown input file")
+
+    batch_id = f"batch_{uuid.uuid4().hex}"
+    batches[batch_id] = {
+        'created': time.time(),
+        'requests': [
+            (item["custom_id"], item["body"])
+            for item in map(json.loads, files[body["input_file_id"]].splitlines())
+        ]
+    }
+    return _openai_batch(batch_id)
+
+
+@app.get("/v1/batches/{batch_id}")
+def openai_get_batch(batch_id: str):
+    return _openai_batch(batch_id)
@@ -1,6 +1,9 @@
 """Database migration to add edit tracking features"""
-from app.database import engine, Base
-from app.models import Tweet, TweetEdit
+from app.database import engine, Base, SessionLocal
+from app.models import Tweet, TweetEdit, AnalyzerState, AnalyzerPhraseCount, HistoricalTweetTopic, ContentFingerprint, FingerprintBand, Job, GenerationBatch, SyncCursor, EngagementSnapshot, PostOutboxEntry
+from app.services.topic_tagger import backfill_topic_tags
+from app.services.engagement import recompute_engagement_scores
+from app.services.dedup_index import backfill_fingerprints
 from sqlalchemy import inspect, text
 
 def migrate():
@@ -10,6 +13,32 @@ def migrate():
     # Get inspector to check existing columns
     inspector = inspect(engine)
 
+    # Create analyzer_state table if it doesn't exist
+    if not inspector.has_table('analyzer_state'):
+        print("Creating analyzer_state table...")
+        AnalyzerState.__table__.create(engine)
+        print("✓ Created analyzer_state table")
+    else:
+        print("✓ analyzer_state table already exists")
+
+        analyzer_state_columns = [col['name'] for col in inspector.get_columns('analyzer_state')]
+        if 'metrics_epoch' not in analyzer_state_columns:
+            print("Adding metrics_epoch column to analyzer_state table...")
+            with engine.connect() as conn:
+                conn.execute(text(
+                    "ALTER TABLE analyzer_state ADD COLUMN metrics_epoch INTEGER DEFAULT 0"
+                ))
+                conn.commit()
+            print("✓ Added metrics_epoch column")
+
+    # Create analyzer_phrase_counts table if it doesn't exist
+    if not inspector.has_table('analyzer_phrase_counts'):
+        print("Creating analyzer_phrase_counts table...")
+        AnalyzerPhraseCount.__table__.create(engine)
+        print("✓ Created analyzer_phrase_counts table (snapshots rebuild on next load)")
+    else:
+        print("✓ analyzer_phrase_counts table already exists")
+
     with engine.connect() as conn:
         # Check if original_content column exists in tweets table
         columns = [col['name'] for col in inspector.get_columns('tweets')]
@@ -24,6 +53,30 @@ def migrate():
         else:
             print("✓ original_content column already exists")
 
+        # Check if engagement_score column exists in historical_tweets table
+        historical_columns = [col['name'] for col in inspector.get_columns('historical_tweets')]
+
+        if 'engagement_score' not in historical_columns:
+            print("Adding engagement_score column to historical_tweets table...")
+            conn.execute(text(
+                "ALTER TABLE historical_tweets ADD COLUMN engagement_score FLOAT DEFAULT 0"
+            ))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_historical_tweets_engagement_score "
+                "ON historical_tweets (engagement_score)"
+            ))
+            conn.commit()
+            print("✓ Added engagement_score column")
+
+            db = SessionLocal()
+            try:
+                updated = recompute_engagement_scores(db)
+                print(f"✓ Computed engagement scores for {updated} historical tweets")
+            finally:
+                db.close()
+        else:
+            print("✓ engagement_score column already exists")
+
     # Create tweet_edits table if it doesn't exist
     if not inspector.has_table('tweet_edits'):
         print("Creating tweet_edits table...")
@@ -32,6 +85,129 @@ def migrate():
     else:
         print("✓ tweet_edits table already exists")
 
+    # Create historical_tweet_topics table and tag existing historical tweets
+    if not inspector.has_table('historical_tweet_topics'):
+        print("Creating historical_tweet_topics table...")
+        HistoricalTweetTopic.__table__.create(engine)
+        print("✓ Created historical_tweet_topics table")
+
+        db = SessionLocal()
+        try:
+            tagged = backfill_topic_tags(db)
+            print(f"✓ Tagged {tagged} existing historical tweets")
+        finally:
+            db.close()
+    else:
+        print("✓ historical_tweet_topics table already exists")
+
+    # Create near-duplicate index tables and index existing tweets
+    if not inspector.has_table('content_fingerprints'):
+        print("Creating content_fingerprints and fingerprint_bands tables...")
+        ContentFingerprint.__table__.create(engine)
+        FingerprintBand.__table__.create(engine)
+        print("✓ Created near-duplicate index tables")
+
+        db = SessionLocal()
+        try:
+            indexed = backfill_fingerprints(db)
+            print(f"✓ Indexed {indexed} existing tweets")
+        finally:
+            db.close()
+    else:
+        print("✓ content_fingerprints table already exists")
+
+    # Create jobs table if it doesn't exist
+    if not inspector.has_table('jobs'):
+        print("Creating jobs table...")
+        Job.__table__.create(engine)
+        print("✓ Created jobs table")
+    else:
+        print("✓ jobs table already exists")
+
+        job_columns = [col['name'] for col in inspector.get_columns('jobs')]
+        with engine.connect() as conn:
+            for column, column_type in (('owner', 'VARCHAR'), ('heartbeat_at', 'TIMESTAMP'), ('cancel_requested', 'BOOLEAN DEFAULT FALSE')):
+                if column not in job_columns:
+                    print(f"Adding {column} column to jobs table...")
+                    conn.execute(text(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}"))
+                    conn.commit()
+                    print(f"✓ Added {column} column")
+
+        if 'ix_jobs_single_active_refill' not in [index['name'] for index in inspector.get_indexes('jobs')]:
+            print("Adding single active refill index to jobs table...")
+            with engine.connect() as conn:
+                # Fail all but the newest active refill so the unique index can be built
+                conn.execute(text("""
+                    UPDATE jobs SET status = 'failed', error = 'Superseded by another refill'
+                    WHERE kind = 'refill_candidate_pool' AND status IN ('queued', 'running')
+                    AND id NOT IN (
+                        SELECT id FROM jobs
+                        WHERE kind = 'refill_candidate_pool' AND status IN ('queued', 'running')
+                        ORDER BY created_at DESC LIMIT 1
+                    )
+                """))
+                conn.commit()
+            for index in Job.__table__.indexes:
+                if index.name == 'ix_jobs_single_active_refill':
+                    index.create(engine)
+            print("✓ Added ix_jobs_single_active_refill index")
+
+    # Create generation_batches table if it doesn't exist
+    if not inspector.has_table('generation_batches'):
+        print("Creating generation_batches table...")
+        GenerationBatch.__table__.create(engine)
+        print("✓ Created generation_batches table")
+    else:
+        print("✓ generation_batches table already exists")
+
+        batch_columns = [col['name'] for col in inspector.get_columns('generation_batches')]
+        if 'claimed_at' not in batch_columns:
+            print("Adding claimed_at column to generation_batches table...")
+            with engine.connect() as conn:
+                conn.execute(text("ALTER TABLE generation_batches ADD COLUMN claimed_at TIMESTAMP"))
+                conn.commit()
+            print("✓ Added claimed_at column")
+
+    # Create sync_cursors table if it doesn't exist
+    if not inspector.has_table('sync_cursors'):
+        print("Creating sync_cursors table...")
+        SyncCursor.__table__.create(engine)
+        print("✓ Created sync_cursors table")
+    else:
+        print("✓ sync_cursors table already exists")
+
+    # Add engagement refresh columns if they don't exist
+    with engine.connect() as conn:
+        for table in ('historical_tweets', 'tweets'):
+            table_columns = [col['name'] for col in inspector.get_columns(table)]
+            if 'metrics_refreshed_at' not in table_columns:
+                print(f"Adding metrics_refreshed_at column to {table} table...")
+                conn.execute(text(f"ALTER TABLE {table} ADD COLUMN metrics_refreshed_at TIMESTAMP"))
+                conn.commit()
+                print("✓ Added metrics_refreshed_at column")
+
+        if 'engagement_metrics' not in [col['name'] for col in inspector.get_columns('tweets')]:
+            print("Adding engagement_metrics column to tweets table...")
+            conn.execute(text("ALTER TABLE tweets ADD COLUMN engagement_metrics JSON"))
+            conn.commit()
+            print("✓ Added engagement_metrics column")
+
+    # Create engagement_snapshots table if it doesn't exist
+    if not inspector.has_table('engagement_snapshots'):
+        print("Creating engagement_snapshots table...")
+        EngagementSnapshot.__table__.create(engine)
+        print("✓ Created engagement_snapshots table")
+    else:
+        print("✓ engagement_snapshots table already exists")
+
+    # Create post_outbox table if it doesn't exist
+    if not inspector.has_table('post_outbox'):
+        print("Creating post_outbox table...")
+        PostOutboxEntry.__table__.create(engine)
+        print("✓ Created post_outbox table")
+    else:
+        print("✓ post_outbox table already exists")
+
     print("\n✓ Migration completed successfully!")
 
 if __name__ == "__main__":
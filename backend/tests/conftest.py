@@ -0,0 +1,37 @@
+"""
+Test configuration
+
+Settings are read when app.config is first imported, so the environment is
+set up here, before any test module imports the app: placeholder API keys
+and a throwaway SQLite database.
+"""
+import os
+import tempfile
+import pytest
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+for name in (
+    "ANTHROPIC_API_KEY",
+    "OPENAI_API_KEY",
+    "TWITTER_API_KEY",
+    "TWITTER_API_SECRET",
+    "TWITTER_BEARER_TOKEN",
+    "TWITTER_ACCESS_TOKEN",
+    "TWITTER_ACCESS_TOKEN_SECRET",
+):
+    os.environ.setdefault(name, "test")
+
+
+@pytest.fixture
+def db():
+    """Session on a freshly created schema, dropped again afterwards"""
+    from app.database import Base, SessionLocal, engine
+    import app.models  # noqa: F401 - registers the tables
+
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(engine)
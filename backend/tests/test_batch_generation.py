@@ -0,0 +1,53 @@
+from datetime import datetime, timezone
+from fastapi.testclient import TestClient
+import pytest
+
+import fake_batch_server
+from app.models import GenerationBatch, Tweet
+from app.services import batch_providers
+from app.services.batch_generation import poll_generation_batches, submit_daily_batches
+
+
+@pytest.fixture
+def fake_batch_api(monkeypatch):
+    """Route both batch providers to fake_batch_server in process, with batches finishing at once"""
+    monkeypatch.setattr(fake_batch_server, "DELAY_SECONDS", 0)
+    fake_batch_server.batches.clear()
+    fake_batch_server.files.clear()
+
+    def in_process(factory):
+        def create():
+            provider = factory()
+            provider.http = TestClient(fake_batch_server.app)
+            return provider
+        return create
+
+    for name, factory in list(batch_providers._batch_provider_factories.items()):
+        monkeypatch.setitem(batch_providers._batch_provider_factories, name, in_process(factory))
+    monkeypatch.setattr(batch_providers, "_batch_providers", {})
+
+
+def test_submit_poll_ingest(db, fake_batch_api):
+    batches = submit_daily_batches(db, count=6, include_captions=False)
+    assert sorted(batch.provider for batch in batches) == ['chatgpt', 'claude']
+
+    # A claim another poller holds is left alone
+    taken = batches[0]
+    taken.status = 'ingesting'
+    taken.claimed_at = datetime.now(timezone.utc)
+    db.commit()
+
+    assert poll_generation_batches(db) == {'pending': 0, 'ingested': 1, 'failed': 0}
+    assert db.query(Tweet).filter(Tweet.status == 'pending').count() == 3
+
+    # Once released, the other batch is ingested exactly once
+    taken.status = 'submitted'
+    taken.claimed_at = None
+    db.commit()
+    assert poll_generation_batches(db) == {'pending': 0, 'ingested': 1, 'failed': 0}
+    assert poll_generation_batches(db) == {'pending': 0, 'ingested': 0, 'failed': 0}
+
+    stored = db.query(GenerationBatch).order_by(GenerationBatch.id).all()
+    assert [batch.status for batch in stored] == ['ingested', 'ingested']
+    assert sum(batch.result['tweets_stored'] for batch in stored) == 6
+    assert db.query(Tweet).filter(Tweet.status == 'pending').count() == 6
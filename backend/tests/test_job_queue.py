@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta, timezone
+import os
+import socket
+import threading
+import uuid
+import pytest
+
+from app.models import Job
+from app.services.job_queue import JobQueue
+
+
+@pytest.fixture
+def queue():
+    """One worker, with the heartbeat thread too slow to interfere"""
+    queue = JobQueue(workers=1, heartbeat_seconds=3600)
+    yield queue
+    queue.shutdown()
+
+
+class BlockingJob:
+    """Job function that reports progress only once released"""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.reported = 0
+
+    def __call__(self, db, progress):
+        self.started.set()
+        self.release.wait(5)
+        progress(step=1)
+        self.reported += 1
+        return {'done': True}
+
+
+def add_job(db, owner, heartbeat_age_seconds: float = 0.0, status: str = "running") -> Job:
+    job = Job(
+        id=uuid.uuid4().hex,
+        kind="test",
+        status=status,
+        owner=owner,
+        heartbeat_at=datetime.now(timezone.utc) - timedelta(seconds=heartbeat_age_seconds)
+    )
+    db.add(job)
+    db.commit()
+    return job
+
+
+def test_cancelling_a_running_job_stops_it_at_its_next_progress_report(db, queue):
+    func = BlockingJob()
+    job = queue.enqueue(db, "test", func)
+    assert func.started.wait(5)
+
+    assert queue.cancel(db, job.id)
+    func.release.set()
+    queue.shutdown()
+
+    db.expire_all()
+    assert job.status == "failed" and job.error == "Cancelled"
+    assert func.reported == 0 and job.result is None
+
+
+def test_cancelling_a_queued_job_skips_it(db, queue):
+    blocker, queued = BlockingJob(), BlockingJob()
+    first = queue.enqueue(db, "test", blocker)
+    assert blocker.started.wait(5)
+    second = queue.enqueue(db, "test", queued)
+
+    assert queue.cancel(db, second.id)
+    blocker.release.set()
+    queue.shutdown()
+
+    db.expire_all()
+    assert first.status == "succeeded" and first.result == {'done': True}
+    assert second.status == "failed" and second.error == "Cancelled"
+    assert not queued.started.is_set()
+
+    # Finished jobs can't be cancelled
+    assert not queue.cancel(db, first.id)
+
+
+def test_heartbeat_only_touches_own_active_jobs(db, queue):
+    own = add_job(db, queue.owner, heartbeat_age_seconds=30)
+    add_job(db, queue.owner, heartbeat_age_seconds=30, status="succeeded")
+    peer = add_job(db, "elsewhere:1:abcd", heartbeat_age_seconds=30)
+
+    assert queue.heartbeat(db) == 1
+    db.expire_all()
+    assert own.heartbeat_at > peer.heartbeat_at
+
+
+def test_recover_fails_abandoned_jobs_and_leaves_live_peers(db, queue):
+    host = socket.gethostname()
+    stale = 3600  # Seconds, well past job_heartbeat_timeout_seconds
+    expired_remote = add_job(db, "elsewhere:1:abcd", heartbeat_age_seconds=stale)
+    live_remote = add_job(db, "elsewhere:1:abcd")
+    # An earlier run of this process: same host and pid, another token
+    earlier_run = add_job(db, f"{host}:{os.getpid()}:oldrun00", status="queued")
+    live_local = add_job(db, f"{host}:{os.getppid()}:peer0000")
+    own = add_job(db, queue.owner, heartbeat_age_seconds=stale)
+
+    assert queue.recover(db) == 2
+    db.expire_all()
+    assert expired_remote.status == earlier_run.status == "failed"
+    assert expired_remote.error.startswith("Interrupted")
+    assert live_remote.status == live_local.status == own.status == "running"
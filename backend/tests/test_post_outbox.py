@@ -0,0 +1,157 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+
+from app.models import PostOutboxEntry, Tweet
+from app.services import post_outbox
+from app.services.post_outbox import OUTBOX_CLAIMED, OUTBOX_PENDING, OUTBOX_SENT, PostOutbox
+from app.services.rate_limiter import RateLimited
+
+
+class FakeTwitter:
+    """Both Twitter clients the outbox uses, posting to an in-memory timeline"""
+
+    def __init__(self):
+        self.timeline = []  # {'tweet_id', 'content', 'posted_date'}
+        self.rate_limited = False
+
+    async def post_many(self, tweets):
+        outcomes = []
+        for tweet_id, content in tweets:
+            twitter_id = f"tw{len(self.timeline) + 1}"
+            self.timeline.append({'tweet_id': twitter_id, 'content': content, 'posted_date': None})
+            outcomes.append({'id': tweet_id, 'status': 'posted', 'twitter_id': twitter_id})
+        return outcomes
+
+    def fetch_own_recent_tweets(self):
+        if self.rate_limited:
+            raise RateLimited('timeline', datetime.now(timezone.utc) + timedelta(minutes=15))
+        return list(self.timeline)
+
+
+@pytest.fixture
+def twitter(monkeypatch):
+    fake = FakeTwitter()
+    monkeypatch.setattr(post_outbox, "get_twitter_client", lambda: fake)
+    monkeypatch.setattr(post_outbox, "get_async_twitter_client", lambda: fake)
+    return fake
+
+
+def add_due_tweet(db, content: str = "Due tweet") -> Tweet:
+    tweet = Tweet(
+        content=content,
+        ai_source='claude',
+        status='scheduled',
+        scheduled_time=datetime.now(timezone.utc) - timedelta(minutes=1)
+    )
+    db.add(tweet)
+    db.commit()
+    return tweet
+
+
+def expire_leases(db):
+    db.query(PostOutboxEntry).update({'lease_expires_at': datetime.now(timezone.utc) - timedelta(seconds=1)})
+    db.commit()
+
+
+def test_claim_is_exclusive(db, twitter):
+    tweet = add_due_tweet(db)
+    first, second = PostOutbox(db, worker_id="a"), PostOutbox(db, worker_id="b")
+
+    assert first.enqueue_due() == 1
+    assert first.enqueue_due() == 0
+    assert [tweet_id for _, tweet_id, _ in first.claim(10)] == [tweet.id]
+    assert second.claim(10) == []
+
+
+def test_claim_skips_edited_and_rescheduled_tweets(db, twitter):
+    edited = add_due_tweet(db, "Original text")
+    moved = add_due_tweet(db, "Moved later")
+    outbox = PostOutbox(db)
+    outbox.enqueue_due()
+
+    edited.content = "Edited text"
+    moved.scheduled_time = datetime.now(timezone.utc) + timedelta(hours=1)
+    db.commit()
+    assert outbox.claim(10) == []
+
+    # Enqueueing again re-arms the edited tweet's row with its current text
+    outbox.enqueue_due()
+    assert [content for _, _, content in outbox.claim(10)] == ["Edited text"]
+
+
+def test_drain_posts_each_tweet_once(db, twitter):
+    tweets = [add_due_tweet(db, f"Tweet {i}") for i in range(3)]
+
+    counts = PostOutbox(db).drain()
+    assert counts['posted'] == 3
+    assert PostOutbox(db).drain()['posted'] == 0
+    assert len(twitter.timeline) == 3
+
+    db.expire_all()
+    assert {tweet.status for tweet in tweets} == {'posted'}
+    assert {entry.status for entry in db.query(PostOutboxEntry)} == {OUTBOX_SENT}
+
+
+def test_complete_skips_claims_the_worker_lost(db, twitter):
+    tweet = add_due_tweet(db)
+    stale = PostOutbox(db, worker_id="stale")
+    stale.enqueue_due()
+    claimed = stale.claim(10)
+
+    # The claim expired and another worker found the post on the timeline
+    twitter.timeline.append({'tweet_id': 'tw9', 'content': tweet.content, 'posted_date': None})
+    expire_leases(db)
+    assert PostOutbox(db, worker_id="other").reconcile()['recovered'] == 1
+
+    assert stale.complete(claimed, [{'id': tweet.id, 'status': 'failed', 'error': 'late'}]) == 0
+    db.expire_all()
+    assert tweet.status == 'posted' and tweet.twitter_id == 'tw9'
+
+
+def test_worker_dying_after_posting_never_double_posts(db, twitter):
+    tweet = add_due_tweet(db)
+    crashed = PostOutbox(db, worker_id="crashed")
+    crashed.enqueue_due()
+    claimed = crashed.claim(10)
+
+    # Posted, then died before complete() recorded it
+    post_outbox.run_async(twitter.post_many([(tweet_id, content) for _, tweet_id, content in claimed]))
+    assert len(twitter.timeline) == 1
+
+    # While the lease runs the row is neither reclaimed nor reconciled
+    survivor = PostOutbox(db, worker_id="survivor")
+    assert survivor.drain()['posted'] == 0
+    assert db.query(PostOutboxEntry).one().status == OUTBOX_CLAIMED
+
+    expire_leases(db)
+    survivor.drain()
+    assert len(twitter.timeline) == 1
+    db.expire_all()
+    assert tweet.status == 'posted' and tweet.twitter_id == 'tw1'
+    assert db.query(PostOutboxEntry).one().status == OUTBOX_SENT
+
+
+def test_worker_dying_before_posting_releases_the_tweet(db, twitter):
+    tweet = add_due_tweet(db)
+    crashed = PostOutbox(db, worker_id="crashed")
+    crashed.enqueue_due()
+    crashed.claim(10)
+
+    expire_leases(db)
+    assert PostOutbox(db).reconcile() == {'recovered': 0, 'released': 1, 'deferred': 0}
+    assert db.query(PostOutboxEntry).one().status == OUTBOX_PENDING
+
+    assert PostOutbox(db).drain()['posted'] == 1
+    assert [post['content'] for post in twitter.timeline] == [tweet.content]
+
+
+def test_reconcile_waits_out_the_timeline_rate_limit(db, twitter):
+    add_due_tweet(db)
+    crashed = PostOutbox(db, worker_id="crashed")
+    crashed.enqueue_due()
+    crashed.claim(10)
+    expire_leases(db)
+
+    twitter.rate_limited = True
+    assert PostOutbox(db).reconcile() == {'recovered': 0, 'released': 0, 'deferred': 1}
+    assert db.query(PostOutboxEntry).one().status == OUTBOX_CLAIMED
@@ -0,0 +1,125 @@
+import asyncio
+import time
+import pytest
+
+from app.services import provider_router
+from app.services.provider_router import ProviderRouter, ProviderStats
+
+
+class FakeClient:
+    """Streams canned tweets after a delay, or fails"""
+
+    def __init__(self, delay: float = 0.0, error: Exception = None):
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def astream_tweets(self, count: int, **context):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        for i in range(count):
+            yield f"tweet {i}"
+
+
+@pytest.fixture
+def hedge_settings(monkeypatch):
+    """Hedge after 50ms until a provider has latency samples"""
+    monkeypatch.setattr(provider_router.settings, "provider_hedge_default_delay_seconds", 0.05)
+    monkeypatch.setattr(provider_router.settings, "provider_hedge_min_samples", 100)
+
+
+def collect(router: ProviderRouter, preferred: str, count: int = 2):
+    async def run():
+        return [item async for item in router.astream_tweets(preferred, count)]
+    return asyncio.run(run())
+
+
+def test_circuit_opens_after_consecutive_failures_and_half_opens_after_cooldown():
+    stats = ProviderStats(failure_threshold=2, cooldown_seconds=0.05)
+
+    stats.record_failure()
+    assert stats.allow_request()
+    stats.record_failure()
+    assert stats.snapshot()['state'] == ProviderStats.OPEN
+    assert not stats.allow_request()
+
+    time.sleep(0.06)
+    # One trial request gets through; the next waits for its outcome
+    assert stats.allow_request()
+    assert not stats.allow_request()
+    assert stats.snapshot()['state'] == ProviderStats.HALF_OPEN
+
+    # A failed trial re-opens at once, without reaching the threshold again
+    stats.record_failure()
+    assert stats.snapshot()['state'] == ProviderStats.OPEN
+    assert not stats.allow_request()
+
+    time.sleep(0.06)
+    assert stats.allow_request()
+    stats.record_success(0.1)
+    assert stats.snapshot()['state'] == ProviderStats.CLOSED
+    assert stats.allow_request() and stats.allow_request()
+
+
+def test_abandoned_trial_frees_the_half_open_slot():
+    stats = ProviderStats(failure_threshold=1, cooldown_seconds=0.0)
+    stats.record_failure()
+
+    assert stats.allow_request()
+    assert not stats.allow_request()
+    stats.record_abandoned(0.2, censored=True)
+    assert stats.allow_request()
+
+
+def test_slow_provider_is_hedged_and_recorded_as_censored(hedge_settings):
+    slow, fast = FakeClient(delay=1.0), FakeClient()
+    router = ProviderRouter({'claude': slow, 'chatgpt': fast})
+
+    started = time.monotonic()
+    tweets = collect(router, 'claude')
+
+    assert tweets == [('chatgpt', 'tweet 0'), ('chatgpt', 'tweet 1')]
+    assert time.monotonic() - started < 0.5
+    assert slow.calls == 1 and fast.calls == 1
+
+    # The loser's wait is kept as a lower bound on its latency, not dropped
+    claude = router.stats['claude'].snapshot()
+    assert claude['latency_samples'] == 1 and claude['censored_samples'] == 1
+    assert claude['requests'] == 0
+    assert router.stats['chatgpt'].snapshot()['requests'] == 1
+
+
+def test_fast_provider_is_not_hedged(hedge_settings):
+    fast, other = FakeClient(), FakeClient()
+    router = ProviderRouter({'claude': fast, 'chatgpt': other})
+
+    assert collect(router, 'claude') == [('claude', 'tweet 0'), ('claude', 'tweet 1')]
+    assert other.calls == 0
+
+
+def test_failure_hedges_immediately(hedge_settings, monkeypatch):
+    monkeypatch.setattr(provider_router.settings, "provider_hedge_default_delay_seconds", 10.0)
+    broken, healthy = FakeClient(error=RuntimeError("boom")), FakeClient()
+    router = ProviderRouter({'claude': broken, 'chatgpt': healthy})
+
+    started = time.monotonic()
+    assert collect(router, 'claude', count=1) == [('chatgpt', 'tweet 0')]
+    assert time.monotonic() - started < 1.0
+    assert router.stats['claude'].snapshot()['error_rate'] == 1.0
+
+
+def test_open_circuits_are_skipped(hedge_settings, monkeypatch):
+    monkeypatch.setattr(provider_router.settings, "provider_circuit_failure_threshold", 1)
+    broken, healthy = FakeClient(error=RuntimeError("boom")), FakeClient(error=RuntimeError("down"))
+    router = ProviderRouter({'claude': broken, 'chatgpt': healthy})
+
+    with pytest.raises(RuntimeError):
+        collect(router, 'claude')
+    assert broken.calls == 1 and healthy.calls == 1
+
+    # Both circuits are open now, so nothing is sent
+    with pytest.raises(RuntimeError, match="circuit open"):
+        collect(router, 'claude')
+    assert broken.calls == 1 and healthy.calls == 1
@@ -0,0 +1,9 @@
+import apiClient from './client'
+import { AnalysisSummary } from '../types'
+
+export const analysisApi = {
+  getSummary: async (): Promise<AnalysisSummary> => {
+    const response = await apiClient.get('/api/analysis/')
+    return response.data
+  }
+}
@@ -1,5 +1,5 @@
 import apiClient from './client'
-import { InstagramPost, InstagramPostUpdate } from '../types'
+import { Job, InstagramPost, InstagramPostUpdate } from '../types'
 
 export const instagramApi = {
   getAll: async (status?: string): Promise<InstagramPost[]> => {
@@ -18,6 +18,16 @@ export const instagramApi = {
     return response.data
   },
 
+  // Start a job that turns a tweet into a post (reusing a batch-generated caption if cached);
+  // follow it with jobsApi.waitFor, its result holds instagram_post_id
+  createFromTweet: async (
+    tweetId: number,
+    options: { ai_source?: 'claude' | 'chatgpt'; cache?: 'use' | 'refresh' | 'bypass' } = {}
+  ): Promise<Job> => {
+    const response = await apiClient.post(`/api/instagram/from-tweet/${tweetId}`, options)
+    return response.data
+  },
+
   update: async (id: number, data: InstagramPostUpdate): Promise<InstagramPost> => {
     const response = await apiClient.patch(`/api/instagram/${id}`, data)
     return response.data
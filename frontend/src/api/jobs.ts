@@ -0,0 +1,25 @@
+import apiClient from './client'
+import { Job } from '../types'
+
+export const jobsApi = {
+  getById: async (id: string): Promise<Job> => {
+    const response = await apiClient.get(`/api/jobs/${id}`)
+    return response.data
+  },
+
+  // Ask a queued or running job to stop; it ends up failed with error 'Cancelled'
+  cancel: async (id: string): Promise<Job> => {
+    const response = await apiClient.post(`/api/jobs/${id}/cancel`)
+    return response.data
+  },
+
+  // Poll a job until it succeeds or fails
+  waitFor: async (id: string, onProgress?: (job: Job) => void, intervalMs: number = 1000): Promise<Job> => {
+    while (true) {
+      const job = await jobsApi.getById(id)
+      onProgress?.(job)
+      if (job.status === 'succeeded' || job.status === 'failed') return job
+      await new Promise((resolve) => setTimeout(resolve, intervalMs))
+    }
+  }
+}
@@ -1,5 +1,6 @@
-import apiClient from './client'
-import { Tweet, TweetUpdate } from '../types'
+import apiClient, { API_BASE_URL } from './client'
+import { jobsApi } from './jobs'
+import { Job, Tweet, TweetUpdate, GenerationStreamHandlers, GenerateTweetsResponse } from '../types'
 
 export const tweetsApi = {
   getAll: async (status?: string): Promise<Tweet[]> => {
@@ -22,8 +23,59 @@ export const tweetsApi = {
     await apiClient.delete(`/api/tweets/${id}`)
   },
 
-  generateTweets: async (count: number = 25): Promise<any> => {
+  // Tops pending tweets up to count from the candidate pool; if the pool runs short,
+  // the returned job generates the rest (poll it with jobsApi)
+  generateTweets: async (count: number = 25): Promise<GenerateTweetsResponse> => {
     const response = await apiClient.post('/api/tweets/generate', { count })
     return response.data
+  },
+
+  // Start a job that tops pending tweets up to count
+  createGenerationJob: async (count: number = 25): Promise<Job> => {
+    const response = await apiClient.post('/api/tweets/generate/jobs', { count })
+    return response.data
+  },
+
+  // Top pending tweets up to count: starts a generation job and follows it over
+  // Server-Sent Events; pooled tweets arrive at once, generated ones as soon as they are stored.
+  // Returns a function that closes the stream and cancels the job if it's still running.
+  streamGeneratedTweets: (count: number, handlers: GenerationStreamHandlers): (() => void) => {
+    let source: EventSource | null = null
+    let jobId: string | null = null
+    let finished = false
+
+    tweetsApi.createGenerationJob(count).then((job) => {
+      jobId = job.id
+      if (finished) {
+        jobsApi.cancel(job.id)
+        return
+      }
+
+      source = new EventSource(`${API_BASE_URL}/api/tweets/generate/jobs/${job.id}/stream`)
+      source.addEventListener('tweet', (event) => {
+        handlers.onTweet(JSON.parse((event as MessageEvent).data))
+      })
+      source.addEventListener('done', (event) => {
+        finished = true
+        source?.close()
+        handlers.onDone(JSON.parse((event as MessageEvent).data))
+      })
+      source.addEventListener('error', (event) => {
+        finished = true
+        source?.close()
+        const data = (event as MessageEvent).data
+        handlers.onError(data ? JSON.parse(data).detail : 'Connection to the server was lost')
+      })
+    }).catch((error) => {
+      finished = true
+      handlers.onError(`Could not start generating tweets: ${error.message}`)
+    })
+
+    return () => {
+      if (finished) return
+      finished = true
+      source?.close()
+      if (jobId) jobsApi.cancel(jobId)
+    }
   }
 }
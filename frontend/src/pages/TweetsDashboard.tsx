@@ -29,12 +29,7 @@ function TweetsDashboard() {
     }
   })
 
-  const generateMutation = useMutation({
-    mutationFn: () => tweetsApi.generateTweets(25),
-    onSuccess: () => {
-      queryClient.invalidateQueries({ queryKey: ['tweets'] })
-    }
-  })
+  const [isGenerating, setIsGenerating] = useState(false)
 
   const handleUpdateTweet = (id: number, data: TweetUpdate) => {
     updateMutation.mutate({ id, data })
@@ -47,7 +42,22 @@ function TweetsDashboard() {
   }
 
   const handleGenerateTweets = () => {
-    generateMutation.mutate()
+    setIsGenerating(true)
+    // Pending tweets are kept; new ones fill the column back up to 25 as they arrive
+    tweetsApi.streamGeneratedTweets(25, {
+      onTweet: (tweet) => {
+        queryClient.setQueryData<Tweet[]>(['tweets'], (current) => [tweet, ...(current || [])])
+      },
+      onDone: () => {
+        setIsGenerating(false)
+        queryClient.invalidateQueries({ queryKey: ['tweets'] })
+      },
+      onError: (detail) => {
+        setIsGenerating(false)
+        queryClient.invalidateQueries({ queryKey: ['tweets'] })
+        alert(detail)
+      }
+    })
   }
 
   // Group tweets by status for Kanban view
@@ -90,9 +100,9 @@ function TweetsDashboard() {
           <button
             className="btn btn-primary"
             onClick={handleGenerateTweets}
-            disabled={generateMutation.isPending}
+            disabled={isGenerating}
           >
-            {generateMutation.isPending ? 'Generating...' : 'Generate New Tweets'}
+            {isGenerating ? 'Generating...' : 'Generate New Tweets'}
           </button>
         </div>
       </div>
@@ -8,6 +8,7 @@ export interface Tweet {
   created_at: string
   edited: boolean
   twitter_id: string | null
+  engagement_metrics: { likes: number; retweets: number; replies: number; quotes: number } | null
 }
 
 export interface InstagramPost {
@@ -31,3 +32,45 @@ export interface InstagramPostUpdate {
   caption?: string
   status?: string
 }
+
+export interface AnalysisSummary {
+  version: string
+  total_tweets: number
+  average_length: number
+  top_topics: string[]
+  brand_voice_examples: string[]
+  common_phrases: string[]
+  total_engagement: number
+}
+
+export interface GenerationSummary {
+  tweets_generated: number
+  from_pool: number
+  claude: number
+  chatgpt: number
+  duplicates_dropped: number
+  timestamp: string
+}
+
+export interface GenerationStreamHandlers {
+  onTweet: (tweet: Tweet) => void
+  onDone: (summary: GenerationSummary) => void
+  onError: (detail: string) => void
+}
+
+export interface Job {
+  id: string
+  kind: string
+  status: 'queued' | 'running' | 'succeeded' | 'failed'
+  progress: Record<string, any>
+  result: Record<string, any> | null
+  error: string | null
+  created_at: string | null
+  started_at: string | null
+  finished_at: string | null
+}
+
+export interface GenerateTweetsResponse {
+  served: Tweet[]
+  job: Job | null
+}